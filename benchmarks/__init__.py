@@ -0,0 +1,6 @@
+"""
+Benchmarks for the switch evaluation hot path.
+
+Run ``python -m benchmarks.run --help`` from the repository root (or
+``inv benchmark``) for the available options.
+"""
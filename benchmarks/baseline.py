@@ -0,0 +1,166 @@
+"""
+Times ``Manager.active`` for the working tree against the tree of an earlier
+git revision, such as the commit a change started from::
+
+    python -m benchmarks.baseline --revision master~5
+
+Every tree is measured in a fresh process importing ``gutter`` from that
+tree, on a corpus built only with APIs every version of gutter has: a
+``MemoryDict`` of top-level switches with comparison conditions, checked
+one after the other against a single input.  The best of ``--repeat`` runs
+is reported for each tree, with the change from the revision to the working
+tree.
+"""
+
+# Standard Library
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+from timeit import default_timer
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(switches, conditions, calls, repeat, seed=0):
+    """
+    Returns the best time, in seconds, taken by ``calls`` calls to
+    ``Manager.active`` for the ``gutter`` importable from this process.
+    """
+    from durabledict import MemoryDict
+
+    from gutter.client import arguments
+    from gutter.client.models import Condition, Manager, Switch
+    from gutter.client.operators.comparable import Between, LessThan, \
+        MoreThan
+
+    class User(object):
+
+        def __init__(self, user_id, age):
+            self.user_id = user_id
+            self.age = age
+
+    class UserArguments(arguments.Container):
+        COMPATIBLE_TYPE = User
+
+        user_id = arguments.Value(lambda self: self.input.user_id)
+        age = arguments.Value(lambda self: self.input.age)
+
+    operators = [
+        lambda rand: Condition(UserArguments, 'age',
+                               MoreThan(lower_limit=rand.randint(0, 99))),
+        lambda rand: Condition(UserArguments, 'age',
+                               LessThan(upper_limit=rand.randint(0, 99))),
+        lambda rand: Condition(UserArguments, 'user_id',
+                               Between(lower_limit=10,
+                                       upper_limit=rand.randint(11, 999))),
+    ]
+
+    rand = random.Random(seed)
+    manager = Manager(storage=MemoryDict())
+    names = []
+
+    for index in range(switches):
+        switch = Switch('switch%d' % index, state=Switch.states.SELECTIVE)
+        switch.conditions = [operators[number % len(operators)](rand)
+                             for number in range(conditions)]
+        manager.register(switch)
+        names.append(switch.name)
+
+    user = User(500, 30)
+    active = manager.active
+    best = None
+
+    for _ in range(repeat):
+        start = default_timer()
+
+        for number in xrange(calls):
+            active(names[number % switches], user)
+
+        elapsed = default_timer() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return best
+
+
+def run_in(tree, options):
+    """
+    Runs ``measure`` in a new process importing ``gutter`` from ``tree``.
+    """
+    environment = dict(os.environ, PYTHONPATH=tree)
+    output = subprocess.check_output([
+        sys.executable, os.path.abspath(__file__), '--measure',
+        '--switches', str(options.switches),
+        '--conditions', str(options.conditions),
+        '--calls', str(options.calls),
+        '--repeat', str(options.repeat),
+    ], env=environment, cwd=tree)
+
+    return json.loads(output)['best']
+
+
+def checkout(revision):
+    """
+    Checks ``revision`` out in a temporary git worktree and returns its path.
+    """
+    path = tempfile.mkdtemp(prefix='gutter-baseline-')
+    os.rmdir(path)
+    subprocess.check_call(
+        ['git', 'worktree', 'add', '--detach', '--quiet', path, revision],
+        cwd=ROOT
+    )
+    return path
+
+
+def remove(path):
+    subprocess.call(['git', 'worktree', 'remove', '--force', path], cwd=ROOT)
+    shutil.rmtree(path, ignore_errors=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--revision', default='HEAD',
+                        help='git revision to compare with (default: HEAD)')
+    parser.add_argument('--switches', type=int, default=300)
+    parser.add_argument('--conditions', type=int, default=3,
+                        help='conditions per switch')
+    parser.add_argument('--calls', type=int, default=20000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--measure', action='store_true',
+                        help=argparse.SUPPRESS)
+    options = parser.parse_args(argv)
+
+    if options.measure:
+        best = measure(options.switches, options.conditions, options.calls,
+                       options.repeat)
+        sys.stdout.write(json.dumps(dict(best=best)))
+        return 0
+
+    baseline_tree = checkout(options.revision)
+
+    try:
+        baseline = run_in(baseline_tree, options)
+    finally:
+        remove(baseline_tree)
+
+    current = run_in(ROOT, options)
+
+    row = '%-20s %10s %12s\n'
+    sys.stdout.write(row % ('tree', 'seconds', 'calls/sec'))
+    sys.stdout.write(row % (options.revision[:20], '%.3f' % baseline,
+                            '%.0f' % (options.calls / baseline)))
+    sys.stdout.write(row % ('working tree', '%.3f' % current,
+                            '%.0f' % (options.calls / current)))
+    sys.stdout.write('throughput change: %+.1f%%\n' % (
+        (baseline / current - 1) * 100
+    ))
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
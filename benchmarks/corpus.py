@@ -0,0 +1,207 @@
+"""
+Synthetic switch corpora for the benchmarks.
+"""
+
+# Standard Library
+import random
+
+# External Libraries
+from durabledict import MemoryDict
+from durabledict.encoding import PickleEncoding
+
+from gutter.client import arguments
+from gutter.client.models import Condition, Manager, Switch
+from gutter.client.operators.comparable import Between, Equals, LessThan, \
+    MoreThan
+from gutter.client.operators.identity import Truthy
+from gutter.client.operators.misc import Percent, PercentRange, StablePercent
+from gutter.client.storage import SnapshotDict
+
+
+class User(object):
+
+    def __init__(self, user_id, name, age, staff):
+        self.user_id = user_id
+        self.name = name
+        self.age = age
+        self.staff = staff
+
+
+class UserArguments(arguments.Container):
+    COMPATIBLE_TYPE = User
+
+    user_id = arguments.Integer(lambda self: self.input.user_id)
+    name = arguments.String(lambda self: self.input.name)
+    age = arguments.Integer(lambda self: self.input.age)
+    staff = arguments.Boolean(lambda self: self.input.staff)
+
+
+#: Operator name -> function building a condition from a ``random.Random``
+CONDITIONS = {
+    'equals': lambda rand: Condition(
+        UserArguments, 'age', Equals(value=rand.randint(0, 99))
+    ),
+    'between': lambda rand: Condition(
+        UserArguments, 'age',
+        Between(lower_limit=rand.randint(0, 40),
+                upper_limit=rand.randint(41, 99))
+    ),
+    'less_than': lambda rand: Condition(
+        UserArguments, 'age', LessThan(upper_limit=rand.randint(0, 99))
+    ),
+    'more_than': lambda rand: Condition(
+        UserArguments, 'age', MoreThan(lower_limit=rand.randint(0, 99))
+    ),
+    'truthy': lambda rand: Condition(
+        UserArguments, 'staff', Truthy()
+    ),
+    'percent': lambda rand: Condition(
+        UserArguments, 'user_id', Percent(percentage=rand.randint(1, 99))
+    ),
+    'percent_range': lambda rand: Condition(
+        UserArguments, 'user_id',
+        PercentRange(lower_limit=rand.randint(0, 49),
+                     upper_limit=rand.randint(50, 100))
+    ),
+    'stable_percent': lambda rand: Condition(
+        UserArguments, 'name',
+        StablePercent(percentage=rand.randint(1, 99),
+                      salt='salt-%d' % rand.randint(0, 9))
+    ),
+}
+
+DEFAULT_OPERATORS = 'between:2,more_than:2,less_than:1,equals:1,truthy:1,' \
+                    'percent:2,percent_range:1'
+
+
+class DatastoreStandIn(MemoryDict):
+
+    """
+    An in-memory stand-in for ``datastoredict.DatastoreDict``.
+
+    Like the datastore storage, every switch is pickled when written and every
+    switch is unpickled again whenever a write bumps the last-updated stamp.
+    """
+
+    def __init__(self):
+        super(DatastoreStandIn, self).__init__(encoding=PickleEncoding)
+
+
+def durable(storage, items):
+    # Persisting everything before a single sync avoids reloading the whole
+    # storage after every write.
+    for key, value in items:
+        storage.persist(key, value)
+
+    storage.sync()
+    return storage
+
+
+#: Storage name -> function building a storage holding ``items``
+STORAGES = {
+    'memory': lambda items: durable(MemoryDict(), items),
+    'datastore': lambda items: durable(DatastoreStandIn(), items),
+    'snapshot': lambda items: SnapshotDict(
+        durable(DatastoreStandIn(), items)
+    ),
+}
+
+
+def parse_operators(spec):
+    """
+    Parses an operator mix such as ``'between:2,percent:1'`` into a list of
+    ``(name, weight)`` pairs.  A missing weight counts as 1.
+    """
+    mix = []
+
+    for part in spec.split(','):
+        name, _, weight = part.strip().partition(':')
+
+        if name not in CONDITIONS:
+            raise ValueError('Unknown operator %r, choose from %s' % (
+                name, ', '.join(sorted(CONDITIONS))
+            ))
+
+        mix.append((name, int(weight or 1)))
+
+    return mix
+
+
+class Corpus(object):
+
+    """
+    A reproducible set of switches and inputs.
+
+    ``switches`` switches are spread over ``depth`` levels of hierarchy, each
+    switch below the top level being the child of a random switch on the
+    level above.  Every switch gets ``conditions`` conditions drawn from the
+    weighted ``operators`` mix, and every evaluation is made against
+    ``inputs`` users.
+    """
+
+    def __init__(
+        self,
+        switches=1000,
+        conditions=3,
+        depth=3,
+        inputs=1,
+        operators=DEFAULT_OPERATORS,
+        seed=0
+    ):
+        self.params = dict(
+            switches=switches,
+            conditions=conditions,
+            depth=depth,
+            inputs=inputs,
+            operators=operators,
+            seed=seed,
+        )
+
+        rand = random.Random(seed)
+        mix = parse_operators(operators)
+        names = [name for name, weight in mix for _ in range(weight)]
+
+        self.switches = []
+        levels = [[] for _ in range(max(depth, 1))]
+
+        for index in range(switches):
+            level = index % len(levels)
+            name = 'switch%d' % index
+
+            if level:
+                name = '%s:%s' % (rand.choice(levels[level - 1]).name, name)
+
+            switch = Switch(
+                name,
+                state=Switch.states.SELECTIVE,
+                compounded=rand.random() < 0.5
+            )
+            switch.conditions = [
+                CONDITIONS[rand.choice(names)](rand)
+                for _ in range(conditions)
+            ]
+
+            levels[level].append(switch)
+            self.switches.append(switch)
+
+        self.inputs = [
+            User(rand.randint(0, 10 ** 6), 'user%d' % rand.randint(0, 10 ** 6),
+                 rand.randint(0, 99), rand.random() < 0.1)
+            for _ in range(inputs)
+        ]
+
+    @property
+    def names(self):
+        return [switch.name for switch in self.switches]
+
+    def manager(self, storage='memory'):
+        """
+        Returns a ``Manager`` with every switch registered in a new storage
+        of the given kind (see ``STORAGES``).
+        """
+        staging = Manager(storage={})
+
+        for switch in self.switches:
+            staging.register(switch)
+
+        return Manager(storage=STORAGES[storage](staging.storage.items()))
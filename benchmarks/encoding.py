@@ -0,0 +1,89 @@
+"""
+Compares the time taken to encode and decode switches, and the size of the
+encoded switches, between the switch storage encodings::
+
+    python -m benchmarks.encoding --switches 2000
+"""
+
+# Standard Library
+import argparse
+import json
+import sys
+from timeit import default_timer
+
+# External Libraries
+from durabledict.encoding import PickleEncoding
+
+from benchmarks.corpus import Corpus
+from gutter.client.encoding import JsonPickleEncoding, SchemaEncoding
+
+ENCODINGS = (
+    ('schema', SchemaEncoding),
+    ('jsonpickle', JsonPickleEncoding),
+    ('pickle', PickleEncoding),
+)
+
+
+def measure(corpus, repeat=3):
+    """
+    Returns, for every encoding, the best of ``repeat`` timings of encoding
+    and decoding every switch of ``corpus``, per switch, and the mean size of
+    an encoded switch.
+    """
+    switches = corpus.switches
+    count = float(len(switches))
+    results = {}
+
+    for name, encoding in ENCODINGS:
+        encoded = [encoding.encode(switch) for switch in switches]
+
+        results[name] = dict(
+            encode_us=best(repeat, encoding.encode, switches) / count * 1e6,
+            decode_us=best(repeat, encoding.decode, encoded) / count * 1e6,
+            bytes=sum(map(len, encoded)) / count,
+        )
+
+    return dict(corpus=corpus.params, results=results)
+
+
+def best(repeat, func, values):
+    timings = []
+
+    for _ in xrange(repeat):
+        start = default_timer()
+        for value in values:
+            func(value)
+        timings.append(default_timer() - start)
+
+    return min(timings)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--switches', type=int, default=2000)
+    parser.add_argument('--conditions', type=int, default=3,
+                        help='conditions per switch')
+    parser.add_argument('--output', help='write the results to this file')
+    options = parser.parse_args(argv)
+
+    results = measure(Corpus(switches=options.switches,
+                             conditions=options.conditions))
+
+    sys.stdout.write('%-12s %12s %12s %10s\n' % (
+        'encoding', 'encode us', 'decode us', 'bytes'
+    ))
+    for name, _ in ENCODINGS:
+        result = results['results'][name]
+        sys.stdout.write('%-12s %12.1f %12.1f %10.0f\n' % (
+            name, result['encode_us'], result['decode_us'], result['bytes']
+        ))
+
+    if options.output:
+        with open(options.output, 'w') as output:
+            json.dump(results, output, indent=2, sort_keys=True)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""
+Measures the memory used by each switch, and the time taken to unpickle
+switches, for the current ``Switch`` and for the dict-based layout switches
+had before they used ``__slots__`` (a ``__dict__`` plus a full copy of it for
+change tracking)::
+
+    python -m benchmarks.memory --switches 10000
+"""
+
+# Standard Library
+import argparse
+import gc
+import json
+import pickle
+import sys
+from timeit import default_timer
+
+from benchmarks.corpus import Corpus
+from gutter.client.models import Condition
+
+
+class LegacySwitch(object):
+
+    """
+    A switch laid out the way ``Switch`` used to be.
+    """
+
+    def __init__(self, switch):
+        state = dict((field, getattr(switch, field))
+                     for field in switch.fields)
+        state['conditions'] = list(switch.conditions)
+        state['manager'] = None
+
+        self.__dict__.update(state)
+        self.__dict__['_Switch__init_vars'] = dict(state)
+
+    def __setstate__(self, state):
+        self.__dict__ = state
+
+
+#: Objects that are shared between switches, or interned, and so don't count
+#: towards a switch's own footprint
+SHARED_TYPES = (type, Condition, int, long, float, bool, type(None))
+
+
+def footprint(obj):
+    """
+    Returns the size in bytes of ``obj`` and every object only it refers to.
+    """
+    seen = set()
+    stack = [obj]
+    total = 0
+
+    while stack:
+        current = stack.pop()
+
+        if id(current) in seen or isinstance(current, SHARED_TYPES):
+            continue
+
+        seen.add(id(current))
+        total += sys.getsizeof(current)
+        stack.extend(gc.get_referents(current))
+
+    return total
+
+
+def unpickle_time(objects):
+    data = [pickle.dumps(obj, pickle.HIGHEST_PROTOCOL) for obj in objects]
+    loads = pickle.loads
+
+    start = default_timer()
+    for item in data:
+        loads(item)
+    return default_timer() - start
+
+
+def measure(corpus):
+    switches = corpus.switches
+    legacy = [LegacySwitch(switch) for switch in switches]
+    count = float(len(switches))
+
+    results = {}
+
+    for name, objects in (('slots', switches), ('legacy', legacy)):
+        results[name] = dict(
+            bytes_per_switch=sum(map(footprint, objects)) / count,
+            unpickle_us_per_switch=unpickle_time(objects) / count * 1e6,
+        )
+
+    results['savings'] = dict(
+        bytes_per_switch=(results['legacy']['bytes_per_switch'] -
+                          results['slots']['bytes_per_switch']),
+        ratio=(results['slots']['bytes_per_switch'] /
+               results['legacy']['bytes_per_switch']),
+    )
+
+    return dict(corpus=corpus.params, results=results)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--switches', type=int, default=10000)
+    parser.add_argument('--conditions', type=int, default=3,
+                        help='conditions per switch')
+    parser.add_argument('--output', help='write the results to this file')
+    options = parser.parse_args(argv)
+
+    results = measure(Corpus(switches=options.switches,
+                             conditions=options.conditions))
+
+    for name in ('slots', 'legacy'):
+        sys.stdout.write('%-8s %8.0f bytes/switch %8.1f us/unpickle\n' % (
+            name,
+            results['results'][name]['bytes_per_switch'],
+            results['results'][name]['unpickle_us_per_switch'],
+        ))
+
+    savings = results['results']['savings']
+    sys.stdout.write('saves    %8.0f bytes/switch (%.0f%% of legacy)\n' % (
+        savings['bytes_per_switch'], (1 - savings['ratio']) * 100
+    ))
+
+    if options.output:
+        with open(options.output, 'w') as output:
+            json.dump(results, output, indent=2, sort_keys=True)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,242 @@
+"""
+Measures the switch evaluation hot path against a synthetic corpus.
+
+Results are printed as a table and can be written to a JSON file.  Given a
+baseline JSON file from an earlier run, every benchmark that got slower than
+the allowed tolerance is flagged and the process exits with status 1::
+
+    python -m benchmarks.run --switches 5000 --output baseline.json
+    python -m benchmarks.run --switches 5000 --compare baseline.json
+"""
+
+# Standard Library
+import argparse
+import itertools
+import json
+import platform
+import sys
+import time
+from timeit import default_timer
+
+from benchmarks.corpus import Corpus, DEFAULT_OPERATORS, STORAGES
+from gutter.client import compiler
+
+
+def measure(func, iterations):
+    """
+    Calls ``func`` ``iterations`` times, timing every call, and returns the
+    throughput in calls per second and the p50 and p99 latencies in
+    microseconds.
+    """
+    timings = []
+    timer = default_timer
+
+    for _ in xrange(iterations):
+        start = timer()
+        func()
+        timings.append(timer() - start)
+
+    timings.sort()
+    total = sum(timings)
+
+    return dict(
+        iterations=iterations,
+        ops_per_sec=iterations / total if total else float('inf'),
+        p50_us=percentile(timings, 50) * 1e6,
+        p99_us=percentile(timings, 99) * 1e6,
+    )
+
+
+def percentile(timings, percent):
+    """
+    Returns the ``percent``th percentile of the sorted ``timings``.
+    """
+    index = int(round(percent / 100.0 * (len(timings) - 1)))
+    return timings[index]
+
+
+def cycle(values):
+    # A cheap endless iterator over values, for the benchmarked closures
+    return itertools.cycle(values).next
+
+
+def benchmarks(corpus, manager, iterations):
+    """
+    Returns ``(name, callable, iterations)`` for every benchmark.
+    """
+    inputs = tuple(corpus.inputs)
+    next_name = cycle(corpus.names)
+    next_switch = cycle([manager.switch(name) for name in corpus.names])
+    next_input = cycle(inputs)
+    batch = corpus.names[:50]
+
+    def active_with_input():
+        # Inputs set for a request and flushed after it, on one thread
+        manager.input(*inputs)
+        manager.active(next_name())
+        manager.flush()
+
+    def active_in_inputs_scope():
+        with manager.inputs_scope(*inputs):
+            manager.active(next_name())
+
+    return [
+        ('active', lambda: manager.active(next_name(), *inputs), iterations),
+        ('active_with_input', active_with_input, iterations),
+        ('inputs_scope', active_in_inputs_scope, iterations),
+        ('active_many', lambda: manager.active_many(batch, *inputs),
+         max(iterations // len(batch), 1)),
+        ('enabled_for', lambda: next_switch().enabled_for(next_input()),
+         iterations),
+        ('switches', lambda: manager.switches, max(iterations // 100, 1)),
+    ]
+
+
+def run(corpus, storages, iterations):
+    results = {}
+
+    for storage in storages:
+        manager = corpus.manager(storage)
+        results[storage] = {}
+
+        for name, func, count in benchmarks(corpus, manager, iterations):
+            # Warm up caches before measuring
+            for _ in xrange(min(count, 100)):
+                func()
+
+            results[storage][name] = measure(func, count)
+
+    return dict(
+        meta=dict(
+            python=platform.python_version(),
+            platform=platform.platform(),
+            timestamp=time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()),
+            iterations=iterations,
+            compiled=compiler.enabled,
+            corpus=corpus.params,
+        ),
+        results=results,
+    )
+
+
+def compare(current, baseline, tolerance=0.1):
+    """
+    Compares two sets of results and returns a list of regressions, as
+    ``(storage, benchmark, metric, baseline value, current value)`` tuples.
+
+    A benchmark regressed if its throughput dropped, or its p50 latency rose,
+    by more than ``tolerance`` (a fraction) of its baseline value.  p99
+    latencies are too noisy to be flagged on their own.
+    """
+    regressions = []
+
+    for storage, benchmarks in sorted(current['results'].items()):
+        for name, result in sorted(benchmarks.items()):
+            try:
+                base = baseline['results'][storage][name]
+            except KeyError:
+                continue
+
+            if result['ops_per_sec'] < base['ops_per_sec'] * (1 - tolerance):
+                regressions.append((storage, name, 'ops_per_sec',
+                                    base['ops_per_sec'],
+                                    result['ops_per_sec']))
+
+            if result['p50_us'] > base['p50_us'] * (1 + tolerance):
+                regressions.append((storage, name, 'p50_us',
+                                    base['p50_us'], result['p50_us']))
+
+    return regressions
+
+
+def report(results, baseline=None, out=sys.stdout):
+    row = '%-10s %-18s %14s %10s %10s %10s\n'
+    out.write(row % ('storage', 'benchmark', 'ops/sec', 'p50 us', 'p99 us',
+                     'change'))
+
+    for storage, benchmarks in sorted(results['results'].items()):
+        for name, result in sorted(benchmarks.items()):
+            change = ''
+
+            if baseline is not None:
+                base = baseline['results'].get(storage, {}).get(name)
+                if base:
+                    change = '%+.1f%%' % (
+                        (result['ops_per_sec'] / base['ops_per_sec'] - 1)
+                        * 100
+                    )
+
+            out.write(row % (storage, name,
+                             '%.0f' % result['ops_per_sec'],
+                             '%.1f' % result['p50_us'],
+                             '%.1f' % result['p99_us'],
+                             change))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0])
+    parser.add_argument('--switches', type=int, default=1000)
+    parser.add_argument('--conditions', type=int, default=3,
+                        help='conditions per switch')
+    parser.add_argument('--depth', type=int, default=3,
+                        help='levels of switch hierarchy')
+    parser.add_argument('--inputs', type=int, default=1,
+                        help='inputs passed to every check')
+    parser.add_argument('--operators', default=DEFAULT_OPERATORS,
+                        help='weighted operator mix, as name:weight pairs')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--storage', action='append',
+                        choices=sorted(STORAGES),
+                        help='storage to benchmark, may be repeated '
+                             '(default: all)')
+    parser.add_argument('--iterations', type=int, default=10000)
+    parser.add_argument('--compiled', action='store_true',
+                        help='evaluate switches with compiled functions')
+    parser.add_argument('--output', help='write the results to this file')
+    parser.add_argument('--compare', metavar='BASELINE',
+                        help='flag regressions against this results file')
+    parser.add_argument('--tolerance', type=float, default=0.1,
+                        help='allowed slowdown before flagging, as a '
+                             'fraction (default: 0.1)')
+    options = parser.parse_args(argv)
+
+    if options.compiled:
+        compiler.enable()
+
+    corpus = Corpus(
+        switches=options.switches,
+        conditions=options.conditions,
+        depth=options.depth,
+        inputs=options.inputs,
+        operators=options.operators,
+        seed=options.seed,
+    )
+    results = run(corpus, options.storage or sorted(STORAGES),
+                  options.iterations)
+
+    baseline = None
+    if options.compare:
+        with open(options.compare) as baseline_file:
+            baseline = json.load(baseline_file)
+
+    report(results, baseline)
+
+    if options.output:
+        with open(options.output, 'w') as output:
+            json.dump(results, output, indent=2, sort_keys=True)
+
+    if baseline is not None:
+        regressions = compare(results, baseline, options.tolerance)
+
+        for storage, name, metric, before, after in regressions:
+            sys.stdout.write('REGRESSION %s %s %s: %.1f -> %.1f\n' % (
+                storage, name, metric, before, after
+            ))
+
+        return 1 if regressions else 0
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
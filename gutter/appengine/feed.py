@@ -0,0 +1,125 @@
+"""
+Change feed
+"""
+from google.appengine.api import memcache
+from google.appengine.ext import ndb
+
+from gutter.client.feed import Change
+
+
+class FeedHeadModel(ndb.Model):
+    """
+    The latest generation published to a ``DatastoreFeed``, and the parent
+    of its ``FeedGenerationModel`` entities.
+    """
+    generation = ndb.IntegerProperty(default=0, indexed=False)
+
+
+class FeedGenerationModel(ndb.Model):
+    """
+    The keys written by one generation of a ``DatastoreFeed`` and their ops,
+    with the generation as its id.
+    """
+    keys = ndb.StringProperty(repeated=True, indexed=False)
+    ops = ndb.StringProperty(repeated=True, indexed=False)
+
+
+class DatastoreFeed(object):
+    """
+    A change feed shared by every instance of an application.
+
+    Generations are numbered in a transaction on one ``FeedHeadModel``
+    entity, and the last ``retain`` of them are kept as its children.  The
+    head is cached under one memcache key, which is all readers poll between
+    writes.  The cached head only ever moves forward, and is read back from
+    the datastore when memcache loses it.
+    """
+
+    def __init__(self, name='gutter', retain=1000, cache=None):
+        self.name = name
+        self.retain = retain
+        self.cache = cache or memcache.Client()
+        self.cache_key = 'gutter-feed-%s-head' % name
+        self.head_key = ndb.Key(FeedHeadModel, name, namespace='')
+
+    def head(self):
+        generation = self.cache.get(self.cache_key)
+
+        if generation is None:
+            head = self.head_key.get()
+            generation = head.generation if head else 0
+            self.cache.add(self.cache_key, generation)
+
+        return generation
+
+    def publish(self, changes):
+        generation = self._publish(list(changes))
+        self.__advance_cached_head(generation)
+        return generation
+
+    @ndb.transactional
+    def _publish(self, changes):
+        head = self.head_key.get() or FeedHeadModel(key=self.head_key)
+        head.generation += 1
+
+        ndb.put_multi([
+            head,
+            FeedGenerationModel(
+                key=self.__generation_key(head.generation),
+                keys=[key for key, _ in changes],
+                ops=[op for _, op in changes],
+            ),
+        ])
+
+        expired = head.generation - self.retain
+        if expired > 0:
+            self.__generation_key(expired).delete()
+
+        return head.generation
+
+    def since(self, generation):
+        head = self.head()
+
+        if generation is None or generation > head:
+            return None
+
+        if head - generation > self.retain:
+            return None
+
+        entities = ndb.get_multi([
+            self.__generation_key(number)
+            for number in xrange(generation + 1, head + 1)
+        ])
+
+        if None in entities:
+            return None
+
+        changes = []
+
+        for entity in entities:
+            changes.extend(
+                Change(entity.key.id(), key, op)
+                for key, op in zip(entity.keys, entity.ops)
+            )
+
+        return changes
+
+    def __generation_key(self, generation):
+        return ndb.Key(FeedGenerationModel, generation, parent=self.head_key)
+
+    def __advance_cached_head(self, generation, attempts=10):
+        # Concurrent publishers may finish in any order, so compare-and-set
+        # the cached head rather than overwrite a later generation.
+        for _ in xrange(attempts):
+            cached = self.cache.gets(self.cache_key)
+
+            if cached is None:
+                if self.cache.add(self.cache_key, generation):
+                    return
+            elif cached >= generation:
+                return
+            elif self.cache.cas(self.cache_key, generation):
+                return
+
+        # Let readers fetch it from the datastore instead
+        self.cache.delete(self.cache_key)
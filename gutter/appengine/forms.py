@@ -5,6 +5,7 @@ import wtforms
 from gutter.client.models import Switch, Condition
 
 from . import wtforms_extension
+from . import registry
 from .registry import operators, arguments
 
 
@@ -13,9 +14,12 @@ class ConditionForm(wtforms.Form):
     Form defining the individual condition of a switch.
     """
 
-    argument = wtforms_extension.SelectField(choices=arguments.as_choices)
+    # The registries memoize their choices until something is registered
+    argument = wtforms_extension.SelectField(
+        choices=lambda: registry.arguments.as_choices)
     negative = wtforms.SelectField(choices=(('0', 'Is'), ('1', 'Is Not')))
-    operator = wtforms_extension.SelectField(choices=operators.as_choices)
+    operator = wtforms_extension.SelectField(
+        choices=lambda: registry.operators.as_choices)
 
     operator_arguments = wtforms.FieldList(wtforms.StringField(),
                                            min_entries=2,
@@ -58,8 +62,8 @@ class SwitchForm(wtforms.Form):
                         compounded=self.compounded.data,
                         concent=self.concent.data)
 
-        for condition in self.conditions:
-            switch.conditions.append(self.make_condition(condition))
+        switch.conditions = [self.make_condition(condition)
+                             for condition in self.conditions]
 
         return switch
 
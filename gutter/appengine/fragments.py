@@ -0,0 +1,62 @@
+"""
+Rendered switch fragments
+"""
+from gutter.client import signals
+from gutter.client.cache import LRUCache
+
+import forms
+
+
+class SwitchFragments(object):
+    """
+    Caches the HTML rendered for each switch by the ``render_switch`` macro
+    of ``_switch.html``.
+
+    Fragments are keyed by switch name and kept with the version of the
+    switch they were rendered from: the switch object itself and its
+    ``revision``.  Storages hand out new switch objects once a switch has
+    been changed on another instance, and switches changed here move their
+    ``revision``, so a changed switch is re-rendered, while an unchanged one
+    is served from the cache without even building its form.  Fragments of
+    switches written or unregistered by this process are also dropped as
+    soon as the corresponding signal is sent.
+    """
+
+    def __init__(self, environment, maxsize=5000):
+        self.environment = environment
+        self.cache = LRUCache(maxsize)
+        self.renders = 0
+
+        self.__macro = None
+
+        for signal in (signals.switch_registered, signals.switch_updated,
+                       signals.switch_unregistered):
+            signal.connect(self.discard)
+
+    def render(self, switch):
+        """
+        Returns the fragment for ``switch``, rendering it if it isn't cached
+        for the switch's current version.
+        """
+        revision = switch.revision
+        cached = self.cache.get(switch.name)
+
+        if (cached is not None and cached[0] is switch
+                and cached[1] == revision):
+            return cached[2]
+
+        fragment = self.__render(forms.SwitchForm.from_object(switch))
+        self.renders += 1
+        self.cache.set(switch.name, (switch, revision, fragment))
+
+        return fragment
+
+    def discard(self, switch):
+        self.cache.pop(switch.name)
+
+    def __render(self, form):
+        if self.__macro is None:
+            template = self.environment.get_template('_switch.html')
+            self.__macro = template.module.render_switch
+
+        return self.__macro(form)
@@ -1,32 +1,73 @@
 """
 handlers
 """
+import json
 import os
+import urllib
 import webapp2
 from webapp2_extras import jinja2
 
+from gutter.client import stats
 from gutter.client.default import gutter
 
 import forms
+import fragments
+import pagination
 
 
 CURRENT_PATH = os.path.abspath(os.path.dirname(__file__))
 TEMPLATE_PATH = os.path.join(CURRENT_PATH, 'templates')
 
 
+def jinja2_factory(app):
+    """
+    Builds the Jinja2 renderer shared by every request to ``app``, with all
+    the admin templates compiled up front.
+    """
+    config = {
+        'template_path': TEMPLATE_PATH,
+        'environment_args': {
+            'autoescape': True,
+            'extensions': ['jinja2.ext.autoescape', 'jinja2.ext.with_'],
+            # Templates only change on deploy
+            'auto_reload': False,
+            'cache_size': -1,
+        },
+    }
+    renderer = jinja2.Jinja2(app, config=config)
+
+    for name in renderer.environment.list_templates():
+        renderer.environment.get_template(name)
+
+    return renderer
+
+
+def fragments_factory(app):
+    """
+    Builds the switch fragment cache shared by every request to ``app``.
+    """
+    return fragments.SwitchFragments(
+        jinja2.get_jinja2(factory=jinja2_factory, app=app).environment
+    )
+
+
 class BaseHandler(webapp2.RequestHandler):
     """
     Sets up Jinja templating path.
     """
 
+    @webapp2.cached_property
+    def jinja2(self):
+        """
+        The app's shared Jinja2 renderer.
+        """
+        return jinja2.get_jinja2(factory=jinja2_factory, app=self.app)
+
     def render_response(self, template, **context):
         """
         Renders a template and writes the result to the response.
         """
-        app = webapp2.WSGIApplication.active_instance
-        config = {'template_path': TEMPLATE_PATH, }
-        jinja = jinja2.Jinja2(app, config=config)
-        rv = jinja.render_template(template, **context)
+        rv = self.jinja2.render_template(template, **context)
         self.response.write(rv)
 
 
@@ -35,21 +76,50 @@ class IndexHandler(BaseHandler):
     Managing the list of switches.
     """
 
+    filters = ('name', 'namespace', 'state', 'argument')
+
     def get(self, errors=None):
         """
-        Displays the list of enabled switches.
+        Displays one page of the switches matching the search filters.
         """
         new_switch = forms.SwitchForm()
         new_condition = forms.ConditionForm()
+
+        search = dict((key, self.request.get(key).strip())
+                      for key in self.filters)
+        state = search['state']
+
+        page = pagination.search(
+            gutter,
+            cursor=self.request.get('cursor') or None,
+            limit=self.request.get_range('limit',
+                                         default=pagination.DEFAULT_LIMIT),
+            name=search['name'],
+            namespace=search['namespace'],
+            state=int(state) if state.isdigit() else None,
+            argument=search['argument'],
+        )
+
+        cache = self.app.registry.get('gutter.fragments')
+        if cache is None:
+            cache = self.app.registry['gutter.fragments'] = \
+                fragments_factory(self.app)
+
         # Used built-in function map, pylint: disable=W0141
-        switches = sorted(map(forms.SwitchForm.from_object, gutter.switches),
-                          key=lambda x: x.name.data)
+        switches = map(cache.render, page.switches)
 
         context = {
             'new_switch': new_switch,
             'new_condition': new_condition,
             'switches': switches,
+            'search': search,
+            'filtered': any(search.values()),
+            'states': forms.SwitchForm.state.kwargs['choices'],
+            'first_url': page.cursor and self.__url(search),
+            'next_url': page.next_cursor and self.__url(search,
+                                                        page.next_cursor),
             'errors': errors,
+            'active_page': 'index',
         }
         self.render_response('index.html', **context)
 
@@ -72,3 +142,51 @@ class IndexHandler(BaseHandler):
         gutter.register(switch)
 
         return self.redirect('/gutter/')
+
+    @staticmethod
+    def __url(search, cursor=None):
+        query = dict((key, value.encode('utf-8'))
+                     for key, value in search.items() if value)
+
+        if cursor:
+            query['cursor'] = cursor
+
+        return '/gutter/?' + urllib.urlencode(sorted(query.items()))
+
+
+class StatsHandler(BaseHandler):
+    """
+    Per-switch evaluation statistics.
+    """
+
+    def get(self):
+        """
+        Displays the statistics of every checked switch, most expensive
+        first, or returns them as JSON if ``format=json``.
+        """
+        snapshot = stats.snapshot()
+        storage = getattr(gutter.storage, 'stats', None)
+        decisions = None
+
+        if gutter.decision_cache is not None:
+            decisions = gutter.decision_cache.stats
+
+        if self.request.get('format') == 'json':
+            self.response.content_type = 'application/json'
+            self.response.write(json.dumps(
+                {'enabled': stats.enabled, 'switches': snapshot,
+                 'decisions': decisions, 'storage': storage},
+                sort_keys=True
+            ))
+            return
+
+        switches = sorted(snapshot.items(), key=lambda x: -x[1]['time'])
+
+        context = {
+            'enabled': stats.enabled,
+            'switches': switches,
+            'decisions': decisions,
+            'storage': storage,
+            'active_page': 'stats',
+        }
+        self.render_response('stats.html', **context)
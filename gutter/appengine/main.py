@@ -6,5 +6,8 @@ import webapp2
 
 ROUTES = [webapp2.SimpleRoute('/gutter/?',
                               handler='gutter.appengine.handlers.IndexHandler',
-                              name='index'), ]
+                              name='index'),
+          webapp2.SimpleRoute('/gutter/stats/?',
+                              handler='gutter.appengine.handlers.StatsHandler',
+                              name='stats'), ]
 APP = webapp2.WSGIApplication(ROUTES)
@@ -2,11 +2,17 @@
 Default manager instance
 """
 from gutter.client.models import Manager
+from gutter.client.storage import SnapshotDict
+from gutter.appengine.feed import DatastoreFeed
 from gutter.appengine.models import SwitchModel
-from datastoredict import DatastoreDict
+from gutter.appengine.storage import BatchDatastoreDict
 
 
+# Reads are served from an in-process snapshot of every switch.  Writes are
+# published to a change feed, and other instances only read back the
+# switches written once they see its memcache head move.
 default_manager = Manager(
-    storage=DatastoreDict(SwitchModel),
+    storage=SnapshotDict(BatchDatastoreDict(SwitchModel),
+                         feed=DatastoreFeed()),
     autocreate=True,
 )
@@ -3,10 +3,33 @@ Models
 """
 from google.appengine.ext import ndb
 
+from gutter.client.encoding import EncodingError, SchemaEncoding
+
+
+class SwitchProperty(ndb.PickleProperty):
+    """
+    Stores switches with ``SchemaEncoding``.
+
+    Values that encoding can't represent are pickled, as are switches written
+    before this property existed; both are still read back with pickle.
+    """
+
+    def _to_base_value(self, value):
+        try:
+            return SchemaEncoding.dumps(value)
+        except EncodingError:
+            return super(SwitchProperty, self)._to_base_value(value)
+
+    def _from_base_value(self, value):
+        if SchemaEncoding.is_encoded(value):
+            return SchemaEncoding.loads(value)
+
+        return super(SwitchProperty, self)._from_base_value(value)
+
 
 class SwitchModel(ndb.Model):
     """
     A datastore model for storing switches.
     Used by datastoredict.
     """
-    value = ndb.PickleProperty()
+    value = SwitchProperty()
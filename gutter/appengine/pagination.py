@@ -0,0 +1,91 @@
+"""
+Pagination and search of the switch index.
+"""
+from bisect import bisect_right
+
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+
+class SwitchPage(object):
+    """
+    One page of switches, sorted by name.
+
+    ``next_cursor`` is the cursor of the following page, or ``None`` if this
+    is the last one.
+    """
+
+    def __init__(self, switches, cursor=None, next_cursor=None):
+        self.switches = switches
+        self.cursor = cursor
+        self.next_cursor = next_cursor
+
+
+def search(manager, cursor=None, limit=DEFAULT_LIMIT, name=None,
+           namespace=None, state=None, argument=None):
+    """
+    Returns the ``SwitchPage`` of at most ``limit`` switches following
+    ``cursor`` that match every filter given.
+
+    Filters:
+    name -- text the switch name contains, ignoring case.
+    namespace -- a switch name; only it and its descendants match.
+    state -- a ``Switch.states`` value.
+    argument -- text the ``argument_string`` of one of the switch's
+                conditions contains, ignoring case.
+
+    Names are listed and filtered from the manager's key index.  Switches
+    are then only fetched, in batches of ``limit``, until the page is full,
+    and are only turned into forms by the caller for the page itself.
+
+    The cursor is the name of the last switch on the previous page, so pages
+    stay consistent when switches are added or removed in between.
+    """
+    limit = max(1, min(limit, MAX_LIMIT))
+
+    if namespace:
+        names = manager.get_children(namespace)
+        if namespace in manager:
+            names.insert(0, namespace)
+    else:
+        names = manager.switch_names
+
+    if cursor:
+        names = names[bisect_right(names, cursor):]
+
+    if name:
+        name = name.lower()
+        names = [each for each in names if name in each.lower()]
+
+    filters = []
+
+    if state is not None:
+        filters.append(lambda switch: switch.state == state)
+
+    if argument:
+        argument = argument.lower()
+        filters.append(lambda switch: any(
+            argument in condition.argument_string.lower()
+            for condition in switch.conditions
+        ))
+
+    matches = []
+
+    for start in xrange(0, len(names), limit):
+        batch = names[start:start + limit]
+        switches = manager.switches_many(batch, skip_missing=True)
+
+        for each in batch:
+            switch = switches.get(each)
+
+            if switch is not None and all(f(switch) for f in filters):
+                matches.append(switch)
+
+        if len(matches) > limit:
+            break
+
+    page = matches[:limit]
+    next_cursor = page[-1].name if len(matches) > limit else None
+
+    return SwitchPage(page, cursor, next_cursor)
@@ -6,17 +6,63 @@ the registry.
 from gutter.client.operators.comparable import Equals, Between, LessThan, LessThanOrEqualTo, MoreThan, \
     MoreThanOrEqualTo
 from gutter.client.operators.identity import Truthy
-from gutter.client.operators.misc import Percent, PercentRange
+from gutter.client.operators.misc import Percent, PercentRange, \
+    StablePercent, StablePercentRange
 
 from itertools import groupby
 from operator import attrgetter, itemgetter
 
 
-class OperatorsDict(dict):
+class ChoiceTable(list):
+    """
+    A list of wtforms choices built from a registry.
+
+    A table is never changed once built; registering something builds a new
+    one.  ``cache`` holds data derived from the table, such as the HTML of
+    its options pre-rendered by ``wtforms_extension.SelectWidget``.
+    """
+
+    def __init__(self, choices):
+        super(ChoiceTable, self).__init__(choices)
+        self.cache = {}
+
+
+class MemoizedDict(dict):
+    """
+    A dictionary whose derived tables are built on first use and kept until
+    it is changed.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(MemoizedDict, self).__init__(*args, **kwargs)
+        self._memo = {}
+
+    def memoized(self, name, build):
+        """
+        Returns the table ``name``, built by calling ``build`` if it isn't
+        memoized yet.
+        """
+        try:
+            return self._memo[name]
+        except KeyError:
+            table = self._memo[name] = build()
+            return table
+
+    def __setitem__(self, key, value):
+        super(MemoizedDict, self).__setitem__(key, value)
+        self._memo = {}
+
+    def __delitem__(self, key):
+        super(MemoizedDict, self).__delitem__(key)
+        self._memo = {}
+
+
+class OperatorsDict(MemoizedDict):
     """
     A dictionary representing all operators.
     """
     def __init__(self, *ops):
+        super(OperatorsDict, self).__init__()
         map(self.register, ops)
 
     def register(self, operator):
@@ -30,6 +76,9 @@ class OperatorsDict(dict):
         """
         Return all operators as wtforms SelectField choices.
         """
+        return self.memoized('choices', self.__build_choices)
+
+    def __build_choices(self):
         groups = {}
 
         for operator in sorted(self.values(), key=attrgetter('preposition')):
@@ -39,17 +88,19 @@ class OperatorsDict(dict):
             groups.setdefault(key, [])
             groups[key].append(pair)
 
-        return sorted(groups.items(), key=itemgetter(0))
+        return ChoiceTable(sorted(groups.items(), key=itemgetter(0)))
 
     @property
     def arguments(self):
         """
         Return arguments for each operator, keyed by operator name.
         """
-        return dict((name, op.arguments) for name, op in self.items())
+        return self.memoized('arguments', lambda: dict(
+            (name, op.arguments) for name, op in self.items()
+        ))
 
 
-class ArgumentsDict(dict):
+class ArgumentsDict(MemoizedDict):
     """
     A dictionary representing all arguments.
     """
@@ -59,6 +110,9 @@ class ArgumentsDict(dict):
         """
         Return all arguments as wtforms choices.
         """
+        return self.memoized('choices', self.__build_choices)
+
+    def __build_choices(self):
         # Used map built-in, pylint: disable=W0141
         sorted_strings = sorted(map(str, self.values()))
         extract_classname = lambda a: a.split('.')[0]
@@ -70,7 +124,7 @@ class ArgumentsDict(dict):
             groups.setdefault(name, [])
             groups[name].extend((a, a) for a in args)
 
-        return groups.items()
+        return ChoiceTable(groups.items())
 
     def register(self, argument):
         """
@@ -82,7 +136,7 @@ class ArgumentsDict(dict):
 # Invalid name, pylint: disable=C0103
 operators = OperatorsDict(Equals, Between, LessThan, LessThanOrEqualTo,
                           MoreThan, MoreThanOrEqualTo, Truthy, Percent,
-                          PercentRange)
+                          PercentRange, StablePercent, StablePercentRange)
 
 # Invalid name, pylint: disable=C0103
 arguments = ArgumentsDict()
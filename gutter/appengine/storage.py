@@ -0,0 +1,42 @@
+"""
+Storage
+"""
+from google.appengine.ext import ndb
+
+from datastoredict import DatastoreDict
+from datastoredict.datastoredict import build_key
+
+
+class BatchDatastoreDict(DatastoreDict):
+    """
+    A ``DatastoreDict`` that can read and write several switches with one
+    datastore RPC, as used by ``Manager.switches_many``, ``register_many``
+    and ``update_many``.
+    """
+
+    def get_many(self, keys):
+        """
+        Fetches the values stored under ``keys`` with one ``ndb.get_multi``.
+        """
+        keys = list(keys)
+        entities = ndb.get_multi([build_key(self.model, key) for key in keys])
+
+        return dict(
+            (key, getattr(entity, self.value_col))
+            for key, entity in zip(keys, entities)
+            if entity is not None
+        )
+
+    def set_many(self, items):
+        """
+        Stores every ``(key, value)`` pair with one ``ndb.put_multi``, then
+        touches the last updated stamp once.
+        """
+        ndb.put_multi([
+            self.model(key=build_key(self.model, key),
+                       **{self.value_col: value})
+            for key, value in items
+        ])
+
+        self.touch_last_updated()
+        self.sync()
@@ -7,12 +7,16 @@ from cgi import escape
 from wtforms import SelectField as _SelectField
 from wtforms.widgets import html_params, HTMLString, Select as _Select
 from wtforms.validators import ValidationError
-from .registry import operators
+from .registry import ChoiceTable, operators
 
 
 class SelectWidget(_Select):
     """
     Add support of choices with ``optgroup`` to the ``Select`` widget.
+
+    The options of a registry ``ChoiceTable`` are rendered once per table,
+    unselected.  Rendering a field then only swaps in the selected version
+    of the options matching its data.
     """
 
     def __call__(self, field, **kwargs):
@@ -20,11 +24,77 @@ class SelectWidget(_Select):
         if self.multiple:
             kwargs['multiple'] = True
         html = ['<select %s>' % html_params(name=field.name, **kwargs)]
-        for val, label, selected in field.iter_choices():
-            html.append(self.render_option(val, label, selected))
+
+        choices = field.concrete_choices
+        if isinstance(choices, ChoiceTable):
+            html.extend(self.render_table(choices, field.coerce, field.data))
+        else:
+            for val, label, selected in field.iter_choices():
+                html.append(self.render_option(val, label, selected))
+
         html.append('</select>')
         return HTMLString(''.join(html))
 
+    def render_table(self, choices, coerce_func, data):
+        """
+        Return the options of the ``choices`` table, with those matching
+        ``data`` selected.
+        """
+        try:
+            options, selected = choices.cache[coerce_func]
+        except KeyError:
+            options, selected = choices.cache[coerce_func] = \
+                self.prerender(choices, coerce_func)
+
+        if not isinstance(data, (list, tuple)):
+            data = (data,)
+
+        html = None
+
+        for item in data:
+            try:
+                index, option = selected[item]
+            except (KeyError, TypeError):
+                continue
+
+            if html is None:
+                html = list(options)
+            html[index] = option
+
+        return options if html is None else html
+
+    def prerender(self, choices, coerce_func):
+        """
+        Render every option of ``choices`` unselected.  Returns the list of
+        HTML parts and a dict mapping each coerced value to the index of its
+        option and the HTML of its selected version.
+        """
+        options = []
+        selected = {}
+
+        def add(value, label):
+            selected[coerce_func(value)] = (
+                len(options),
+                self.render_option(value, label,
+                                   (coerce_func, coerce_func(value)))
+            )
+            options.append(self.render_option(value, label,
+                                              (coerce_func, _NOTHING)))
+
+        for value, label in choices:
+            if isinstance(label, (list, tuple)):
+                options.append(u'<optgroup label="%s">' %
+                               escape(six.text_type(value)))
+                for index, (item_value, item_label) in enumerate(label):
+                    if index:
+                        options.append(u'\n')
+                    add(item_value, item_label)
+                options.append(u'</optgroup>')
+            else:
+                add(value, label)
+
+        return options, selected
+
     def render_optgroup(self, value, label, mixed):
         """
         Render an optgroup.
@@ -67,6 +137,10 @@ class SelectWidget(_Select):
         return HTMLString(html % data)
 
 
+#: Data no option value is equal to
+_NOTHING = object()
+
+
 class SelectField(_SelectField):
     """
     Add support of ``optgroup``'s' to default WTForms' ``SelectField`` class.
@@ -90,6 +164,12 @@ class SelectField(_SelectField):
     """
     widget = SelectWidget()
 
+    def __init__(self, label=None, validators=None, choices=None, **kwargs):
+        super(SelectField, self).__init__(label, validators, **kwargs)
+
+        # Kept as given, so callables and choice tables aren't copied
+        self.choices = choices
+
     def iter_choices(self):
         """
         We should update how choices are iter to make sure that value from
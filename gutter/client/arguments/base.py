@@ -1,5 +1,15 @@
 from types import NoneType
 
+from gutter.client.futures import resolve
+
+#: Marks a variable that hasn't been read yet
+_MISSING = object()
+
+#: Types of getter results that can't be futures
+_PLAIN_TYPES = frozenset((
+    bool, int, long, float, str, unicode, NoneType, list, tuple, dict
+))
+
 
 class classproperty(object):
 
@@ -25,10 +35,54 @@ class argument(object):
         self.owner = owner
 
         if instance:
-            return self.variable(self.getter(instance))
+            # Variables are memoized on the container instance, so the getter
+            # runs at most once per container no matter how often the
+            # attribute is read.
+            try:
+                variables = instance._variables
+            except AttributeError:
+                # A container whose __init__ didn't call Container's
+                variables = instance._variables = {}
+
+            variable = variables.get(self, _MISSING)
+
+            if variable is _MISSING:
+                value = self.__value(instance)
+
+                if type(value) not in _PLAIN_TYPES:
+                    value = resolve(value)
+
+                variable = variables[self] = self.variable(value)
+
+            return variable
         else:
             return self
 
+    def prefetch(self, instance):
+        """
+        Runs the getter for the ``instance`` container without waiting for
+        its result, if it is a future.  The variable is built from it when
+        it is first read.
+        """
+        if self in getattr(instance, '_variables', ()):
+            return
+
+        pending = getattr(instance, '_pending', None)
+
+        if pending is None:
+            pending = instance._pending = {}
+
+        if self not in pending:
+            pending[self] = self.getter(instance)
+
+    def __value(self, instance):
+        pending = getattr(instance, '_pending', None)
+
+        if pending and self in pending:
+            return pending.pop(self)
+
+        return self.getter(instance)
+
     def __str__(self):
         if self.name:
             return "%s.%s" % (self.owner.__name__, self.name)
@@ -55,6 +109,8 @@ class Container(object):
 
     def __init__(self, inpt):
         self.input = inpt
+        self._variables = {}
+        self._pending = None
 
     @classproperty
     def arguments(cls):
@@ -66,3 +122,14 @@ class Container(object):
     @property
     def applies(self):
         return isinstance(self.input, self.COMPATIBLE_TYPE)
+
+    def identity(self):
+        """
+        Returns a cheap, hashable key identifying the input, such as a user
+        id, or ``None`` if it has none.
+
+        A ``Manager`` with a ``DecisionCache`` reuses switch results for
+        inputs whose every relevant container has an identity, so the key
+        must tell apart any two inputs that could get different results.
+        """
+        return None
@@ -0,0 +1,180 @@
+"""
+gutter.cache
+~~~~~~~~~~~~~~
+
+Small in-process caches used on the evaluation hot path, and an in-process
+stand-in for memcache.
+"""
+
+# Standard Library
+import cPickle as pickle
+import threading
+import time
+
+_PREV, _NEXT, _KEY, _VALUE = 0, 1, 2, 3
+
+_missing = object()
+
+
+class LRUCache(object):
+
+    """
+    A thread-safe, bounded, least-recently-used cache.
+
+    Entries live in a dict for lookups and in a circular doubly linked list
+    for recency, so a hit costs a dict lookup and relinking one entry.  Once
+    more than ``maxsize`` entries are stored, the least recently used one is
+    evicted.  ``hits`` and ``misses`` count ``get`` calls.
+    """
+
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+
+        self.__lock = threading.Lock()
+        self.__links = {}
+        self.__root = root = []
+        root[:] = [root, root, None, None]
+
+    def get(self, key, default=None):
+        with self.__lock:
+            link = self.__links.get(key)
+
+            if link is None:
+                self.misses += 1
+                return default
+
+            self.__unlink(link)
+            self.__append(link)
+            self.hits += 1
+            return link[_VALUE]
+
+    def set(self, key, value):
+        with self.__lock:
+            link = self.__links.get(key)
+
+            if link is not None:
+                self.__unlink(link)
+                link[_VALUE] = value
+            else:
+                link = self.__links[key] = [None, None, key, value]
+
+            self.__append(link)
+
+            if len(self.__links) > self.maxsize:
+                oldest = self.__root[_NEXT]
+                self.__unlink(oldest)
+                del self.__links[oldest[_KEY]]
+
+    def pop(self, key, default=None):
+        with self.__lock:
+            link = self.__links.pop(key, None)
+
+            if link is None:
+                return default
+
+            self.__unlink(link)
+            return link[_VALUE]
+
+    def clear(self):
+        with self.__lock:
+            self.__links.clear()
+            root = self.__root
+            root[:] = [root, root, None, None]
+
+    def __contains__(self, key):
+        return key in self.__links
+
+    def __len__(self):
+        return len(self.__links)
+
+    def __unlink(self, link):
+        prev_link, next_link = link[_PREV], link[_NEXT]
+        prev_link[_NEXT] = next_link
+        next_link[_PREV] = prev_link
+
+    def __append(self, link):
+        root = self.__root
+        last = root[_PREV]
+        link[_PREV] = last
+        link[_NEXT] = root
+        last[_NEXT] = root[_PREV] = link
+
+
+class MemoryCache(object):
+
+    """
+    An in-process stand-in for the parts of the App Engine memcache client
+    used by ``gutter.client.storage.TieredDict``, for tests and local
+    development.
+
+    Values are pickled, as memcache does, so callers never share objects
+    through it.  ``time`` is a number of seconds after which an entry
+    expires, or 0 for entries that never do.
+    """
+
+    def __init__(self, clock=time.time):
+        self.clock = clock
+
+        self.__lock = threading.Lock()
+        self.__entries = {}
+
+    def get(self, key):
+        return self.get_multi([key]).get(key)
+
+    def get_multi(self, keys):
+        now = self.clock()
+        values = {}
+
+        with self.__lock:
+            for key in keys:
+                entry = self.__entries.get(key)
+
+                if entry is None:
+                    continue
+
+                if entry[0] and entry[0] <= now:
+                    del self.__entries[key]
+                    continue
+
+                values[key] = pickle.loads(entry[1])
+
+        return values
+
+    def set(self, key, value, time=0):
+        self.set_multi({key: value}, time)
+        return True
+
+    def set_multi(self, mapping, time=0):
+        expires = self.clock() + time if time else 0
+
+        with self.__lock:
+            for key, value in mapping.iteritems():
+                self.__entries[key] = (expires, pickle.dumps(value, -1))
+
+        return []
+
+    def add(self, key, value, time=0):
+        """
+        Stores ``value`` only if ``key`` holds nothing, and tells if it did.
+        """
+        now = self.clock()
+
+        with self.__lock:
+            entry = self.__entries.get(key)
+
+            if entry is not None and not (entry[0] and entry[0] <= now):
+                return False
+
+            expires = now + time if time else 0
+            self.__entries[key] = (expires, pickle.dumps(value, -1))
+            return True
+
+    def delete(self, key):
+        with self.__lock:
+            self.__entries.pop(key, None)
+
+    def flush_all(self):
+        with self.__lock:
+            self.__entries.clear()
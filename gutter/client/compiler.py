@@ -0,0 +1,208 @@
+"""
+gutter.compiler
+~~~~~~~~~~~~~~~
+
+Compiles the conditions of a switch into one specialised Python function.
+
+Compilation is off by default.  Once ``enable()`` is called, the first time a
+switch is checked against an input of a given type, its conditions for that
+type are turned into the source of a single function.  Argument containers
+are created once per argument class, memoized variables are read straight
+from the container, the comparisons of the built-in operators are inlined,
+negation is applied in place and the any/all combination becomes early
+``return`` statements.  Operators the compiler doesn't know about are called
+through their ``applies_to`` method.
+
+The results are exactly those of the interpreted path, including the
+``condition_apply_error`` signal.  Switches are interpreted as usual while
+statistics are being collected, and for the ``NONE`` input.
+
+Compiled functions are kept on the switch's ``EvaluationPlan``, so they live
+as long as the switch isn't changed.  The source only depends on the shape
+of the conditions, not on the operators' values, so code objects are shared
+between all switches of the same shape.  ``source_for`` shows the source
+generated for a switch::
+
+    print compiler.source_for(switch, User)
+"""
+
+# Standard Library
+from itertools import count
+
+# External Libraries
+from gutter.client import signals
+from gutter.client.arguments import argument
+from gutter.client.cache import LRUCache
+from gutter.client.operators.comparable import (
+    Between,
+    Equals,
+    LessThan,
+    LessThanOrEqualTo,
+    MoreThan,
+    MoreThanOrEqualTo,
+)
+from gutter.client.operators.identity import Truthy
+
+#: Whether switches are evaluated with compiled functions
+enabled = False
+
+#: Expressions inlined for operators of these exact classes.  ``{v}`` is the
+#: variable and ``{0}``, ``{1}`` the operator's arguments, in the order of
+#: its ``arguments``.  They must match the operators' ``applies_to``.
+INLINE = {
+    Equals: '{v} == {0}',
+    Between: '{v} > {0} and {v} < {1}',
+    LessThan: '{v} < {0}',
+    LessThanOrEqualTo: '{v} <= {0}',
+    MoreThan: '{v} > {0}',
+    MoreThanOrEqualTo: '{v} >= {0}',
+    Truthy: 'bool({v})',
+}
+
+#: Generated source -> code object
+_code = LRUCache(1000)
+
+_names = count()
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def compile_conditions(conditions, compounded, none_input, interpret):
+    """
+    Returns a function of an input and an ``EvaluationScope`` that combines
+    the results of ``conditions`` for the input, with all() if
+    ``compounded`` or else any(), reading argument containers from the scope.
+
+    ``interpret`` is called instead for ``none_input``.  The function's
+    ``source`` attribute holds its generated source.
+    """
+    source, namespace = generate(conditions, compounded)
+    namespace.update(
+        NONE=none_input,
+        interpret=interpret,
+        apply_error=signals.condition_apply_error.call,
+    )
+
+    code = _code.get(source)
+    if code is None:
+        code = compile(source, '<gutter-compiled-%d>' % next(_names), 'exec')
+        _code.set(source, code)
+
+    exec code in namespace
+
+    evaluate = namespace['evaluate']
+    evaluate.source = source
+    return evaluate
+
+
+def generate(conditions, compounded):
+    """
+    Returns the source of the function evaluating ``conditions`` and the
+    namespace of the constants it refers to.
+    """
+    namespace = {}
+    lines = [
+        'def evaluate(inpt, scope):',
+        '    if inpt is NONE:',
+        '        return interpret(inpt, scope)',
+        '    container = scope.container',
+    ]
+    containers = {}
+
+    for index, condition in enumerate(conditions):
+        names = dict(
+            condition='C%d' % index,
+            getter='G%d' % index,
+            attribute='N%d' % index,
+            operator='O%d' % index,
+        )
+        namespace[names['condition']] = condition
+        namespace[names['attribute']] = condition.attribute
+
+        if condition.argument not in containers:
+            number = containers[condition.argument] = len(containers)
+            namespace['A%d' % number] = condition.argument
+            lines.extend([
+                '    c{0} = container(A{0}, inpt)'.format(number),
+                '    a{0} = c{0}.applies'.format(number),
+            ])
+
+        number = containers[condition.argument]
+        lines.append('    if a%d:' % number)
+
+        getter = getattr(condition.argument, condition.attribute, None)
+
+        if isinstance(getter, argument):
+            namespace[names['getter']] = getter
+            lines.extend([
+                '        try:',
+                '            v = c%d._variables[%s]' % (number,
+                                                      names['getter']),
+                '        except (AttributeError, KeyError):',
+                '            v = getattr(c%d, %s)' % (number,
+                                                     names['attribute']),
+            ])
+        else:
+            lines.append('        v = getattr(c%d, %s)' % (
+                number, names['attribute']))
+
+        lines.extend([
+            '        try:',
+            '            r = %s' % _expression(condition.operator, index,
+                                               namespace),
+            '        except Exception as error:',
+            '            apply_error(%s, inpt, error)' % names['condition'],
+            '            r = False',
+        ])
+
+        if condition.negative:
+            lines.append('        r = not r')
+
+        if compounded:
+            lines.extend(['        if not r:', '            return False'])
+        else:
+            lines.extend(['        if r:', '            return True'])
+
+    lines.append('    return %s' % bool(compounded))
+
+    return '\n'.join(lines) + '\n', namespace
+
+
+def source_for(switch, input_type):
+    """
+    Returns the source of the function evaluating ``switch`` for inputs of
+    ``input_type``, or ``None`` if the switch's state is constant or none of
+    its conditions apply to that type.
+    """
+    plan = switch.plan
+    conditions = plan.conditions_for(input_type)
+
+    if plan.constant is not None or not conditions:
+        return None
+
+    return generate(conditions, plan.combinator is not any)[0]
+
+
+def _expression(operator, index, namespace):
+    template = INLINE.get(type(operator))
+
+    if template is None:
+        namespace['O%d' % index] = operator.applies_to
+        return 'O%d(v)' % index
+
+    values = []
+
+    for position, name in enumerate(operator.arguments):
+        constant = 'K%d_%d' % (index, position)
+        namespace[constant] = getattr(operator, name)
+        values.append(constant)
+
+    return template.format(*values, v='v')
@@ -0,0 +1,139 @@
+"""
+gutter.context
+~~~~~~~~~~~~~~
+
+Values local to the current execution context.
+
+``ContextVar`` is ``contextvars.ContextVar`` where the module is available
+(Python 3.7 and later), so that every asyncio task sees its own value.
+Elsewhere it is a ``LocalVar`` with the same interface, holding one value per
+greenlet when ``greenlet`` is installed, as under gevent or eventlet, and
+one per thread otherwise::
+
+    user = ContextVar('user', default=None)
+
+    with bound(user, current_user):
+        ...
+"""
+
+# Standard Library
+import threading
+from collections import namedtuple
+from weakref import WeakKeyDictionary
+
+try:
+    import contextvars
+except ImportError:
+    contextvars = None
+
+try:
+    from greenlet import getcurrent
+except ImportError:
+    getcurrent = None
+
+#: Marks a variable that had no value
+MISSING = object()
+
+#: Returned by ``LocalVar.set``, to be passed to ``LocalVar.reset``
+Token = namedtuple('Token', ('var', 'old_value'))
+
+
+class LocalVar(object):
+
+    """
+    A variable holding one value per greenlet, or per thread if greenlets
+    aren't available, with the ``get``, ``set`` and ``reset`` methods of a
+    ``contextvars.ContextVar``.
+    """
+
+    def __init__(self, name, default=MISSING):
+        self.name = name
+        self.default = default
+
+        if getcurrent is None:
+            self.__local = threading.local()
+        else:
+            self.__greenlets = WeakKeyDictionary()
+
+    def get(self, default=MISSING):
+        """
+        Returns the value set in the current context, else ``default``, else
+        the variable's own default.  Raises ``LookupError`` if there is none.
+        """
+        if getcurrent is None:
+            # The common case, inlined: it's read on every switch check
+            values = self.__local.__dict__
+        else:
+            values = self.__values()
+
+        value = values.get('value', MISSING)
+
+        if value is MISSING:
+            value = self.default if default is MISSING else default
+
+            if value is MISSING:
+                raise LookupError(self)
+
+        return value
+
+    def set(self, value):
+        """
+        Sets the value for the current context and returns a ``Token`` that
+        restores the previous one when passed to ``reset``.
+        """
+        values = self.__values()
+        token = Token(self, values.get('value', MISSING))
+        values['value'] = value
+        return token
+
+    def reset(self, token):
+        values = self.__values()
+
+        if token.old_value is MISSING:
+            values.pop('value', None)
+        else:
+            values['value'] = token.old_value
+
+    def __values(self):
+        if getcurrent is None:
+            return self.__local.__dict__
+
+        current = getcurrent()
+
+        try:
+            return self.__greenlets[current]
+        except KeyError:
+            values = self.__greenlets[current] = {}
+            return values
+
+    def __repr__(self):
+        return '<LocalVar name=%r>' % self.name
+
+
+if contextvars is not None:
+    ContextVar = contextvars.ContextVar
+else:
+    ContextVar = LocalVar
+
+
+class bound(object):
+
+    """
+    Context manager setting ``var`` to ``value`` for the enclosed block, and
+    restoring its previous value after it.  Entering it returns ``value``.
+    """
+
+    __slots__ = ('var', 'value', 'token')
+
+    def __init__(self, var, value):
+        self.var = var
+        self.value = value
+        self.token = None
+
+    def __enter__(self):
+        self.token = self.var.set(self.value)
+        return self.value
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.var.reset(self.token)
+        self.token = None
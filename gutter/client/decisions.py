@@ -0,0 +1,82 @@
+"""
+gutter.decisions
+~~~~~~~~~~~~~~~~
+
+A cache of switch results that outlives a single request.
+"""
+
+# Standard Library
+import time
+
+from gutter.client.cache import LRUCache
+
+
+class DecisionCache(object):
+
+    """
+    Keeps the results of ``Manager.active`` checks for at most ``ttl``
+    seconds, and at most ``maxsize`` of them, least recently used first out.
+
+    Results are keyed by the switch checked, the version of its evaluation
+    plan and of those of the ancestors it consents with, and the
+    ``identity()`` of every argument container its conditions read from
+    each input.  Any change to one of those switches creates a new plan,
+    with a new version, so results cached for the old ones are never read
+    again.  Inputs whose containers don't declare an identity are never
+    cached.
+
+    The cache can't know when the data behind an identity changes, such as
+    a user's attributes, so ``ttl`` bounds how long such a change may go
+    unnoticed.  Results served from the cache don't send the
+    ``switch_checked`` and ``switch_active`` signals.
+    """
+
+    def __init__(self, maxsize=10000, ttl=60.0, clock=time.time):
+        self.ttl = ttl
+        self.clock = clock
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+
+        self.__entries = LRUCache(maxsize)
+
+    def __len__(self):
+        return len(self.__entries)
+
+    @property
+    def stats(self):
+        """
+        Counters describing how the cache was used.  ``misses`` includes the
+        ``expired`` lookups.
+        """
+        return dict(
+            hits=self.hits,
+            misses=self.misses,
+            expired=self.expired,
+            size=len(self),
+        )
+
+    def get(self, key):
+        """
+        Returns the result cached for ``key``, or ``None``.
+        """
+        entry = self.__entries.get(key)
+
+        if entry is not None and entry[0] <= self.clock():
+            self.expired += 1
+            self.__entries.pop(key)
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return entry[1]
+
+    def set(self, key, result):
+        self.__entries.set(key, (self.clock() + self.ttl, bool(result)))
+
+    def clear(self):
+        self.__entries.clear()
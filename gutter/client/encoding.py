@@ -2,10 +2,24 @@
 
 from __future__ import absolute_import
 
+# Standard Library
+import json
+from decimal import Decimal
+from importlib import import_module
+
 # External Libraries
-from durabledict.encoding import PickleEncoding
+from durabledict.encoding import DecodingError, EncodingError, PickleEncoding
 import jsonpickle as pickle
 
+from gutter.client import registry
+from gutter.client.models import Condition, Switch
+
+# The built-in operators register themselves on import
+import gutter.client.operators.comparable  # noqa
+import gutter.client.operators.identity  # noqa
+import gutter.client.operators.misc  # noqa
+import gutter.client.operators.string  # noqa
+
 
 class JsonPickleEncoding(PickleEncoding):
     @staticmethod
@@ -18,3 +32,249 @@ class JsonPickleEncoding(PickleEncoding):
             return pickle.loads(data)
         except Exception:
             return PickleEncoding.decode(data)
+
+
+class SchemaEncoding(PickleEncoding):
+
+    """
+    A compact, versioned JSON encoding for switches.
+
+    A switch is written as a JSON list with a fixed field order::
+
+        ["gutter/1", name, state, compounded, concent, label, description,
+         [[argument, attribute, operator, {operator state}, negative], ...]]
+
+    Argument containers and operators are referenced by their key in
+    ``gutter.client.registry``, which holds container and operator classes,
+    or by import path (``module:Class``) when they aren't registered.  (The
+    admin's ``gutter.appengine.registry`` of argument descriptors plays no
+    part in this.)  Operator state values that JSON can't represent
+    (``Decimal``, tuples, dicts) are tagged.
+
+    Anything that isn't a plain ``Switch``, or whose state can't be encoded,
+    is written with ``JsonPickleEncoding`` instead.  Decoding falls back to
+    the jsonpickle and pickle encodings for such values and for switches
+    written before this encoding existed.
+    """
+
+    version = 'gutter/1'
+
+    __prefix = '["%s",' % version
+
+    @classmethod
+    def encode(cls, data):
+        try:
+            return cls.dumps(data)
+        except EncodingError:
+            return JsonPickleEncoding.encode(data)
+
+    @classmethod
+    def decode(cls, data):
+        if cls.is_encoded(data):
+            return cls.loads(data)
+
+        return JsonPickleEncoding.decode(data)
+
+    @classmethod
+    def dumps(cls, switch):
+        """
+        Returns ``switch`` in this encoding, without falling back to another
+        one.  Raises ``EncodingError`` if it can't be encoded.
+        """
+        if type(switch) is not Switch:
+            raise EncodingError('%r is not a Switch' % (switch,))
+
+        try:
+            return json.dumps(_encode_switch(switch), separators=(',', ':'))
+        except (TypeError, ValueError) as error:
+            raise EncodingError(error)
+
+    @classmethod
+    def loads(cls, data):
+        """
+        Decodes a switch written by ``dumps``.
+        """
+        try:
+            return _decode_switch(json.loads(data))
+        except (KeyError, TypeError, ValueError, ImportError) as error:
+            raise DecodingError(error)
+
+    @classmethod
+    def is_encoded(cls, data):
+        """
+        Tells if ``data`` was written by ``dumps``.
+        """
+        return isinstance(data, basestring) and data.startswith(cls.__prefix)
+
+
+_PLAIN = frozenset((str, unicode, int, long, float, bool, type(None)))
+
+#: class -> (registry size, reference) and reference -> class caches
+_references = {}
+_classes = {}
+
+
+def _encode_switch(switch):
+    return [
+        SchemaEncoding.version,
+        switch.name,
+        switch.state,
+        switch.compounded,
+        switch.concent,
+        switch.label,
+        switch.description,
+        [
+            [
+                _reference(registry.arguments, condition.argument),
+                condition.attribute,
+                _reference(registry.operators, type(condition.operator)),
+                _encode_state(condition.operator),
+                condition.negative,
+            ]
+            for condition in switch.conditions
+        ],
+    ]
+
+
+def _decode_switch(fields):
+    (_version, name, state, compounded, concent, label, description,
+     conditions) = fields
+
+    switch = Switch.__new__(Switch)
+    switch.__setstate__(dict(
+        _name=_native(name),
+        state=state,
+        compounded=compounded,
+        concent=concent,
+        label=_native(label),
+        description=_native(description),
+        conditions=[
+            Condition(
+                _resolve(registry.arguments, argument),
+                _native(attribute),
+                _decode_operator(_resolve(registry.operators, operator),
+                                 operator_state),
+                negative
+            )
+            for argument, attribute, operator, operator_state, negative
+            in conditions
+        ],
+    ))
+
+    return switch
+
+
+def _encode_state(operator):
+    getstate = getattr(operator, '__getstate__', None)
+    state = getstate() if getstate else vars(operator)
+
+    return dict((key, _encode_value(value)) for key, value in state.items())
+
+
+def _decode_operator(cls, state):
+    operator = cls.__new__(cls)
+    state = dict(
+        (_native(key), _decode_value(value)) for key, value in state.items()
+    )
+
+    if hasattr(operator, '__setstate__'):
+        operator.__setstate__(state)
+    else:
+        operator.__dict__.update(state)
+
+    return operator
+
+
+def _encode_value(value):
+    kind = type(value)
+
+    if kind in _PLAIN:
+        return value
+    elif kind is Decimal:
+        return {'$decimal': str(value)}
+    elif kind is list:
+        return [_encode_value(item) for item in value]
+    elif kind is tuple:
+        return {'$tuple': [_encode_value(item) for item in value]}
+    elif kind is dict:
+        return {'$dict': [[_encode_value(key), _encode_value(item)]
+                          for key, item in value.items()]}
+
+    raise EncodingError('Cannot encode %r' % (value,))
+
+
+def _decode_value(value):
+    kind = type(value)
+
+    if kind is unicode:
+        return _native(value)
+    elif kind is list:
+        return [_decode_value(item) for item in value]
+    elif kind is dict:
+        (tag, tagged), = value.items()
+
+        if tag == '$decimal':
+            return Decimal(tagged)
+        elif tag == '$tuple':
+            return tuple(_decode_value(item) for item in tagged)
+        elif tag == '$dict':
+            return dict((_decode_value(key), _decode_value(item))
+                        for key, item in tagged)
+
+        raise ValueError('Unknown tag %r' % tag)
+
+    return value
+
+
+def _native(text):
+    """
+    JSON decodes every string as unicode; ASCII ones are turned back into
+    ``str``, as they were when encoded.
+    """
+    if type(text) is unicode:
+        try:
+            return text.encode('ascii')
+        except UnicodeEncodeError:
+            pass
+
+    return text
+
+
+def _reference(classes, cls):
+    # References are worked out again once more classes are registered, as
+    # ``cls`` may be one of them
+    registered_classes = classes.items
+    cached = _references.get(cls)
+
+    if cached is not None and cached[0] == len(registered_classes):
+        return cached[1]
+
+    for key, registered in registered_classes.items():
+        if registered is cls:
+            reference = key
+            break
+    else:
+        reference = '%s:%s' % (cls.__module__, cls.__name__)
+
+    _references[cls] = (len(registered_classes), reference)
+    return reference
+
+
+def _resolve(classes, reference):
+    reference = _native(reference)
+
+    try:
+        return classes.items[reference]
+    except KeyError:
+        pass
+
+    try:
+        return _classes[reference]
+    except KeyError:
+        module, _, name = reference.rpartition(':')
+
+        if not module:
+            raise KeyError("'%s' is not registered" % reference)
+
+        cls = _classes[reference] = getattr(import_module(module), name)
+        return cls
@@ -0,0 +1,100 @@
+"""
+gutter.feed
+~~~~~~~~~~~
+
+A change feed lets every process sharing a switch storage find out which
+switches were written by the others, so that caches such as a
+``SnapshotDict`` only refresh those switches instead of reloading them all.
+
+A feed is a sequence of numbered generations.  Every write publishes one
+generation, holding a ``Change`` record per key written.  Generations are
+consecutive integers, so a reader knows it has missed nothing when it has
+seen every generation up to the feed's ``head``.
+
+Feeds are pluggable.  Any object with these methods can be used:
+
+``head()``
+    Returns the latest generation published, or ``None`` if it is unknown.
+    Readers poll it, so it must be cheap: one small key.
+
+``publish(changes)``
+    Records a new generation made of the ``(key, op)`` pairs in ``changes``
+    and returns its number.
+
+``since(generation)``
+    Returns the list of ``Change`` records published after ``generation``,
+    oldest first, or ``None`` if they are no longer all available, in which
+    case readers reload everything.
+
+``MemoryFeed`` is an in-process feed, for tests and single-process use.  The
+appengine package provides ``DatastoreFeed``, shared by every instance.
+"""
+
+# Standard Library
+import threading
+from collections import deque, namedtuple
+
+#: Operations recorded by a ``Change``
+SET = 'set'
+DELETE = 'delete'
+
+#: One key written by the generation numbered ``generation``
+Change = namedtuple('Change', ('generation', 'key', 'op'))
+
+
+def latest_ops(changes):
+    """
+    Returns a dict of the last op recorded for each key in ``changes``.
+    """
+    return dict((change.key, change.op) for change in changes)
+
+
+class MemoryFeed(object):
+
+    """
+    A change feed kept in memory, retaining the last ``retain`` generations.
+    """
+
+    def __init__(self, retain=1000):
+        self.retain = retain
+
+        self.__head = 0
+        self.__generations = deque()
+        self.__lock = threading.Lock()
+
+    def head(self):
+        return self.__head
+
+    def publish(self, changes):
+        with self.__lock:
+            generation = self.__head + 1
+            self.__generations.append(tuple(
+                Change(generation, key, op) for key, op in changes
+            ))
+
+            while len(self.__generations) > self.retain:
+                self.__generations.popleft()
+
+            self.__head = generation
+
+        return generation
+
+    def since(self, generation):
+        with self.__lock:
+            head = self.__head
+            generations = list(self.__generations)
+
+        if generation is None or generation > head:
+            return None
+
+        missing = head - generation
+
+        if missing > len(generations):
+            return None
+
+        changes = []
+
+        for records in generations[len(generations) - missing:]:
+            changes.extend(records)
+
+        return changes
@@ -0,0 +1,79 @@
+"""
+gutter.futures
+~~~~~~~~~~~~~~
+
+Support for argument getters that do I/O.
+
+A getter may return a future (any object with a ``get_result()`` method,
+such as the ``ndb.Future`` returned by an ``ndb.tasklet``) instead of a
+value.  The argument then waits for the future when its variable is first
+read.
+
+``Manager.active_async`` and ``active_many_async`` start the getters of
+every condition they will check, for every input, before waiting for any of
+them, so that their I/O runs concurrently::
+
+    class Account(arguments.Container):
+
+        @ndb.tasklet
+        def load_group_id(self):
+            account = yield self.input.account_key.get_async()
+            raise ndb.Return(account.group_id)
+
+        group_id = arguments.String(load_group_id)
+
+    future = gutter.active_async('new_billing', account)
+    # ... other work ...
+    enabled = future.get_result()
+"""
+
+# Standard Library
+import sys
+
+
+def is_future(value):
+    """
+    Tells if ``value`` is a future that must be waited for.
+    """
+    return callable(getattr(value, 'get_result', None))
+
+
+def resolve(value):
+    """
+    Returns the result of ``value`` if it is a future, or ``value`` itself.
+    """
+    if is_future(value):
+        return value.get_result()
+
+    return value
+
+
+class Deferred(object):
+
+    """
+    A future whose result is computed by calling ``func`` the first time
+    ``get_result`` is called.  Exceptions raised by ``func`` are re-raised
+    by every call to ``get_result``.
+    """
+
+    __slots__ = ('func', 'result', 'exc_info', 'done')
+
+    def __init__(self, func):
+        self.func = func
+        self.result = None
+        self.exc_info = None
+        self.done = False
+
+    def get_result(self):
+        if not self.done:
+            try:
+                self.result = self.func()
+            except Exception:
+                self.exc_info = sys.exc_info()
+            self.func = None
+            self.done = True
+
+        if self.exc_info is not None:
+            raise self.exc_info[0], self.exc_info[1], self.exc_info[2]
+
+        return self.result
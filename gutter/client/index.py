@@ -0,0 +1,215 @@
+"""
+gutter.index
+~~~~~~~~~~~~~~
+
+A sorted index of the keys in a switch storage, so that namespaces and
+switch descendants can be listed without scanning every key.
+"""
+
+# Standard Library
+from bisect import bisect_left, insort
+
+
+class KeyIndex(object):
+
+    """
+    Keeps the keys of ``storage`` in a sorted list.  Every key starting with a
+    given prefix then sits in one contiguous slice of the list, found with two
+    binary searches.
+
+    The index is validated against a cheap stamp before every lookup and
+    rebuilt when it is out of date.  The stamp is made of the global
+    generation bumped by every ``Manager`` write, the number of keys in the
+    storage and, for storages that can be changed from other processes, the
+    storage's own sync stamp (``generation`` of a ``SnapshotDict``,
+    ``last_synced`` of a durabledict), read by ``sync_stamp()``.
+    ``generation`` is a callable returning the global generation.
+
+    Writes made through a ``Manager`` sharing the index are applied to it in
+    place with ``add`` and ``discard`` when nothing else could have changed
+    the storage in the meantime, and otherwise just mark it out of date.
+    Writes move the sync stamp of durabledicts too, so each write passes the
+    sync stamp read just before it: if that still matches the index, only
+    the write itself moved the stamp.
+
+    The index is shared between threads.  The sorted keys are never changed
+    in place: writes build a new list and swap it in, along with its stamp,
+    as one tuple, so lookups never take a lock.
+    """
+
+    def __init__(self, storage, generation):
+        self.storage = storage
+        self.generation = generation
+        self.sync_stamp = sync_stamp_reader(storage)
+        self.rebuilds = 0
+
+        self.__state = (None, [])
+
+    def prefixed(self, prefix):
+        """
+        Returns the sorted list of keys starting with ``prefix``.
+        """
+        keys = self.__current()
+
+        if not prefix:
+            return keys[:]
+
+        return keys[self.__range(keys, prefix)]
+
+    def children(self, prefix, separator):
+        """
+        Returns the sorted list of keys starting with ``prefix`` that don't
+        contain ``separator`` after it.  Runs in time proportional to the
+        number of keys returned, however many descendants they have.
+        """
+        keys = self.__current()
+        children = []
+
+        index = bisect_left(keys, prefix)
+        end = len(keys)
+        start = len(prefix)
+
+        while index < end:
+            key = keys[index]
+
+            if not key.startswith(prefix):
+                break
+
+            position = key.find(separator, start)
+
+            if position == -1:
+                children.append(key)
+                index += 1
+            else:
+                # Skip over every descendant of this child at once
+                index = self.__end(keys, key[:position + 1], index)
+
+        return children
+
+    def add(self, key, generation, synced):
+        """
+        Records that ``key`` was just written to the storage by the write
+        that bumped the global generation to ``generation``.  ``synced`` is
+        the ``sync_stamp()`` of the storage right before the write.
+        """
+        self.add_many((key,), generation, synced)
+
+    def add_many(self, keys, generation, synced):
+        """
+        Records that all of ``keys`` were just written to the storage by the
+        single write that bumped the global generation to ``generation``.
+        ``synced`` is the ``sync_stamp()`` of the storage right before the
+        write.
+        """
+        stamp, keys_before = self.__state
+
+        if self.__applicable(stamp, generation, synced):
+            new_keys = list(keys_before)
+
+            for key in keys:
+                index = bisect_left(new_keys, key)
+
+                if index == len(new_keys) or new_keys[index] != key:
+                    insort(new_keys, key)
+
+            self.__state = (self.__written_stamp(generation, new_keys),
+                            new_keys)
+        else:
+            self.__state = (None, keys_before)
+
+    def discard(self, key, generation, synced):
+        """
+        Records that ``key`` was just deleted from the storage by the write
+        that bumped the global generation to ``generation``.  ``synced`` is
+        the ``sync_stamp()`` of the storage right before the write.
+        """
+        stamp, keys = self.__state
+
+        if self.__applicable(stamp, generation, synced):
+            index = bisect_left(keys, key)
+
+            if index < len(keys) and keys[index] == key:
+                keys = keys[:index] + keys[index + 1:]
+
+            self.__state = (self.__written_stamp(generation, keys), keys)
+        else:
+            self.__state = (None, keys)
+
+    def __applicable(self, stamp, generation, synced):
+        # The write can be applied to the keys if it is the only write made
+        # since the index was last validated, and if the storage hadn't
+        # synced with other processes since then either.
+        return (
+            stamp is not None
+            and stamp[0] == generation - 1
+            and stamp[2] == synced
+        )
+
+    def __written_stamp(self, generation, keys):
+        # The stamp the storage has now that the write went through, which
+        # the write itself may have moved.
+        return (generation, len(keys), self.sync_stamp())
+
+    def __current(self):
+        stamp, keys = self.__state
+
+        if self.__current_stamp() != stamp:
+            keys = sorted(self.storage.keys())
+            self.__state = (self.__current_stamp(), keys)
+            self.rebuilds += 1
+
+        return keys
+
+    def __current_stamp(self):
+        return (self.generation(), len(self.storage), self.sync_stamp())
+
+    def __range(self, keys, prefix):
+        start = bisect_left(keys, prefix)
+        return slice(start, self.__end(keys, prefix, start))
+
+    def __end(self, keys, prefix, start):
+        # Index just past the last key starting with ``prefix``
+        successor = _successor(prefix)
+
+        if successor is None:
+            return len(keys)
+
+        return bisect_left(keys, successor, start)
+
+
+def sync_stamp_reader(storage):
+    """
+    Returns a function of no arguments returning the stamp ``storage`` moves
+    whenever it syncs with other processes (``generation`` of a
+    ``SnapshotDict``, ``last_synced`` of a durabledict), or ``None`` for
+    storages that can't be changed from elsewhere.
+
+    Which attribute to read is worked out once, without ever reading an
+    attribute the storage doesn't have: durabledicts answer those from
+    ``__getattr__``, which syncs the storage first.
+    """
+    if getattr(type(storage), 'generation', None) is not None:
+        return lambda: storage.generation
+
+    if 'last_synced' in getattr(storage, '__dict__', ()):
+        return lambda: storage.last_synced
+
+    return lambda: None
+
+
+def _successor(prefix):
+    """
+    Returns the smallest string greater than every string starting with
+    ``prefix``, or ``None`` if there is no such string.
+    """
+    while prefix:
+        last = ord(prefix[-1])
+        prefix = prefix[:-1]
+
+        if isinstance(prefix, unicode):
+            if last < 0xffff:
+                return prefix + unichr(last + 1)
+        elif last < 0xff:
+            return prefix + chr(last + 1)
+
+    return None
@@ -9,16 +9,40 @@ gutter.models
 from __future__ import absolute_import
 
 # Standard Library
-import threading
 from collections import defaultdict
-from functools import partial
-from itertools import ifilter
+from itertools import count, ifilter
 
 # External Libraries
-from gutter.client import signals
+from gutter.client import compiler, context, futures, scope, signals, stats
+from gutter.client.arguments import argument
+from gutter.client.index import KeyIndex
+from gutter.client.storage import get_many, set_many
 
 DEFAULT_SEPARATOR = ':'
 
+#: Marks an attribute that had no value before it was first changed
+_UNSET = object()
+
+#: Bumped on every switch write made through any ``Manager``, so that cached
+#: ancestor chains know when they may be out of date.
+_generations = count(1)
+_generation = next(_generations)
+
+
+#: Numbers every ``EvaluationPlan`` built, so a plan's version is never
+#: reused, not even by a plan built for the same switch again.
+_plan_versions = count(1)
+
+
+def _bump_generation():
+    global _generation
+    _generation = next(_generations)
+    return _generation
+
+
+def _current_generation():
+    return _generation
+
 
 def all_false_if_empty(iterable):
     if not iterable:
@@ -55,6 +79,150 @@ class ConditionsDict(defaultdict):
         return self[to_get_key]
 
 
+class EvaluationPlan(object):
+
+    """
+    An immutable, precompiled description of how a switch is evaluated.
+
+    A plan is built once from a switch's state, ``compounded`` flag and
+    conditions, and is then reused for every check until one of them is
+    assigned again.  ``GLOBAL`` and ``DISABLED`` switches resolve to a
+    ``constant``, the any/all ``combinator`` is chosen up front and the
+    conditions are grouped by their argument's ``COMPATIBLE_TYPE``.
+
+    Every plan gets a unique ``version``, which identifies the state of the
+    switch it was built from.
+    """
+
+    __slots__ = ('constant', 'combinator', 'groups', 'version', '_by_type',
+                 '_resolved', '_compiled', '_arguments')
+
+    def __init__(self, constant=None, combinator=any, groups=()):
+        self.constant = constant
+        self.combinator = combinator
+        self.groups = groups
+        self.version = next(_plan_versions)
+        self._by_type = dict(groups)
+        self._resolved = {}
+        self._compiled = {}
+        self._arguments = {}
+
+    @classmethod
+    def from_switch(cls, switch):
+        if switch.state is switch.states.GLOBAL:
+            return cls(constant=True)
+        elif switch.state is switch.states.DISABLED:
+            return cls(constant=False)
+
+        combinator = all_false_if_empty if switch.compounded else any
+
+        groups = []
+        for cond in switch.conditions:
+            compatible_type = cond.argument.COMPATIBLE_TYPE
+            for key, conditions in groups:
+                if key is compatible_type:
+                    conditions.append(cond)
+                    break
+            else:
+                groups.append((compatible_type, [cond]))
+
+        return cls(
+            combinator=combinator,
+            groups=tuple((key, tuple(conds)) for key, conds in groups)
+        )
+
+    def conditions_for(self, input_type):
+        """
+        Returns the tuple of conditions that apply to inputs of
+        ``input_type``.  The lookup is resolved once per input type.
+        """
+        try:
+            return self._resolved[input_type]
+        except KeyError:
+            pass
+
+        conditions = self._by_type.get(input_type)
+
+        if conditions is None:
+            conditions = ()
+            for key, group in self.groups:
+                if issubclass(input_type, key):
+                    conditions = group
+                    break
+
+        self._resolved[input_type] = conditions
+        return conditions
+
+    def arguments_for(self, input_type):
+        """
+        Returns the tuple of distinct argument container classes read by the
+        conditions that apply to inputs of ``input_type``.
+        """
+        try:
+            return self._arguments[input_type]
+        except KeyError:
+            pass
+
+        arguments = []
+
+        if self.constant is None:
+            for condition in self.conditions_for(input_type):
+                if condition.argument not in arguments:
+                    arguments.append(condition.argument)
+
+        arguments = self._arguments[input_type] = tuple(arguments)
+        return arguments
+
+    def evaluate(self, inpt, current):
+        """
+        Combines the results of the conditions that apply to ``inpt``, with
+        the function generated by ``gutter.client.compiler`` for its type
+        when compilation is enabled.  Argument containers are taken from the
+        ``EvaluationScope`` ``current``.
+        """
+        if compiler.enabled and not stats.enabled:
+            input_type = type(inpt)
+
+            try:
+                evaluate = self._compiled[input_type]
+            except KeyError:
+                evaluate = self._compiled[input_type] = \
+                    compiler.compile_conditions(
+                        self.conditions_for(input_type),
+                        self.combinator is not any,
+                        Manager.NONE_INPUT,
+                        self.interpret,
+                    )
+
+            return evaluate(inpt, current)
+
+        return self.interpret(inpt, current)
+
+    def interpret(self, inpt, current):
+        return self.combinator(self.__results(inpt, current))
+
+    def __results(self, inpt, current):
+        container = current.container
+
+        for cond in self.conditions_for(type(inpt)):
+            argument_instance = container(cond.argument, inpt)
+
+            if argument_instance.applies:
+                yield cond.check(argument_instance, inpt)
+
+    def __repr__(self):
+        if self.constant is not None:
+            return '<EvaluationPlan constant=%s>' % self.constant
+
+        return '<EvaluationPlan %s of %s>' % (
+            self.combinator.__name__,
+            ', '.join(
+                '%s: %d' % (getattr(key, '__name__', key), len(conds))
+                for key, conds in self.groups
+            )
+        )
+
+
 class Switch(object):
 
     """
@@ -68,6 +236,10 @@ class Switch(object):
 
     See the Condition class for more information on what a Condition is and how
     it checks to see if it's satisfied by an input.
+
+    Switches are kept compact: attributes live in ``__slots__``, conditions
+    are stored as a tuple and change tracking only records the previous
+    value of an attribute the first time it is assigned after a ``reset``.
     """
 
     class states:
@@ -75,6 +247,23 @@ class Switch(object):
         SELECTIVE = 2
         GLOBAL = 3
 
+    #: Attributes making up the switch's persisted state, whose changes are
+    #: tracked
+    fields = ('_name', 'label', 'description', 'state', 'conditions',
+              'compounded', 'concent')
+
+    __slots__ = fields + ('manager', '__plan', '__ancestors', '__previous',
+                          '__revision')
+
+    __tracked = frozenset(fields)
+
+    #: Attributes the ``EvaluationPlan`` is built from
+    __planned = frozenset(('state', 'conditions', 'compounded'))
+
+    #: Attributes found in the state of switches pickled by older versions
+    __legacy = ('parent', 'children', 'manager', '_Switch__init_vars',
+                '_Switch__plan', '_Switch__ancestors')
+
     def __init__(
             self,
             name,
@@ -86,14 +275,18 @@ class Switch(object):
             description=None,
             **kwargs
     ):
+        self.__previous = None
+        self.__revision = 0
         self._name = str(name)
         self.label = label
         self.description = description
         self.state = state
-        self.conditions = []
+        self.conditions = ()
         self.compounded = compounded
         self.concent = concent
         self.manager = manager
+        self.__plan = None
+        self.__ancestors = None
         self.reset()
 
     @property
@@ -101,10 +294,44 @@ class Switch(object):
         return self._name
 
     @property
-    def parent(self):
+    def ancestors(self):
+        """
+        Tuple of the names of this switch's ancestors, nearest first.
+
+        For a switch named ``a:b:c`` this is ``('a:b', 'a')``.  The names are
+        worked out once per key separator and then cached.
+        """
         separator = getattr(self.manager, 'key_separator', DEFAULT_SEPARATOR)
-        parent = self.name.rsplit(separator, 1)[0]
-        return parent if parent != self.name else None
+        cached = self.__ancestors
+
+        if cached is None or cached[0] != separator:
+            names = []
+            name = self.name
+
+            while True:
+                parent = name.rsplit(separator, 1)[0]
+                if not parent or parent == name:
+                    break
+                names.append(parent)
+                name = parent
+
+            cached = self.__ancestors = (separator, tuple(names))
+
+        return cached[1]
+
+    @property
+    def revision(self):
+        """
+        Number of times this switch object's persisted attributes have been
+        assigned since it was created or loaded.  Together with the object
+        itself, it identifies a version of the switch.
+        """
+        return self.__revision
+
+    @property
+    def parent(self):
+        ancestors = self.ancestors
+        return ancestors[0] if ancestors else None
 
     def get_parent(self):
         return self.manager.switch(self.parent) if self.parent else None
@@ -130,24 +357,95 @@ class Switch(object):
             self.concent is other.concent
         )
 
+    def __setattr__(self, attr, value):
+        if attr in self.__tracked:
+            if attr == 'conditions':
+                value = tuple(value)
+
+            previous = self.__previous
+            if previous is None:
+                previous = self.__previous = {}
+            if attr not in previous:
+                previous[attr] = getattr(self, attr, _UNSET)
+
+            if attr in self.__planned:
+                object.__setattr__(self, '_Switch__plan', None)
+
+            object.__setattr__(self, '_Switch__revision',
+                               self.__revision + 1)
+
+        object.__setattr__(self, attr, value)
+
     def __getstate__(self):
-        inner_dict = vars(self).copy()
-        inner_dict.pop('manager', False)
-        return inner_dict
+        state = dict((field, getattr(self, field, None))
+                     for field in self.fields)
+
+        # Stored as a list, as switches always were
+        state['conditions'] = list(state['conditions'] or ())
+
+        # Attributes added by subclasses without __slots__
+        state.update(getattr(self, '__dict__', {}))
+        state.pop('manager', None)
+
+        return state
 
     def __setstate__(self, state):
-        # remove parent from the state, this is now a calculated field
-        for attr in (
-            'parent',
-            'children',
-        ):
-            state.pop(attr, '')
+        """
+        Restores a switch from the state returned by ``__getstate__``.
+
+        This also reads switches pickled before switches had ``__slots__``,
+        whose state is their whole ``__dict__``: attributes that are now
+        calculated or not persisted (``parent``, ``children``, ``manager``,
+        the change tracking copy and caches) are dropped, and the switch is
+        written back in the compact format the next time it is saved.
+        """
+        state = dict(state)
 
-        self.__dict__ = state
-        if not hasattr(self, 'manager'):
-            setattr(self, 'manager', None)
+        if '_name' not in state and 'name' in state:
+            state['_name'] = state.pop('name')
 
-    def enabled_for(self, inpt):
+        set_attribute = object.__setattr__
+
+        for field in self.fields:
+            set_attribute(self, field, state.pop(field, None))
+
+        set_attribute(self, 'conditions', tuple(self.conditions or ()))
+        set_attribute(self, 'manager', None)
+        set_attribute(self, '_Switch__plan', None)
+        set_attribute(self, '_Switch__ancestors', None)
+        set_attribute(self, '_Switch__previous', None)
+        set_attribute(self, '_Switch__revision', 0)
+
+        for attr in self.__legacy:
+            state.pop(attr, None)
+
+        # Anything left was added by a subclass
+        if state and hasattr(self, '__dict__'):
+            self.__dict__.update(state)
+
+    @property
+    def plan(self):
+        """
+        The compiled ``EvaluationPlan`` for this switch.
+
+        The plan is built on first use and kept until the switch's
+        ``state``, ``conditions`` or ``compounded`` is assigned, the switch is
+        saved or registered again, or ``compile`` is called explicitly.
+        """
+        plan = self.__plan
+        if plan is None:
+            plan = self.compile()
+        return plan
+
+    def compile(self):
+        """
+        Rebuilds the switch's ``EvaluationPlan`` from its current state and
+        conditions and returns it.
+        """
+        self.__plan = EvaluationPlan.from_switch(self)
+        return self.__plan
+
+    def enabled_for(self, inpt, current=None):
         """
         Checks to see if this switch is enabled for the provided input.
 
@@ -161,37 +459,53 @@ class Switch(object):
 
         Keyword Arguments:
         inpt -- An instance of the ``Input`` class.
+        current -- The ``EvaluationScope`` to evaluate in, by default the
+                   active one or a new one.
         """
 
-        signals.switch_checked.call(self)
-        signal_decorated = partial(self.__signal_and_return, inpt)
+        if signals.switch_checked.has_receivers:
+            signals.switch_checked.call(self)
+
+        if stats.enabled:
+            return stats.record_check(
+                self, lambda inpt: self.__evaluate(inpt, current), inpt
+            )
+
+        return self.__evaluate(inpt, current)
+
+    def __evaluate(self, inpt, current):
+        plan = self.plan
 
-        if self.state is self.states.GLOBAL:
-            return signal_decorated(True)
-        elif self.state is self.states.DISABLED:
-            return signal_decorated(False)
+        if plan.constant is not None:
+            return self.__signal_and_return(inpt, plan.constant)
 
-        conditions_dict = ConditionsDict.from_conditions_list(self.conditions)
-        conditions = conditions_dict.get_by_input(inpt)
+        conditions = plan.conditions_for(type(inpt))
 
         if conditions:
-            result = self.__enabled_func(
-                cond.call(inpt)
-                for cond
-                in conditions
-                if cond.argument(inpt).applies
-            )
+            result = plan.evaluate(inpt, current or scope.current_or_new())
         else:
             result = None
 
-        return signal_decorated(result)
+        return self.__signal_and_return(inpt, result)
+
+    def prefetch(self, inpt):
+        """
+        Starts the argument getters that checking this switch against
+        ``inpt`` will need, without waiting for those that return futures.
+        """
+        plan = self.plan
+
+        if plan.constant is None:
+            for condition in plan.conditions_for(type(inpt)):
+                condition.prefetch(inpt)
 
-    def enabled_for_all(self, *inpts):
+    def enabled_for_all(self, *inpts, **kwargs):
+        current = kwargs.get('current')
         foo = ifilter(
             lambda x: x is not None,
-            (self.enabled_for(inpt) for inpt in inpts)
+            (self.enabled_for(inpt, current) for inpt in inpts)
         )
-        return self.__enabled_func(foo)
+        return self.plan.combinator(foo)
 
     def save(self):
         """
@@ -228,7 +542,9 @@ class Switch(object):
         """
         Boolean of if the switch has changed since last saved.
         """
-        return bool(list(self.__changes()))
+        for change in self.__changes():
+            return True
+        return False
 
     def reset(self):
         """
@@ -237,7 +553,7 @@ class Switch(object):
         No switch properties are altered, only the tracking of what has changed
         is reset.
         """
-        self.__init_vars = vars(self).copy()
+        self.__previous = None
 
     @property
     def state_string(self):
@@ -245,22 +561,15 @@ class Switch(object):
         rev = dict(zip(state_vars.values(), state_vars))
         return rev[self.state]
 
-    @property
-    def __enabled_func(self):
-        if self.compounded:
-            return all_false_if_empty
-        else:
-            return any
-
     def __changes(self):
-        for key, value in self.__init_vars.items():
-            if key is '_Switch__init_vars':
-                continue
-            elif key not in vars(self) or getattr(self, key) != value:
-                yield (key, dict(previous=value, current=getattr(self, key)))
+        # Only attributes assigned since the last reset can have changed
+        for key, value in (self.__previous or {}).items():
+            current = getattr(self, key, _UNSET)
+            if current is not value and current != value:
+                yield (key, dict(previous=value, current=current))
 
     def __signal_and_return(self, inpt, is_enabled):
-        if is_enabled:
+        if is_enabled and signals.switch_active.has_receivers:
             signals.switch_active.call(self, inpt)
 
         return is_enabled
@@ -349,11 +658,21 @@ class Condition(object):
             return False
 
         # Call (construct) the argument with the input object
-        argument_instance = self.argument(inpt)
+        argument_instance = scope.container(self.argument, inpt)
 
         if not argument_instance.applies:
             return False
 
+        return self.check(argument_instance, inpt)
+
+    def check(self, argument_instance, inpt):
+        """
+        Like ``call``, with the ``argument_instance`` already built for
+        ``inpt`` and known to apply to it.
+        """
+        if inpt is Manager.NONE_INPUT:
+            return False
+
         application = self.__apply(argument_instance, inpt)
 
         if self.negative:
@@ -361,12 +680,28 @@ class Condition(object):
 
         return application
 
+    def prefetch(self, inpt):
+        """
+        Starts the argument getter this condition needs for ``inpt``.
+        """
+        if inpt is Manager.NONE_INPUT:
+            return
+
+        argument_instance = scope.container(self.argument, inpt)
+        getter = getattr(self.argument, self.attribute, None)
+
+        if isinstance(getter, argument) and argument_instance.applies:
+            getter.prefetch(argument_instance)
+
     @property
     def argument_string(self):
         parts = [self.argument.__name__, self.attribute]
         return '.'.join(map(str, parts))
 
     def __apply(self, argument_instance, inpt):
+        if stats.enabled:
+            return self.__apply_recorded(argument_instance, inpt)
+
         variable = getattr(argument_instance, self.attribute)
 
         try:
@@ -375,14 +710,69 @@ class Condition(object):
             signals.condition_apply_error.call(self, inpt, error)
             return False
 
+    def __apply_recorded(self, argument_instance, inpt):
+        variable = stats.record_argument(argument_instance, self.attribute)
+
+        try:
+            return stats.record_operator(self.operator, variable)
+        except Exception as error:
+            stats.record_error()
+            signals.condition_apply_error.call(self, inpt, error)
+            return False
+
+
+class ChainCache(object):
+
+    """
+    The consent chains of switches, keyed by namespaced switch key.
+
+    Chains are only valid for the stamp they were built with: the global
+    generation and the storage's ``sync_stamp``, since a storage synced
+    with other processes may have replaced any ancestor.  Each stamp gets a
+    fresh dict, swapped in together with its stamp as one tuple, so lookups
+    never take a lock and see either the old or the new stamp as a whole.
+    Within a stamp entries are only ever added.
+    """
+
+    def __init__(self):
+        self.__current = (None, {})
+
+    def get(self, key, stamp):
+        current_stamp, chains = self.__current
+
+        if current_stamp != stamp:
+            return None
+
+        return chains.get(key)
+
+    def set(self, key, stamp, chain):
+        current_stamp, chains = self.__current
+
+        if current_stamp != stamp:
+            if current_stamp is not None and current_stamp[0] > stamp[0]:
+                # Built from an older generation while another thread
+                # already moved on
+                return
+
+            chains = {}
+            self.__current = (stamp, chains)
+
+        chains[key] = chain
+
 
-class Manager(threading.local):
+class Manager(object):
 
     """
     The Manager holds all state for Gutter.  It knows what Switches have been
     registered, and also what Input objects are currently being applied.  It
     also offers an ``active`` method to ask it if a given switch name is
     active, given its conditions and current inputs.
+
+    A manager is shared by every thread of the process.  Its storage, key
+    index and cached consent chains are read without locks and replaced
+    rather than changed in place by writers.  Only ``inputs`` is kept per
+    execution context: per asyncio task, greenlet or thread (see
+    ``gutter.client.context``).
     """
 
     key_separator = DEFAULT_SEPARATOR
@@ -399,7 +789,8 @@ class Manager(threading.local):
         autocreate=False,
         switch_class=Switch,
         inputs=None,
-        namespace=None
+        namespace=None,
+        decision_cache=None
     ):
 
         if inputs is None:
@@ -412,14 +803,20 @@ class Manager(threading.local):
 
         self.storage = storage
         self.autocreate = autocreate
-        self.inputs = inputs
         self.switch_class = switch_class
         self.namespace = namespace
+        self.decision_cache = decision_cache
+        self.__inputs = context.ContextVar('gutter.inputs', default=inputs)
+        self.__chains = ChainCache()
+        self.__index = KeyIndex(storage, _current_generation)
 
     def __getstate__(self):
         inner_dict = vars(self).copy()
-        inner_dict.pop('inputs', False)
+        inner_dict.pop('_Manager__inputs', False)
         inner_dict.pop('storage', False)
+        inner_dict.pop('decision_cache', False)
+        inner_dict.pop('_Manager__chains', False)
+        inner_dict.pop('_Manager__index', False)
         return inner_dict
 
     def __getitem__(self, key):
@@ -429,19 +826,51 @@ class Manager(threading.local):
         return self.__namespaced(key) in self.storage
 
     def __delitem__(self, key):
-        del self.storage[self.__namespaced(key)]
+        self.__depersist(self.__namespaced(key))
+
+    @property
+    def inputs(self):
+        """
+        The inputs switches are checked against along with those passed to
+        ``active``.  They are set per execution context, with ``input``,
+        ``flush`` or ``inputs_scope``; contexts that haven't set them use the
+        ones the manager was created with.
+        """
+        return self.__inputs.get()
+
+    @inputs.setter
+    def inputs(self, inputs):
+        self.__inputs.set(inputs)
+
+    def inputs_scope(self, *inputs):
+        """
+        Returns a context manager making ``inputs`` the current inputs for
+        the enclosed block, and restoring the previous ones after it::
+
+            with gutter.inputs_scope(request, user):
+                gutter.active('new_header')
+        """
+        return context.bound(self.__inputs, list(inputs))
 
     @property
     def switches(self):
         """
         List of all switches currently registered.
         """
-        results = [
-            switch for name, switch in self.storage.iteritems()
-            if name.startswith(self.__joined_namespace)
-        ]
+        keys = self.__index.prefixed(self.__joined_namespace)
+        found = get_many(self.storage, keys)
 
-        return results
+        # Keys deleted since the index was checked are skipped
+        return [found[key] for key in keys if key in found]
+
+    @property
+    def switch_names(self):
+        """
+        Sorted list of the names of all switches currently registered, read
+        from the key index without loading the switches themselves.
+        """
+        return map(self.__denamespaced,
+                   self.__index.prefixed(self.__joined_namespace))
 
     def switch(self, name):
         """
@@ -464,14 +893,55 @@ class Manager(threading.local):
         switch.manager = self
         return switch
 
-    def get_children(self, parent):
-        namespaced_parent = self.__namespaced(parent) + ':'
-        return [
-            self.__denamespaced(child)
-            for child
-            in self.storage.keys()
-            if child.startswith(namespaced_parent)
-        ]
+    def switches_many(self, names, skip_missing=False):
+        """
+        Returns a dict of the switches named in ``names``, keyed by name, all
+        fetched from the storage at once.
+
+        Missing switches are left out if ``skip_missing``.  Otherwise they are
+        treated as by ``switch``: they raise ``ValueError`` unless
+        ``autocreate`` is set, in which case they are all created
+        ``DISABLED`` with a single ``register_many``.
+        """
+        keys = dict((name, self.__namespaced(name)) for name in names)
+        found = get_many(self.storage, keys.values())
+
+        switches = {}
+        missing = []
+
+        for name, key in keys.iteritems():
+            try:
+                switch = switches[name] = found[key]
+            except KeyError:
+                missing.append(name)
+            else:
+                switch.manager = self
+
+        if missing and not skip_missing:
+            if not self.autocreate:
+                raise ValueError("No switch named '%s' registered in '%s'" % (
+                    missing[0], self.namespace))
+
+            created = map(self.__disabled_switch, sorted(missing))
+            self.register_many(created)
+            switches.update((switch.name, switch) for switch in created)
+
+        return switches
+
+    def get_children(self, parent, recursive=True):
+        """
+        Returns the names of every descendant of the ``parent`` switch, or
+        only of its direct children if not ``recursive``.
+        """
+        namespaced_parent = self.__namespaced(parent) + self.key_separator
+
+        if recursive:
+            keys = self.__index.prefixed(namespaced_parent)
+        else:
+            keys = self.__index.children(namespaced_parent,
+                                         self.key_separator)
+
+        return map(self.__denamespaced, keys)
 
     def register(self, switch, signal=signals.switch_registered):
         '''
@@ -481,18 +951,52 @@ class Manager(threading.local):
             raise ValueError('Switch name cannot be blank')
 
         switch.manager = self
+        switch.compile()
         self.__persist(switch)
 
         signal.call(switch)
 
+    def register_many(
+        self,
+        switches,
+        signal=signals.switches_registered,
+        switch_signal=signals.switch_registered
+    ):
+        """
+        Registers every switch in ``switches`` and persists them to the
+        storage at once.  ``switch_signal`` is then sent for each switch, as
+        by ``register``, and ``signal`` once, with the list of switches.
+        """
+        switches = list(switches)
+
+        if not switches:
+            return
+
+        for switch in switches:
+            if not switch.name:
+                raise ValueError('Switch name cannot be blank')
+
+        for switch in switches:
+            switch.manager = self
+            switch.compile()
+
+        self.__persist_many(switches)
+
+        if switch_signal.has_receivers:
+            for switch in switches:
+                switch_signal.call(switch)
+
+        signal.call(switches)
+
     def unregister(self, switch_or_name):
         switch = getattr(switch_or_name, 'name', switch_or_name)
 
-        map(self.unregister, self.get_children(switch))
-
-        if switch in self:
-            signals.switch_unregistered.call(self.switch(switch))
-            del self.storage[self.__namespaced(switch)]
+        # Descendants sort after their ancestors, so going through them in
+        # reverse unregisters every switch before its parent.
+        for name in self.get_children(switch)[::-1] + [switch]:
+            if name in self:
+                signals.switch_unregistered.call(self.switch(name))
+                self.__depersist(self.__namespaced(name))
 
     def input(self, *inputs):
         self.inputs = list(inputs)
@@ -502,33 +1006,97 @@ class Manager(threading.local):
 
     def active(self, name, *inputs, **kwargs):
         switch = self.switch(name)
+        inputs = self.__inputs_for(inputs, kwargs.get('exclusive', False))
 
-        if not kwargs.get('exclusive', False):
-            inputs = tuple(self.inputs) + inputs
+        if stats.enabled:
+            stats.record_call(switch.name)
 
-        # Also check the switches against "NONE" input. This ensures there will
-        # be at least one input checked.
-        if not inputs:
-            inputs = (self.NONE_INPUT,)
+        return self.__active(switch, inputs, scope.current_or_new())
 
-        # If necessary, the switch first consents with its parent and returns
-        # false if the switch is consenting and the parent is not enabled for
-        # ``inputs``.
+    def active_many(self, names, *inputs, **kwargs):
+        """
+        Returns a dict of ``{name: bool}`` telling if each switch in ``names``
+        is active, with the same semantics as calling ``active`` for every
+        name in turn.
+
+        All the switches and the ancestors they consent with are looked up
+        once, parents shared between switches are only evaluated once and
+        argument containers and their variables are extracted once per input
+        for the whole batch.
+        """
+        switches = self.__fetch(names)
+        inputs = self.__inputs_for(inputs, kwargs.get('exclusive', False))
 
-        if (
-            switch.concent
-            and switch.get_parent()
-            and not self.active(switch.parent, *inputs, **kwargs)
-        ):
-            return False
+        if stats.enabled:
+            for name in names:
+                stats.record_call(switches[name].name)
+
+        current = scope.current_or_new()
+
+        return dict(
+            (name, self.__active(switches[name], inputs, current, switches))
+            for name in names
+        )
+
+    def active_async(self, name, *inputs, **kwargs):
+        """
+        Like ``active``, but returns a future whose ``get_result()`` tells if
+        the switch is active.
+
+        The argument getters of the switch and of the ancestors it consents
+        with are all started for every input before this returns, so getters
+        returning futures do their I/O concurrently.  See
+        ``gutter.client.futures``.
+        """
+        results = self.active_many_async([name], *inputs, **kwargs)
+        return futures.Deferred(lambda: results.get_result()[name])
+
+    def active_many_async(self, names, *inputs, **kwargs):
+        """
+        Like ``active_many``, but returns a future whose ``get_result()``
+        returns the dict of results, with the argument getters of every
+        switch involved started at once as by ``active_async``.
+        """
+        switches = self.__fetch(names)
+        inputs = self.__inputs_for(inputs, kwargs.get('exclusive', False))
+
+        if stats.enabled:
+            for name in names:
+                stats.record_call(switches[name].name)
+
+        with scope.evaluation_scope() as current:
+            for switch in switches.itervalues():
+                for inpt in inputs:
+                    switch.prefetch(inpt)
 
-        return switch.enabled_for_all(*inputs)
+        def evaluate():
+            with scope.within(current):
+                return dict(
+                    (name, self.__active(
+                        switches[name], inputs, current, switches
+                    ))
+                    for name in names
+                )
+
+        return futures.Deferred(evaluate)
 
     def update(self, switch):
 
         self.register(switch, signal=signals.switch_updated)
         switch.reset()
 
+    def update_many(self, switches):
+        """
+        Like ``update``, for several switches written to the storage at once.
+        """
+        switches = list(switches)
+
+        self.register_many(switches, signal=signals.switches_updated,
+                           switch_signal=signals.switch_updated)
+
+        for switch in switches:
+            switch.reset()
+
     def namespaced(self, namespace):
         new_namespace = []
 
@@ -539,22 +1107,211 @@ class Manager(threading.local):
 
         new_namespace.append(namespace)
 
-        return type(self)(
+        manager = type(self)(
             storage=self.storage,
             autocreate=self.autocreate,
             inputs=self.inputs,
             switch_class=self.switch_class,
             namespace=new_namespace,
+            decision_cache=self.decision_cache,
         )
 
+        # Same storage, so the same index and chains
+        manager.__index = self.__index
+        manager.__chains = self.__chains
+
+        return manager
+
+    def __inputs_for(self, inputs, exclusive):
+        if not exclusive:
+            inputs = tuple(self.inputs) + inputs
+
+        # Also check the switches against "NONE" input. This ensures there will
+        # be at least one input checked.
+        if not inputs:
+            inputs = (self.NONE_INPUT,)
+
+        return inputs
+
+    def __fetch(self, names):
+        """
+        Looks up every switch in ``names`` and each ancestor they consent
+        with, returning them keyed by name.  Each level of ancestors is
+        fetched with one ``switches_many`` call.
+        """
+        switches = {}
+        pending = set(names)
+
+        while pending:
+            fetched = self.switches_many(pending)
+            switches.update(fetched)
+
+            pending = set(
+                switch.parent for switch in fetched.itervalues()
+                if switch.concent and switch.parent
+                and switch.parent not in switches
+            )
+
+        return switches
+
+    def __consent_chain(self, switch, switches=None):
+        """
+        Returns a tuple of ``(switch, key)`` pairs for ``switch`` followed by
+        every ancestor it (transitively) consents with, nearest first.
+
+        Chains are cached by switch key.  A cached chain is reused as long as
+        no switch has been written since it was built, the storage hasn't
+        synced with other processes (see ``ChainCache``) and ``switch`` is
+        still the very object it was built for; a storage that reloads its
+        switches hands out new objects, which rebuilds the chain.
+        """
+        key = self.__namespaced(switch.name)
+
+        if not (switch.concent and switch.parent):
+            return ((switch, key),)
+
+        # ``switch`` was just read, so the storage has already synced if it
+        # was due to
+        stamp = (_generation, self.__index.sync_stamp())
+        cached = self.__chains.get(key, stamp)
+
+        if cached is not None and cached[0][0] is switch:
+            return cached
+
+        chain = [(switch, key)]
+        node = switch
+
+        while node.concent and node.parent:
+            name = node.parent
+
+            if switches is not None and name in switches:
+                node = switches[name]
+            else:
+                node = self.switch(name)
+
+            chain.append((node, self.__namespaced(name)))
+
+        chain = tuple(chain)
+        self.__chains.set(key, stamp, chain)
+        return chain
+
+    def __active(self, switch, inputs, current, switches=None):
+        chain = self.__consent_chain(switch, switches)
+        decisions = self.decision_cache
+        decision_key = None
+
+        if decisions is not None:
+            decision_key = self.__decision_key(chain, inputs, current)
+
+            if decision_key is not None:
+                result = decisions.get(decision_key)
+                if result is not None:
+                    return result
+
+        # Results are memoized per input tuple in the evaluation scope.  The
+        # inputs are stored alongside the result so their ids stay unique for
+        # as long as the entry exists.
+        input_ids = (id(self.storage),) + tuple(map(id, inputs))
+        results = current.results
+
+        # Find the nearest switch in the chain already evaluated for these
+        # inputs.  Everything above it is already accounted for.
+        result = True
+        start = len(chain)
+
+        for index, (node, key) in enumerate(chain):
+            memoized = results.get((key, input_ids))
+            if memoized is not None:
+                result = memoized[1]
+                start = index
+                break
+
+        # Then walk back down the chain, top-most ancestor first.  A switch
+        # is only enabled if every switch it consents with is.  With a
+        # single input, ``enabled_for_all`` comes down to the truth of
+        # ``enabled_for``.
+        single = len(inputs) == 1
+
+        for index in xrange(start - 1, -1, -1):
+            node, key = chain[index]
+
+            if not result:
+                pass
+            elif single:
+                result = bool(node.enabled_for(inputs[0], current))
+            else:
+                result = node.enabled_for_all(*inputs, current=current)
+
+            results[(key, input_ids)] = (inputs, result)
+
+        if decision_key is not None:
+            decisions.set(decision_key, result)
+
+        return result
+
+    def __decision_key(self, chain, inputs, current):
+        """
+        Returns the ``DecisionCache`` key of the result of ``chain`` for
+        ``inputs``, or ``None`` if an input the chain's conditions read from
+        has no identity.
+        """
+        input_keys = []
+
+        for inpt in inputs:
+            if inpt is self.NONE_INPUT:
+                input_keys.append(None)
+                continue
+
+            input_type = type(inpt)
+            identities = []
+
+            for node, _ in chain:
+                for argument in node.plan.arguments_for(input_type):
+                    identity = current.container(argument, inpt).identity()
+                    if identity is None:
+                        return None
+                    identities.append((argument, identity))
+
+            input_keys.append((input_type, tuple(identities)))
+
+        return (
+            chain[0][1],
+            tuple(node.plan.version for node, _ in chain),
+            tuple(input_keys),
+        )
+
+    def __written(self):
+        scope.invalidate()
+        return _bump_generation()
+
     def __persist(self, switch):
-        self.storage[self.__namespaced(switch.name)] = switch
+        key = self.__namespaced(switch.name)
+        synced = self.__index.sync_stamp()
+        self.storage[key] = switch
+        self.__index.add(key, self.__written(), synced)
         return switch
 
+    def __persist_many(self, switches):
+        items = [(self.__namespaced(switch.name), switch)
+                 for switch in switches]
+        synced = self.__index.sync_stamp()
+        set_many(self.storage, items)
+        self.__index.add_many([key for key, _ in items], self.__written(),
+                              synced)
+
+    def __depersist(self, key):
+        synced = self.__index.sync_stamp()
+        del self.storage[key]
+        self.__index.discard(key, self.__written(), synced)
+
     def __create_and_register_disabled_switch(self, name):
+        switch = self.__disabled_switch(name)
+        self.register(switch)
+        return switch
+
+    def __disabled_switch(self, name):
         switch = self.switch_class(name)
         switch.state = self.switch_class.states.DISABLED
-        self.register(switch)
         return switch
 
     def __parent_key_for(self, switch):
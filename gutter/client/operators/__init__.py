@@ -18,11 +18,14 @@ class Base(object):
 
     @property
     def variables(self):
-        return vars(self)
+        return self.__getstate__()
 
     def __eq__(self, other):
-        for arg in vars(self).keys():
+        for arg in self.__getstate__().keys():
             if getattr(self, arg) != getattr(other, arg):
                 return False
 
         return True
+
+    def __getstate__(self):
+        return dict(vars(self))
@@ -1,8 +1,26 @@
-from decimal import Context as decimal_Context, Decimal, DecimalException
+from decimal import Context as decimal_Context, Decimal, DecimalException, ROUND_CEILING
+from fractions import Fraction
+from hashlib import md5
 
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from gutter.client.arguments.variables import Base as VariableBase
+from gutter.client.cache import LRUCache
 from gutter.client.operators import Base
 from gutter.client.registry import operators
 
+#: Integers outside of this range don't fit the precision of the decimal
+#: context, so they are left to the decimal code path.
+_INTEGER_LIMIT = 10 ** 27
+
+#: How far, relative to the argument, a float can be from the decimal value of
+#: its ``str()`` (which keeps 12 significant digits).  Floats whose remainder
+#: is closer than this to a limit are left to the decimal code path.
+_FLOAT_TOLERANCE = 1e-11
+
 
 class PercentRange(Base):
 
@@ -32,7 +50,73 @@ class PercentRange(Base):
         self.upper_limit = self._context.create_decimal(str(upper_limit))
         self.lower_limit = self._context.create_decimal(str(lower_limit))
 
+    def __getstate__(self):
+        # Attributes starting with an underscore are the cached bounds kept
+        # by the fast paths, not part of the operator's configuration.
+        return dict(
+            (key, value) for key, value in vars(self).items()
+            if not key.startswith('_')
+        )
+
     def applies_to(self, argument):
+        kind = type(argument)
+
+        # Fast paths that give the same answer as the decimal code below
+        # without building any ``Decimal``.
+        if kind in (int, long, bool):
+            bounds = self._bounds()
+            if bounds and -_INTEGER_LIMIT < argument < _INTEGER_LIMIT:
+                return bounds[0] <= argument % 100 < bounds[1]
+        elif kind is float:
+            applies = self._applies_to_float(argument)
+            if applies is not None:
+                return applies
+        elif isinstance(argument, VariableBase) and _str_is_repr(kind):
+            # ``str()`` of a plain variable is its repr, which is never a
+            # decimal, so the decimal path would end up using its hash.
+            bounds = self._bounds()
+            if bounds:
+                return bounds[0] <= hash(argument) % 100 < bounds[1]
+
+        return self._applies_to_decimal(argument)
+
+    def applies_to_many(self, arguments):
+        """
+        Returns a NumPy boolean array telling, for each value in
+        ``arguments``, whether ``applies_to`` would be true for it.
+
+        ``arguments`` may be a NumPy array or any iterable.  Integer and
+        float arrays are evaluated with vectorized NumPy kernels; values a
+        kernel cannot decide exactly, and arrays of any other type, are
+        evaluated one by one with ``applies_to``.  The answers are always
+        exactly those of ``applies_to`` on the equivalent Python values.
+        """
+        if numpy is None:
+            raise ImportError('applies_to_many requires numpy')
+
+        if not hasattr(arguments, '__len__'):
+            arguments = list(arguments)
+
+        values = numpy.asarray(arguments)
+        bounds = self._bounds()
+        kind = values.dtype.kind
+
+        if bounds and kind in 'biu':
+            remainders = numpy.remainder(values.astype(numpy.int64)
+                                         if kind == 'b' else values, 100)
+            return (remainders >= bounds[0]) & (remainders < bounds[1])
+
+        if bounds and kind == 'f':
+            return self._applies_to_float_array(values.astype(numpy.float64),
+                                                bounds)
+
+        return numpy.fromiter(
+            (self.applies_to(value) for value in values.ravel().tolist()),
+            dtype=bool,
+            count=values.size
+        ).reshape(values.shape)
+
+    def _applies_to_decimal(self, argument):
         try:
             decimal_argument = Decimal(str(argument))
         except DecimalException:
@@ -40,6 +124,88 @@ class PercentRange(Base):
 
         return self.lower_limit <= self._modulo(decimal_argument) < self.upper_limit
 
+    def _applies_to_float(self, argument):
+        """
+        Float fast path.  Returns ``None`` when the answer can't be told
+        apart from the decimal path's without actually taking it.
+        """
+        bounds = self._bounds()
+
+        if not bounds or not _FLOAT_MIN < argument < _FLOAT_MAX:
+            return None
+
+        remainder = argument % 100.0
+        tolerance = abs(argument) * _FLOAT_TOLERANCE + 1e-9
+        lower, upper = bounds[2], bounds[3]
+
+        if (
+            abs(remainder - lower) <= tolerance
+            or abs(remainder - upper) <= tolerance
+            or remainder <= tolerance
+            or remainder >= 100.0 - tolerance
+        ):
+            return None
+
+        return lower <= remainder < upper
+
+    def _applies_to_float_array(self, values, bounds):
+        lower, upper = bounds[2], bounds[3]
+
+        with numpy.errstate(invalid='ignore'):
+            remainders = numpy.remainder(values, 100.0)
+            tolerances = numpy.abs(values) * _FLOAT_TOLERANCE + 1e-9
+
+            applies = (remainders >= lower) & (remainders < upper)
+            undecided = (
+                ~numpy.isfinite(values)
+                | (numpy.abs(remainders - lower) <= tolerances)
+                | (numpy.abs(remainders - upper) <= tolerances)
+                | (remainders <= tolerances)
+                | (remainders >= 100.0 - tolerances)
+            )
+
+        flat_values = values.ravel()
+        flat_applies = applies.ravel()
+
+        for index in numpy.flatnonzero(undecided):
+            flat_applies[index] = self._applies_to_decimal(
+                float(flat_values[index])
+            )
+
+        return flat_applies.reshape(values.shape)
+
+    def _bounds(self):
+        """
+        Returns ``(lower, upper, lower_float, upper_float)``.  The first two
+        are the limits rounded up to integers: for an integer ``n``,
+        ``lower_limit <= n < upper_limit`` exactly when ``lower <= n < upper``.
+        Returns ``None`` if the limits aren't finite numbers.
+
+        The bounds are cached on the operator until its limits change.
+        """
+        try:
+            lower_limit, upper_limit, bounds = self._cached_bounds
+            if (
+                lower_limit is self.lower_limit and
+                upper_limit is self.upper_limit
+            ):
+                return bounds
+        except AttributeError:
+            pass
+
+        try:
+            bounds = (
+                _ceiling(self.lower_limit),
+                _ceiling(self.upper_limit),
+                float(self.lower_limit),
+                float(self.upper_limit),
+            )
+        except (ArithmeticError, TypeError, ValueError):
+            bounds = None
+
+        self._cached_bounds = (self.lower_limit, self.upper_limit, bounds)
+        return bounds
+
     def __str__(self):
         return 'in %0.1f - %0.1f%% of values' % (self.lower_limit, self.upper_limit)
 
@@ -63,5 +229,190 @@ class Percent(PercentRange):
         return 'in %s%% of values' % self.upper_limit
 
 
+class StablePercentRange(PercentRange):
+
+    """
+    Like ``PercentRange``, but every value, numeric or not, is placed in one
+    of 10,000 buckets by a stable hash of its string form and an optional
+    ``salt``.
+
+    Buckets are the same in every process, unlike ``hash()`` based ones, and
+    switches with different salts put different values in their first N
+    percent.  Computed buckets are kept in a bounded LRU cache keyed by
+    ``(salt, value)``.
+    """
+
+    name = 'stable_percent_range'
+    group = 'misc'
+    preposition = 'in the stable percentage range of'
+    arguments = ('lower_limit', 'upper_limit', 'salt')
+
+    def __init__(self, lower_limit, upper_limit, salt=''):
+        super(StablePercentRange, self).__init__(lower_limit, upper_limit)
+        self.salt = salt or ''
+
+    def applies_to(self, argument):
+        bounds = self._bucket_bounds()
+        return bounds[0] <= stable_bucket(argument, self.salt) < bounds[1]
+
+    def applies_to_many(self, arguments):
+        """
+        Returns a NumPy boolean array telling, for each value in
+        ``arguments``, whether ``applies_to`` would be true for it.
+        """
+        if numpy is None:
+            raise ImportError('applies_to_many requires numpy')
+
+        if not hasattr(arguments, '__len__'):
+            arguments = list(arguments)
+
+        values = numpy.asarray(arguments)
+
+        return numpy.fromiter(
+            (self.applies_to(value) for value in values.ravel().tolist()),
+            dtype=bool,
+            count=values.size
+        ).reshape(values.shape)
+
+    def _bucket_bounds(self):
+        """
+        Returns the limits as a half-open range of buckets.
+        """
+        try:
+            lower_limit, upper_limit, bounds = self._cached_bucket_bounds
+            if (
+                lower_limit is self.lower_limit and
+                upper_limit is self.upper_limit
+            ):
+                return bounds
+        except AttributeError:
+            pass
+
+        bounds = (
+            _ceiling_bucket(self.lower_limit),
+            _ceiling_bucket(self.upper_limit),
+        )
+        self._cached_bucket_bounds = (
+            self.lower_limit, self.upper_limit, bounds
+        )
+        return bounds
+
+    def __str__(self):
+        return 'in stable %0.1f - %0.1f%% of values%s' % (
+            self.lower_limit,
+            self.upper_limit,
+            _salted(self.salt)
+        )
+
+
+class StablePercent(StablePercentRange):
+
+    name = 'stable_percent'
+    group = 'misc'
+    preposition = 'within the stable percentage of'
+    arguments = ('percentage', 'salt')
+
+    def __init__(self, percentage, salt=''):
+        self.upper_limit = float(percentage)
+        self.lower_limit = 0.0
+        self.salt = salt or ''
+
+    @property
+    def variables(self):
+        return dict(percentage=self.upper_limit, salt=self.salt)
+
+    def __str__(self):
+        return 'in stable %s%% of values%s' % (
+            self.upper_limit,
+            _salted(self.salt)
+        )
+
+
+#: (salt, type, value) -> bucket, shared by every stable percentage operator
+_buckets = LRUCache(maxsize=100000)
+
+
+def stable_bucket(value, salt=''):
+    """
+    Returns the bucket, from 0 to 9999, that ``value`` falls in for ``salt``.
+
+    The bucket is taken from an MD5 digest of the salt and the value's string
+    form, so it is the same in every process and on every machine.  Argument
+    variables are bucketed by the value they wrap.
+    """
+    if isinstance(value, VariableBase):
+        value = value.value
+
+    try:
+        key = (salt, type(value), value)
+        bucket = _buckets.get(key)
+    except TypeError:
+        # Unhashable values are bucketed without caching
+        key = bucket = None
+
+    if bucket is None:
+        if isinstance(value, unicode):
+            text = value.encode('utf-8')
+        else:
+            text = str(value)
+
+        if isinstance(salt, unicode):
+            salt = salt.encode('utf-8')
+
+        digest = md5('%s\x00%s' % (salt, text)).hexdigest()
+        bucket = int(digest[:15], 16) % 10000
+
+        if key is not None:
+            _buckets.set(key, bucket)
+
+    return bucket
+
+
+_FLOAT_MAX = float(_INTEGER_LIMIT)
+_FLOAT_MIN = -_FLOAT_MAX
+
+
+def _ceiling(limit):
+    if isinstance(limit, float):
+        limit = Decimal.from_float(limit)
+    return int(limit.to_integral_value(rounding=ROUND_CEILING))
+
+
+def _ceiling_bucket(limit):
+    """
+    Returns the first bucket at or above the ``limit`` percentage.
+
+    Float limits are read as the decimal number they print as, like
+    ``PercentRange`` limits, not as their exact binary value: 5.7 is
+    slightly above 5.7 in binary, and would otherwise start at bucket 571.
+    """
+    if isinstance(limit, float):
+        limit = Decimal(str(limit))
+
+    hundredths = Fraction(limit) * 100
+    return -(-hundredths.numerator // hundredths.denominator)
+
+
+def _salted(salt):
+    return ' (salted "%s")' % salt if salt else ''
+
+
+def _str_is_repr(kind, cache={}):
+    """
+    Tells if ``str()`` of instances of ``kind`` falls back to ``object``'s
+    default repr.
+    """
+    try:
+        return cache[kind]
+    except KeyError:
+        result = cache[kind] = (
+            kind.__str__ is object.__str__ and
+            kind.__repr__ is object.__repr__
+        )
+        return result
+
+
 operators.register(PercentRange)
 operators.register(Percent)
+operators.register(StablePercentRange)
+operators.register(StablePercent)
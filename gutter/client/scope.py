@@ -0,0 +1,151 @@
+"""
+gutter.scope
+~~~~~~~~~~~~~~
+
+Evaluation scopes let several switch checks share the work of turning inputs
+into argument ``Container`` instances and extracting their variables.
+
+Every ``Manager.active``/``active_many`` call and every ``Switch.enabled_for``
+runs inside a scope of its own.  Wrapping a larger block, such as a whole web
+request, in ``evaluation_scope()`` makes all the checks inside it share one
+scope, so each argument attribute is computed at most once per input::
+
+    with evaluation_scope():
+        gutter.active('new_header', user)
+        gutter.active('new_footer', user)
+
+The active scope is a ``gutter.context.ContextVar``, like the inputs bound by
+``Manager.inputs_scope``, so it is local to the asyncio task, greenlet or
+thread that entered it.
+"""
+
+# Gutter Stuff
+from gutter.client import context
+
+_scope = context.ContextVar('gutter.scope', default=None)
+
+
+class EvaluationScope(object):
+
+    """
+    Memoizes one ``Container`` instance per (input, argument class) pair.
+
+    Containers in turn memoize the variables extracted from them, so within
+    a scope each (input, argument class, attribute) is computed only once.
+    The scope also keeps the ``results`` of switches already checked against
+    a given tuple of inputs, so that siblings share their ancestors' results.
+
+    Inputs are keyed by identity, so they don't need to be hashable.  Each
+    memoized container holds a reference to its input, which keeps the input
+    alive (and its ``id`` unique) for as long as the scope exists.
+    """
+
+    __slots__ = ('containers', 'results', 'token')
+
+    def __init__(self):
+        self.containers = {}
+        self.results = {}
+        self.token = None
+
+    def container(self, argument, inpt):
+        key = (id(inpt), argument)
+
+        try:
+            return self.containers[key]
+        except KeyError:
+            instance = self.containers[key] = argument(inpt)
+            return instance
+
+    def __enter__(self):
+        self.token = _scope.set(self)
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        _scope.reset(self.token)
+        self.token = None
+
+
+class NestedScope(object):
+
+    """
+    Context manager returned by ``evaluation_scope`` when a scope is already
+    active.  Entering it simply hands back the outer scope.
+    """
+
+    __slots__ = ('scope',)
+
+    def __init__(self, scope):
+        self.scope = scope
+
+    def __enter__(self):
+        return self.scope
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        pass
+
+
+def current():
+    """
+    Returns the ``EvaluationScope`` active in this context, or ``None``.
+    """
+    return _scope.get()
+
+
+def current_or_new():
+    """
+    Returns the active ``EvaluationScope``, or else a new one, not entered,
+    for the caller to pass down to everything it evaluates.
+    """
+    return _scope.get() or EvaluationScope()
+
+
+def evaluation_scope():
+    """
+    Returns a context manager running the enclosed block inside an
+    ``EvaluationScope``.
+
+    Scopes nest: if one is already active in this context it is reused, so
+    the outermost scope decides how long memoized work is kept.
+    """
+    scope = current()
+
+    if scope is not None:
+        return NestedScope(scope)
+
+    return EvaluationScope()
+
+
+def within(scope):
+    """
+    Returns a context manager running the enclosed block inside ``scope``,
+    which may already be the active scope.  The same scope may be entered
+    this way by several contexts at once.
+    """
+    if current() is scope:
+        return NestedScope(scope)
+
+    return context.bound(_scope, scope)
+
+
+def invalidate():
+    """
+    Forgets the switch results memoized by the current scope, if any.  Called
+    whenever a switch is registered, updated or unregistered.
+    """
+    scope = current()
+
+    if scope is not None:
+        scope.results.clear()
+
+
+def container(argument, inpt):
+    """
+    Returns an instance of the ``argument`` container for ``inpt``, reusing
+    the one memoized by the current scope if there is one.
+    """
+    scope = current()
+
+    if scope is None:
+        return argument(inpt)
+
+    return scope.container(argument, inpt)
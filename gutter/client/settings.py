@@ -1,9 +1,10 @@
 from durabledict import MemoryDict
-from gutter.client.encoding import JsonPickleEncoding
+from gutter.client.encoding import SchemaEncoding
 
 
 class manager(object):
-    storage_engine = MemoryDict(encoding=JsonPickleEncoding)
+    storage_engine = MemoryDict(encoding=SchemaEncoding)
     autocreate = False
     inputs = []
+    decision_cache = None
     default = None
@@ -1,25 +1,258 @@
+import threading
+import time
+from collections import deque
+
+try:
+    from google.appengine.api.background_thread import BackgroundThread
+except ImportError:
+    BackgroundThread = None
+
+
 class Signal(object):
 
+    """
+    Calls every connected callback with the arguments it is called with.
+
+    ``has_receivers`` is ``False`` while nothing is connected, so hot code
+    paths can skip building a signal's arguments (and the call itself) with
+    a single attribute check::
+
+        if signals.switch_checked.has_receivers:
+            signals.switch_checked.call(switch)
+    """
+
     def __init__(self):
-        self.__callbacks = []
+        self.__callbacks = ()
+        self.has_receivers = False
+
+    def connect(self, callback, queued=False, **options):
+        """
+        Connects ``callback`` to this signal.
 
-    def connect(self, callback):
+        If ``queued``, the callback is wrapped in a ``QueuedReceiver`` built
+        with ``options`` and receives batches of events on a background
+        thread instead of being called synchronously.  The receiver is
+        returned so its counters can be read and its queue flushed.
+        """
         if not callable(callback):
             raise ValueError("Callback argument must be callable")
 
-        self.__callbacks.append(callback)
+        if queued:
+            callback = QueuedReceiver(callback, **options)
+
+        self.__callbacks += (callback,)
+        self.has_receivers = True
+
+        return callback
 
     def call(self, *args, **kwargs):
         for callback in self.__callbacks:
             callback(*args, **kwargs)
 
     def reset(self):
-        self.__callbacks = []
+        callbacks = self.__callbacks
+
+        self.__callbacks = ()
+        self.has_receivers = False
+
+        for callback in callbacks:
+            if isinstance(callback, QueuedReceiver):
+                callback.close()
+
+
+class QueuedReceiver(object):
+
+    """
+    A signal receiver that delivers events to ``callback`` in batches, from a
+    background worker thread, so a slow callback never delays the code
+    sending the signal.
+
+    Calling the receiver only appends the call's arguments, as a
+    ``QueuedEvent``, to a buffer of at most ``maxsize`` events.  The worker
+    thread, started on the first event (and again if it ever dies), calls
+    ``callback`` with lists of up to ``batch_size`` of those events, oldest
+    first.
+
+    The worker waits for events for as long as the receiver is open, so it
+    must not be a thread the App Engine runtime joins at the end of the
+    request that started it.  On App Engine it is started as a
+    ``BackgroundThread``, which is only available on manual and basic
+    scaling instances.  Elsewhere, such as on automatically scaled
+    instances, use ``threaded=False``: events are then only buffered, and
+    delivered from the calling thread by ``flush()``, which should be called
+    at the end of every request.
+
+    When the buffer is full, ``drop`` decides which event is lost: the
+    incoming one (``'newest'``, the default) or the oldest buffered one
+    (``'oldest'``).  Lost events are counted in ``dropped``, delivered ones
+    in ``delivered`` and batches whose callback raised in ``errors``.
+    """
+
+    drop_policies = ('newest', 'oldest')
+
+    def __init__(self, callback, maxsize=10000, batch_size=100, drop='newest',
+                 threaded=True):
+        if drop not in self.drop_policies:
+            raise ValueError("drop must be one of %s" % (self.drop_policies,))
+
+        self.callback = callback
+        self.maxsize = maxsize
+        self.batch_size = batch_size
+        self.drop = drop
+        self.threaded = threaded
+
+        self.delivered = 0
+        self.dropped = 0
+        self.errors = 0
+
+        self.__events = deque()
+        self.__in_flight = 0
+        self.__closed = False
+        self.__worker = None
+        self.__condition = threading.Condition(threading.Lock())
+
+    @property
+    def stats(self):
+        return dict(
+            pending=len(self.__events),
+            delivered=self.delivered,
+            dropped=self.dropped,
+            errors=self.errors,
+        )
+
+    def __call__(self, *args, **kwargs):
+        event = QueuedEvent(args)
+        event.kwargs = kwargs
+
+        with self.__condition:
+            if self.__closed:
+                self.dropped += 1
+                return
+
+            if len(self.__events) >= self.maxsize:
+                self.dropped += 1
+
+                if self.drop == 'newest':
+                    return
+
+                self.__events.popleft()
+
+            self.__events.append(event)
+
+            if not self.threaded:
+                return
+
+            if self.__worker is None or not self.__worker.is_alive():
+                self.__start()
+            elif len(self.__events) == 1:
+                # The worker only waits once the buffer is empty
+                self.__condition.notify_all()
+
+    def flush(self, timeout=None):
+        """
+        Waits until every buffered event has been delivered, or until
+        ``timeout`` seconds have passed.  Returns ``True`` if the buffer was
+        emptied.
+
+        Without a worker thread, delivers the buffered events from the
+        calling thread instead, and always returns ``True``.
+        """
+        if not self.threaded:
+            while self.__deliver_next():
+                pass
+            return True
+
+        deadline = None if timeout is None else time.time() + timeout
+
+        with self.__condition:
+            while self.__events or self.__in_flight:
+                if deadline is None:
+                    self.__condition.wait()
+                else:
+                    remaining = deadline - time.time()
+                    if remaining <= 0:
+                        return False
+                    self.__condition.wait(remaining)
+
+            return True
+
+    def close(self):
+        """
+        Stops accepting events.  Events already buffered are still delivered.
+        """
+        with self.__condition:
+            self.__closed = True
+            self.__condition.notify_all()
+
+    def __start(self):
+        # Called with the condition held
+        thread_class = BackgroundThread or threading.Thread
+        self.__worker = thread_class(target=self.__run,
+                                     name='gutter-signal-receiver')
+        self.__worker.daemon = True
+        self.__worker.start()
+
+    def __run(self):
+        condition = self.__condition
+        events = self.__events
+
+        while True:
+            with condition:
+                while not events and not self.__closed:
+                    condition.wait()
+
+            if not self.__deliver_next():
+                return
+
+    def __deliver_next(self):
+        # Delivers one batch, if any event is buffered, and tells if it did
+        with self.__condition:
+            events = self.__events
+
+            if not events:
+                return False
+
+            batch = [events.popleft()
+                     for _ in xrange(min(self.batch_size, len(events)))]
+            self.__in_flight = len(batch)
+
+        try:
+            self.callback(batch)
+        except Exception:
+            self.errors += 1
+        else:
+            self.delivered += len(batch)
+        finally:
+            with self.__condition:
+                self.__in_flight = 0
+                self.__condition.notify_all()
+
+        return True
+
+
+class QueuedEvent(tuple):
+
+    """
+    The positional arguments a ``QueuedReceiver`` was called with, which it
+    compares equal to, with the keyword arguments in ``kwargs``.
+    """
+
+    kwargs = {}
 
 
 switch_registered = Signal()
 switch_unregistered = Signal()
 switch_updated = Signal()
+
+#: Sent once per ``Manager.register_many``/``update_many`` call with the list
+#: of switches written, after ``switch_registered``/``switch_updated`` was
+#: sent for each of them
+switches_registered = Signal()
+switches_updated = Signal()
 condition_apply_error = Signal()
+
+#: Sent by a ``SnapshotDict`` with the list of ``gutter.client.feed.Change``
+#: records it read from its change feed and applied
+changes_received = Signal()
 switch_checked = Signal()
 switch_active = Signal()
@@ -4,5 +4,6 @@ from gutter.client.models import Manager
 gutter = settings.manager.default or Manager(
     storage=settings.manager.storage_engine,
     autocreate=settings.manager.autocreate,
-    inputs=settings.manager.inputs
+    inputs=settings.manager.inputs,
+    decision_cache=settings.manager.decision_cache
 )
@@ -0,0 +1,211 @@
+"""
+gutter.stats
+~~~~~~~~~~~~~~
+
+Per-switch evaluation statistics.
+
+Collection is off by default.  Once ``enable()`` is called, every switch
+check records how often each switch is asked for and evaluated, how often it
+was on or off, and how long evaluating it took, split into time spent in
+argument getters and time spent in operators.  Condition errors are counted
+too.
+
+Counters are kept per thread, so recording never takes a lock, and they are
+only merged when ``snapshot()`` is called.  The counters of threads that have
+finished are folded into a shared total then, so short-lived threads don't
+pile up::
+
+    stats.enable()
+    ...
+    for name, counters in stats.snapshot().items():
+        print name, counters['checks'], counters['mean_time']
+"""
+
+# Standard Library
+import threading
+import weakref
+from timeit import default_timer as timer
+
+#: Whether statistics are being collected.  Checked by the evaluation code
+#: before recording anything.
+enabled = False
+
+FIELDS = ('calls', 'checks', 'true', 'false', 'time', 'argument_time',
+          'operator_time', 'errors')
+
+CALLS, CHECKS, TRUE, FALSE, TIME, ARGUMENT_TIME, OPERATOR_TIME, ERRORS = \
+    range(len(FIELDS))
+
+_local = threading.local()
+_lock = threading.Lock()
+
+#: A weak reference to every live thread that recorded anything, with its
+#: counters dict
+_all_counters = []
+
+#: The counters of the threads that have finished, merged
+_retired = {}
+
+
+def enable():
+    global enabled
+    enabled = True
+
+
+def disable():
+    global enabled
+    enabled = False
+
+
+def counters_for(name):
+    """
+    Returns this thread's list of counters for the switch ``name``, indexed
+    by the ``FIELDS`` constants.
+    """
+    try:
+        counters = _local.counters
+    except AttributeError:
+        counters = _local.counters = {}
+        thread_ref = weakref.ref(threading.current_thread())
+        with _lock:
+            _retire_finished()
+            _all_counters.append((thread_ref, counters))
+
+    try:
+        return counters[name]
+    except KeyError:
+        switch_counters = counters[name] = [0] * len(FIELDS)
+        return switch_counters
+
+
+def current():
+    """
+    Returns the counters of the switch being evaluated in this thread, or
+    ``None``.
+    """
+    return getattr(_local, 'current', None)
+
+
+def record_call(name):
+    counters_for(name)[CALLS] += 1
+
+
+def record_check(switch, evaluate, inpt):
+    """
+    Calls ``evaluate(inpt)`` for ``switch`` and records the check, its result
+    and its duration.
+    """
+    counters = counters_for(switch.name)
+    previous = current()
+    _local.current = counters
+
+    start = timer()
+    try:
+        result = evaluate(inpt)
+    finally:
+        counters[TIME] += timer() - start
+        _local.current = previous
+
+    counters[CHECKS] += 1
+    counters[TRUE if result else FALSE] += 1
+
+    return result
+
+
+def record_argument(argument_instance, attribute):
+    """
+    Returns ``getattr(argument_instance, attribute)``, recording the time
+    spent in the argument getter.
+    """
+    start = timer()
+    try:
+        return getattr(argument_instance, attribute)
+    finally:
+        counters = current()
+        if counters is not None:
+            counters[ARGUMENT_TIME] += timer() - start
+
+
+def record_operator(operator, variable):
+    """
+    Returns ``operator.applies_to(variable)``, recording the time spent in
+    the operator.
+    """
+    start = timer()
+    try:
+        return operator.applies_to(variable)
+    finally:
+        counters = current()
+        if counters is not None:
+            counters[OPERATOR_TIME] += timer() - start
+
+
+def record_error():
+    counters = current()
+    if counters is not None:
+        counters[ERRORS] += 1
+
+
+def _merge(merged, counters):
+    for name, values in counters.items():
+        totals = merged.setdefault(name, [0] * len(FIELDS))
+        for index, value in enumerate(list(values)):
+            totals[index] += value
+
+
+def _retire_finished():
+    """
+    Folds the counters of the threads that have finished into ``_retired``
+    and forgets them.  Must be called with ``_lock`` held.
+    """
+    live = []
+
+    for thread_ref, counters in _all_counters:
+        thread = thread_ref()
+        if thread is None or not thread.is_alive():
+            _merge(_retired, counters)
+        else:
+            live.append((thread_ref, counters))
+
+    _all_counters[:] = live
+
+
+def snapshot():
+    """
+    Returns the counters of every thread merged, as a dict of switch name to
+    dict of counter name to value.  Each switch also gets a ``true_ratio``
+    (the fraction of checks that were on) and a ``mean_time``.
+    """
+    with _lock:
+        _retire_finished()
+        merged = dict(
+            (name, list(totals)) for name, totals in _retired.items()
+        )
+        thread_counters = [counters for _ref, counters in _all_counters]
+
+    for counters in thread_counters:
+        _merge(merged, counters)
+
+    result = {}
+
+    for name, totals in merged.items():
+        switch_stats = result[name] = dict(zip(FIELDS, totals))
+        checks = float(totals[CHECKS])
+
+        if checks:
+            switch_stats['true_ratio'] = totals[TRUE] / checks
+            switch_stats['mean_time'] = totals[TIME] / checks
+        else:
+            switch_stats['true_ratio'] = switch_stats['mean_time'] = None
+
+    return result
+
+
+def reset():
+    """
+    Forgets every counter recorded so far, in every thread.
+    """
+    with _lock:
+        _retired.clear()
+        for _ref, counters in _all_counters:
+            counters.clear()
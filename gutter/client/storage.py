@@ -0,0 +1,688 @@
+"""
+gutter.storage
+~~~~~~~~~~~~~~~~
+
+Storage wrappers that sit between a ``Manager`` and its backing storage.
+"""
+
+# Standard Library
+import threading
+import time
+from collections import MutableMapping
+
+from gutter.client import signals
+from gutter.client.cache import LRUCache
+from gutter.client.feed import DELETE, SET, latest_ops
+
+
+def get_many(storage, keys):
+    """
+    Returns a dict of the values stored under those of ``keys`` that are in
+    ``storage``.
+
+    Storages that can fetch several keys at once, such as one datastore
+    ``get_multi`` call, do so by implementing a ``get_many(keys)`` method
+    with the same semantics.  Other storages are read one key at a time.
+    """
+    getter = getattr(storage, 'get_many', None)
+
+    if getter is not None:
+        return getter(keys)
+
+    values = {}
+
+    for key in keys:
+        try:
+            values[key] = storage[key]
+        except KeyError:
+            pass
+
+    return values
+
+
+def set_many(storage, items):
+    """
+    Stores every ``(key, value)`` pair of ``items`` in ``storage``.
+
+    Storages that can write several keys at once implement a
+    ``set_many(items)`` method taking the list of pairs.  Other storages are
+    written one key at a time.
+    """
+    setter = getattr(storage, 'set_many', None)
+
+    if setter is not None:
+        setter(items)
+    else:
+        for key, value in items:
+            storage[key] = value
+
+
+class Snapshot(object):
+
+    """
+    One immutable, point-in-time copy of every switch in a storage.
+
+    ``data`` must never be mutated once the snapshot is built; writers build
+    a new ``Snapshot`` and swap it in instead.
+    """
+
+    __slots__ = ('generation', 'data', 'checked_at', 'loaded_at')
+
+    def __init__(self, generation, data, checked_at, loaded_at=None):
+        self.generation = generation
+        self.data = data
+        self.checked_at = checked_at
+        self.loaded_at = checked_at if loaded_at is None else loaded_at
+
+    def confirmed(self, checked_at):
+        return type(self)(self.generation, self.data, checked_at,
+                          self.loaded_at)
+
+
+class SnapshotDict(MutableMapping):
+
+    """
+    A read-through, in-process snapshot in front of any switch storage, such
+    as a ``DatastoreDict``.
+
+    Reads are served from an immutable snapshot of the whole storage.  At
+    most every ``check_interval`` seconds a cheap global ``generation`` stamp
+    is polled, and the snapshot is only reloaded from ``storage`` when that
+    stamp has changed.
+
+    When a check is due and ``background_refresh`` is enabled, readers keep
+    getting the current snapshot while one background thread revalidates it
+    (stale-while-revalidate).  Once the snapshot has gone unconfirmed for
+    ``max_staleness`` seconds, readers revalidate it themselves.
+
+    ``generation`` is a callable returning the stamp.  It defaults to the
+    storage's own ``last_updated`` method (as provided by durabledict
+    storages).  Storages without one only see writes made through this
+    wrapper.
+
+    Writes go straight to ``storage`` and are visible to this process
+    immediately.
+
+    Given a change ``feed`` (see ``gutter.client.feed``), its ``head`` is the
+    stamp polled, and every write made through this wrapper is published to
+    it.  When the head moves, only the switches written since the snapshot's
+    generation are read back from ``storage``, with one ``get_many`` call,
+    and the ``changes_received`` signal is sent with their ``Change``
+    records.  The whole snapshot is reloaded when the feed no longer has all
+    of those changes, and at least every ``reload_interval`` seconds.
+
+    Publishing is tried ``publish_attempts`` times.  If it still fails, the
+    write stands and the changes are kept, and published along with the next
+    write or at the next check, so other processes see them late rather than
+    never.  Failures are counted in ``publish_failures``.
+    """
+
+    def __init__(
+        self,
+        storage,
+        generation=None,
+        check_interval=1.0,
+        max_staleness=30.0,
+        background_refresh=True,
+        clock=time.time,
+        feed=None,
+        reload_interval=300.0,
+        publish_attempts=3
+    ):
+        if feed is not None:
+            generation = feed.head
+        elif generation is None:
+            generation = getattr(storage, 'last_updated', None)
+
+        self.storage = storage
+        self.feed = feed
+        self.reload_interval = reload_interval
+        self.publish_attempts = publish_attempts
+        self.check_interval = check_interval
+        self.max_staleness = max_staleness
+        self.background_refresh = background_refresh
+        self.clock = clock
+
+        self.hits = 0
+        self.misses = 0
+        self.checks = 0
+        self.refreshes = 0
+        self.partial_refreshes = 0
+        self.stale_reads = 0
+        self.publish_failures = 0
+
+        self.__generation = generation
+        self.__lock = threading.Lock()
+        self.__publishing = threading.Lock()
+        self.__unpublished = []
+        self.__snapshot = self.__load()
+
+    @property
+    def generation(self):
+        """
+        The generation stamp of the snapshot currently being served.
+        """
+        return self.__snapshot.generation
+
+    @property
+    def stats(self):
+        """
+        Counters describing how reads were served.
+
+        ``hits`` and ``misses`` count key lookups found and not found in the
+        snapshot, ``checks`` counts generation stamp polls, ``refreshes``
+        counts full reloads from storage, ``partial_refreshes`` counts
+        refreshes of the keys listed by the change feed, ``stale_reads``
+        counts reads served while a background revalidation was pending and
+        ``publish_failures`` counts writes that couldn't be published to the
+        feed.
+        """
+        return dict(
+            hits=self.hits,
+            misses=self.misses,
+            checks=self.checks,
+            refreshes=self.refreshes,
+            partial_refreshes=self.partial_refreshes,
+            stale_reads=self.stale_reads,
+            publish_failures=self.publish_failures,
+        )
+
+    def sync(self):
+        """
+        Reloads the snapshot from storage right away.
+        """
+        with self.__lock:
+            self.__snapshot = self.__load()
+
+    def __getitem__(self, key):
+        try:
+            value = self.__current().data[key]
+        except KeyError:
+            self.misses += 1
+            raise
+
+        self.hits += 1
+        return value
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def __contains__(self, key):
+        return key in self.__current().data
+
+    def __iter__(self):
+        return iter(self.__current().data)
+
+    def __len__(self):
+        return len(self.__current().data)
+
+    def keys(self):
+        return self.__current().data.keys()
+
+    def items(self):
+        return self.__current().data.items()
+
+    def iteritems(self):
+        return self.__current().data.iteritems()
+
+    def get_many(self, keys):
+        data = self.__current().data
+        values = {}
+
+        for key in keys:
+            try:
+                values[key] = data[key]
+            except KeyError:
+                self.misses += 1
+
+        self.hits += len(values)
+        return values
+
+    def __setitem__(self, key, value):
+        self.storage[key] = value
+        self.__replace([(key, value)], published=self.__publish([key], SET))
+
+    def set_many(self, items):
+        set_many(self.storage, items)
+        self.__replace(items, published=self.__publish(
+            [key for key, _ in items], SET
+        ))
+
+    def __delitem__(self, key):
+        del self.storage[key]
+        self.__replace(deleted=[key],
+                       published=self.__publish([key], DELETE))
+
+    def __repr__(self):
+        return '<SnapshotDict generation=%s of %r>' % (
+            self.generation,
+            self.storage
+        )
+
+    def __current(self):
+        snapshot = self.__snapshot
+        age = self.clock() - snapshot.checked_at
+
+        if age < self.check_interval:
+            return snapshot
+
+        if self.background_refresh and age < self.max_staleness:
+            self.stale_reads += 1
+            self.__revalidate_in_background()
+            return snapshot
+
+        with self.__lock:
+            return self.__revalidate()
+
+    def __revalidate(self):
+        # Callers hold the lock.  Another thread may have revalidated the
+        # snapshot while we waited for it.
+        snapshot = self.__snapshot
+        now = self.clock()
+
+        if now - snapshot.checked_at < self.check_interval:
+            return snapshot
+
+        self.checks += 1
+
+        if self.__unpublished:
+            self.__publish([])
+
+        generation = self.__current_generation()
+
+        if (
+            self.feed is not None
+            and now - snapshot.loaded_at >= self.reload_interval
+        ):
+            snapshot = self.__load()
+        elif generation == snapshot.generation:
+            snapshot = snapshot.confirmed(now)
+        else:
+            snapshot = self.__refresh(snapshot, generation)
+
+        self.__snapshot = snapshot
+        return snapshot
+
+    def __refresh(self, snapshot, generation):
+        changes = None
+
+        if self.feed is not None:
+            changes = self.feed.since(snapshot.generation)
+
+        if changes is None:
+            return self.__load()
+
+        ops = latest_ops(changes)
+        values = get_many(self.storage, [
+            key for key, op in ops.iteritems() if op != DELETE
+        ])
+
+        data = dict(snapshot.data)
+
+        for key in ops:
+            if key in values:
+                data[key] = values[key]
+            else:
+                data.pop(key, None)
+
+        if changes:
+            generation = max(generation, changes[-1].generation)
+
+        self.partial_refreshes += 1
+
+        if changes and signals.changes_received.has_receivers:
+            signals.changes_received.call(changes)
+
+        return Snapshot(generation, data, self.clock(), snapshot.loaded_at)
+
+    def __revalidate_in_background(self):
+        if not self.__lock.acquire(False):
+            # A revalidation is already under way
+            return
+
+        def revalidate():
+            try:
+                self.__revalidate()
+            finally:
+                self.__lock.release()
+
+        thread = threading.Thread(target=revalidate)
+        thread.daemon = True
+
+        try:
+            thread.start()
+        except Exception:
+            self.__lock.release()
+            raise
+
+    def __load(self):
+        generation = self.__current_generation()
+        data = dict(self.storage.items())
+        self.refreshes += 1
+        return Snapshot(generation, data, self.clock())
+
+    def __current_generation(self):
+        if self.__generation is None:
+            return None
+        return self.__generation()
+
+    def __publish(self, keys, op=None):
+        """
+        Publishes ``op`` for ``keys``, along with any changes left over by
+        earlier failures, and returns the generation published, or ``None``.
+        """
+        if self.feed is None:
+            return None
+
+        with self.__publishing:
+            changes = self.__unpublished + [(key, op) for key in keys]
+
+            for _ in xrange(self.publish_attempts):
+                try:
+                    generation = self.feed.publish(changes)
+                except Exception:
+                    continue
+
+                self.__unpublished = []
+                return generation
+
+            self.publish_failures += 1
+            self.__unpublished = changes
+            return None
+
+    def __replace(self, items=(), deleted=(), published=None):
+        with self.__lock:
+            snapshot = self.__snapshot
+            data = dict(snapshot.data)
+            data.update(items)
+
+            for key in deleted:
+                data.pop(key, None)
+
+            if self.feed is not None:
+                # The snapshot only holds every change up to ``published`` if
+                # it already held those up to the one before.  Otherwise keep
+                # its generation, so the next check reads the changes made
+                # elsewhere in between (and this one again).
+                if (
+                    published is not None
+                    and snapshot.generation == published - 1
+                ):
+                    generation = published
+                else:
+                    generation = snapshot.generation
+            else:
+                # The new generation stamp may include writes from elsewhere
+                # that this snapshot doesn't have, so leave it unknown.  The
+                # next check then reloads the snapshot from storage.
+                generation = object()
+
+            self.__snapshot = Snapshot(generation, data, self.clock(),
+                                       snapshot.loaded_at)
+
+
+class TieredDict(MutableMapping):
+
+    """
+    A read-through cache of individual switches in front of any switch
+    storage, in two tiers: an in-process LRU, then a ``shared`` cache such as
+    memcache, before ``storage`` itself.
+
+    Switches are kept ``ttl`` seconds in the local tier and ``shared_ttl``
+    seconds in the shared one, missing keys included.  When an entry goes
+    stale, only one request per key refills it: it takes the key's lease,
+    and other requests are served the stale value meanwhile (or wait for the
+    refill if they have no value at all).  Leases are a fixed table of
+    ``lease_stripes`` locks that keys share by hash, so there is no lock per
+    key to keep; two keys sharing one only means that their refills don't
+    run at the same time.  Across instances, a stale shared
+    entry is refreshed from ``storage`` by whichever instance first takes its
+    lease, with memcache ``add``, for at most ``lease_time`` seconds; the
+    others use the stale entry.  Shared entries themselves never expire, so
+    a stale value is always there to serve.
+
+    ``shared`` needs the ``get_multi``, ``set_multi``, ``add`` and
+    ``delete`` methods of ``google.appengine.api.memcache.Client``.
+    ``gutter.client.cache.MemoryCache`` is an in-process stand-in.  Without
+    one only the local tier is used.
+
+    Writes go to ``storage`` and then to both tiers, so they are seen right
+    away by this process and by other instances once their local entries
+    expire.  Listing keys always goes to ``storage``.
+    """
+
+    def __init__(
+        self,
+        storage,
+        shared=None,
+        maxsize=1000,
+        ttl=5.0,
+        shared_ttl=60.0,
+        lease_time=10.0,
+        prefix='gutter-switch:',
+        clock=time.time,
+        lease_stripes=64
+    ):
+        self.storage = storage
+        self.shared = shared
+        self.ttl = ttl
+        self.shared_ttl = shared_ttl
+        self.lease_time = lease_time
+        self.prefix = prefix
+        self.clock = clock
+
+        self.local_hits = 0
+        self.local_misses = 0
+        self.shared_hits = 0
+        self.shared_misses = 0
+        self.stale_reads = 0
+        self.storage_reads = 0
+
+        self.__local = LRUCache(maxsize)
+        self.__leases = tuple(
+            threading.Lock() for _ in range(lease_stripes)
+        )
+
+    @property
+    def stats(self):
+        """
+        Counters describing how reads were served, with the hit ratio of
+        each tier.
+
+        ``stale_reads`` counts reads served a stale local value while
+        another request refilled it.  They count as local hits.  Reads of the
+        shared tier that found a stale entry whose lease was taken elsewhere
+        count as shared hits.
+        """
+        return dict(
+            local_hits=self.local_hits,
+            local_misses=self.local_misses,
+            local_hit_ratio=_ratio(self.local_hits, self.local_misses),
+            shared_hits=self.shared_hits,
+            shared_misses=self.shared_misses,
+            shared_hit_ratio=_ratio(self.shared_hits, self.shared_misses),
+            stale_reads=self.stale_reads,
+            storage_reads=self.storage_reads,
+        )
+
+    def __getitem__(self, key):
+        value = self.__read([key])[key]
+
+        if value is _MISSING:
+            raise KeyError(key)
+
+        return value
+
+    def get_many(self, keys):
+        return dict(
+            (key, value) for key, value in self.__read(keys).iteritems()
+            if value is not _MISSING
+        )
+
+    def __contains__(self, key):
+        return self.__read([key])[key] is not _MISSING
+
+    def __iter__(self):
+        return iter(self.storage.keys())
+
+    def __len__(self):
+        return len(self.storage)
+
+    def keys(self):
+        return self.storage.keys()
+
+    def __setitem__(self, key, value):
+        self.storage[key] = value
+        self.__store({key: value})
+
+    def set_many(self, items):
+        items = list(items)
+        set_many(self.storage, items)
+        self.__store(dict(items))
+
+    def __delitem__(self, key):
+        del self.storage[key]
+        self.__store({key: _MISSING})
+
+    def __repr__(self):
+        return '<TieredDict of %r>' % self.storage
+
+    def __read(self, keys):
+        now = self.clock()
+        values = {}
+        leased = []
+        held = set()
+        waiting = []
+
+        for key in keys:
+            entry = self.__local.get(key)
+
+            if entry is not None and entry[1] > now:
+                self.local_hits += 1
+                values[key] = entry[0]
+                continue
+
+            lease = self.__lease(key)
+
+            if lease in held or lease.acquire(False):
+                held.add(lease)
+                self.local_misses += 1
+                leased.append(key)
+            elif entry is not None:
+                self.local_hits += 1
+                self.stale_reads += 1
+                values[key] = entry[0]
+            else:
+                waiting.append((key, lease))
+
+        if leased:
+            try:
+                values.update(self.__refill(leased))
+            finally:
+                for lease in held:
+                    lease.release()
+
+        for key, lease in waiting:
+            # Nothing to serve until the request holding the lease is done
+            with lease:
+                entry = self.__local.get(key)
+
+                if entry is not None and entry[1] > self.clock():
+                    self.local_hits += 1
+                    values[key] = entry[0]
+                else:
+                    self.local_misses += 1
+                    values.update(self.__refill([key]))
+
+        return values
+
+    def __lease(self, key):
+        return self.__leases[hash(key) % len(self.__leases)]
+
+    def __refill(self, keys):
+        now = self.clock()
+        values = {}
+        shared_leases = []
+
+        if self.shared is not None:
+            found = self.shared.get_multi([self.prefix + key for key in keys])
+
+            for key in keys:
+                entry = found.get(self.prefix + key)
+
+                if entry is None:
+                    self.shared_misses += 1
+                elif entry[1] > now or not self.__shared_lease(key):
+                    self.shared_hits += 1
+                    values[key] = _decoded(entry[0])
+                else:
+                    self.shared_misses += 1
+                    shared_leases.append(self.__shared_lease_key(key))
+
+        missing = [key for key in keys if key not in values]
+
+        if missing:
+            self.storage_reads += len(missing)
+            stored = get_many(self.storage, missing)
+            fetched = dict((key, stored.get(key, _MISSING))
+                           for key in missing)
+            values.update(fetched)
+            self.__store_shared(fetched, now)
+
+            for lease_key in shared_leases:
+                self.shared.delete(lease_key)
+
+        expires = now + self.ttl
+
+        for key, value in values.iteritems():
+            self.__local.set(key, (value, expires))
+
+        return values
+
+    def __store(self, values):
+        now = self.clock()
+        expires = now + self.ttl
+
+        for key, value in values.iteritems():
+            self.__local.set(key, (value, expires))
+
+        self.__store_shared(values, now)
+
+    def __store_shared(self, values, now):
+        if self.shared is None or not values:
+            return
+
+        fresh_until = now + self.shared_ttl
+        self.shared.set_multi(dict(
+            (self.prefix + key, (_encoded(value), fresh_until))
+            for key, value in values.iteritems()
+        ))
+
+    def __shared_lease(self, key):
+        return self.shared.add(self.__shared_lease_key(key), 1,
+                               time=self.lease_time)
+
+    def __shared_lease_key(self, key):
+        return '%slease:%s' % (self.prefix, key)
+
+
+#: Marks a key missing from the storage in a ``TieredDict``
+_MISSING = object()
+
+
+def _encoded(value):
+    # ``_MISSING`` doesn't survive pickling, so missing keys are stored in the
+    # shared tier as an empty tuple instead of a 1-tuple holding the value
+    return () if value is _MISSING else (value,)
+
+
+def _decoded(value):
+    return value[0] if value else _MISSING
+
+
+def _ratio(hits, misses):
+    total = hits + misses
+    return float(hits) / total if total else None
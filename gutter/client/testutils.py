@@ -33,6 +33,7 @@ class SwitchContextManager(object):
     """
     def __init__(self, gutter=gutter, **keys):
         self.previous_active_func = gutter.active
+        self.previous_active_many_func = gutter.active_many
         self.gutter = gutter
         self.keys = keys
 
@@ -57,9 +58,26 @@ class SwitchContextManager(object):
 
             return wrapped
 
+        def patched_active_many(gutter):
+            real_active_many = gutter.active_many
+
+            def wrapped(names, *args, **kwargs):
+                unpatched = [name for name in names if name not in self.keys]
+                results = real_active_many(unpatched, *args, **kwargs)
+
+                for name in names:
+                    if name in self.keys:
+                        results[name] = self.keys[name]
+
+                return results
+
+            return wrapped
+
         self.gutter.active = patched_active(self.gutter)
+        self.gutter.active_many = patched_active_many(self.gutter)
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         self.gutter.active = self.previous_active_func
+        self.gutter.active_many = self.previous_active_many_func
 
 switches = SwitchContextManager
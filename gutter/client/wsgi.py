@@ -1,20 +1,37 @@
 from gutter.client import signals
 from werkzeug.local import Local
 
+NOT_STARTED = ('%r returned a response body without calling start_response '
+               'first')
+
 
 class EnabledSwitchesMiddleware(object):
     """
     Middleware to add active gutter switches for the HTTP request in a
     X-Gutter-Switch headers.
 
-    NOTE: This middleware breaks streaming responses.  Since it is impossible
-    to determine the active switches used for an HTTP response until the entire
-    response body has been read, this middleware buffers the entire reponse body
-    into memory, then adds the X-Gutter-Switch header, before returning.
+    NOTE: By default this middleware breaks streaming responses.  Since it is
+    impossible to determine the active switches used for an HTTP response
+    until the entire response body has been read, this middleware buffers the
+    entire reponse body into memory, then adds the X-Gutter-Switch header,
+    before returning.
+
+    With ``streaming=True`` the body is passed through chunk by chunk
+    instead.  Sending the headers is delayed until the application produces
+    its first chunk, so the header lists the switches that were active up to
+    that point.  Switches checked while the rest of the body is generated
+    can't be added to it.
+
+    In either mode, ``on_complete`` is called with the WSGI ``environ`` and
+    the list of every switch that was active once the response is finished
+    (and closed), for example to log it.
     """
 
-    def __init__(self, application, gutter=None):
+    def __init__(self, application, gutter=None, streaming=False,
+                 on_complete=None):
         self.application = application
+        self.streaming = streaming
+        self.on_complete = on_complete
 
         if not gutter:
             from gutter.client.singleton import gutter
@@ -29,17 +46,26 @@ class EnabledSwitchesMiddleware(object):
         self.locals.switches_active.append(switch.name)
 
     def __call__(self, environ, start_response):
-        self.locals.switches_active = []
+        switches = self.locals.switches_active = []
+
+        if self.streaming:
+            return StreamingResponse(self, environ, start_response, switches)
+
         body, status, headers = self.__call_app(environ, start_response)
-        self.__add_gutter_header_to(headers)
+        self.add_gutter_header_to(headers, switches)
 
         start_response(status, headers)
+        self.complete(environ, switches)
         return body
 
-    def __add_gutter_header_to(self, headers):
-        active_switches = ','.join(self.locals.switches_active)
+    def add_gutter_header_to(self, headers, switches):
+        active_switches = ','.join(switches)
         headers.append(('X-Gutter-Switch', 'active=%s' % active_switches))
 
+    def complete(self, environ, switches):
+        if self.on_complete is not None:
+            self.on_complete(environ, list(switches))
+
     def __call_app(self, environ, start_response):
         status_headers = [None, None]
         body = []
@@ -50,4 +76,93 @@ class EnabledSwitchesMiddleware(object):
 
         map(body.append, self.application(environ, capture_start_response))
 
+        if status_headers[0] is None:
+            raise RuntimeError(NOT_STARTED % (self.application,))
+
         return (body,) + tuple(status_headers)
+
+
+class StreamingResponse(object):
+    """
+    The response body returned by ``EnabledSwitchesMiddleware`` in streaming
+    mode.
+
+    It calls the application straight away, but only calls the server's
+    ``start_response``, with the X-Gutter-Switch header added, just before
+    the first chunk of the body (or the first ``write``) is passed on, or
+    once the body turns out to be empty.  The application must have called
+    ``start_response`` by then, or a ``RuntimeError`` is raised.
+    """
+
+    def __init__(self, middleware, environ, start_response, switches):
+        self.middleware = middleware
+        self.environ = environ
+        self.switches = switches
+
+        self.__start_response = start_response
+        self.__started = None
+        self.__write = None
+        self.__closed = False
+
+        self.body = middleware.application(environ, self.__capture)
+
+    def __iter__(self):
+        iterator = iter(self.body)
+        local = self.middleware.locals
+
+        while True:
+            # The server may interleave other requests on this thread
+            # between chunks
+            local.switches_active = self.switches
+
+            try:
+                chunk = next(iterator)
+            except StopIteration:
+                break
+
+            if chunk:
+                self.__send_headers()
+            elif self.__write is None:
+                # Servers refuse any output, even empty, before the headers
+                continue
+
+            yield chunk
+
+        self.__send_headers()
+
+    def close(self):
+        if self.__closed:
+            return
+
+        self.__closed = True
+
+        try:
+            close = getattr(self.body, 'close', None)
+            if close is not None:
+                close()
+        finally:
+            self.middleware.complete(self.environ, self.switches)
+
+    def __capture(self, status, headers, exc_info=None):
+        if self.__write is not None:
+            # Headers are already sent; the server re-raises exc_info
+            return self.__start_response(status, headers, exc_info)
+
+        self.__started = (status, headers, exc_info)
+        return self.__write_through
+
+    def __write_through(self, data):
+        self.__send_headers()(data)
+
+    def __send_headers(self):
+        if self.__write is None:
+            if self.__started is None:
+                raise RuntimeError(
+                    NOT_STARTED % (self.middleware.application,)
+                )
+
+            status, headers, exc_info = self.__started
+            self.middleware.add_gutter_header_to(headers, self.switches)
+            self.__write = self.__start_response(status, headers, exc_info)
+
+        return self.__write
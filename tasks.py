@@ -51,3 +51,19 @@ def test():
 
     suite = unittest.loader.TestLoader().discover('tests')
     unittest.TextTestRunner(verbosity=2).run(suite)
+
+
+@task
+def benchmark(output=None, compare=None, switches=1000, iterations=10000):
+    """
+    Run the evaluation benchmarks.
+    """
+    command = "python -m benchmarks.run --switches %s --iterations %s" % (
+        switches, iterations)
+
+    if output:
+        command += " --output %s" % output
+    if compare:
+        command += " --compare %s" % compare
+
+    run(command)
@@ -0,0 +1,75 @@
+"""
+Test helpers shared by the test modules
+"""
+from gutter.client import arguments
+from gutter.client.operators import Base
+
+
+class Person(object):
+
+    def __init__(self, name, age):
+        self.name = name
+        self.age = age
+
+
+class PersonArguments(arguments.Container):
+    COMPATIBLE_TYPE = Person
+
+    name = arguments.String(lambda self: self.input.name)
+    age = arguments.Value(lambda self: self.input.age)
+
+    @property
+    def initial(self):
+        return self.input.name[:1]
+
+
+class IntegerArguments(arguments.Container):
+    COMPATIBLE_TYPE = int
+
+    value = arguments.Value(lambda self: self.input)
+
+
+class Broken(Base):
+    """
+    An operator that raises whatever it is applied to.
+    """
+
+    name = 'broken'
+    group = 'misc'
+    preposition = 'broken'
+
+    def applies_to(self, argument):
+        raise RuntimeError('broken')
+
+
+class Clock(object):
+    """
+    A clock that only moves when ``now`` is changed.
+    """
+
+    def __init__(self, now=1000.0):
+        self.now = now
+
+    def __call__(self):
+        return self.now
+
+
+class BatchStorage(dict):
+    """
+    A dict storage with ``get_many`` and ``set_many``, recording the sorted
+    keys of each batch in ``batches``.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super(BatchStorage, self).__init__(*args, **kwargs)
+        self.batches = []
+
+    def get_many(self, keys):
+        keys = sorted(keys)
+        self.batches.append(('get', keys))
+        return dict((key, self[key]) for key in keys if key in self)
+
+    def set_many(self, items):
+        items = list(items)
+        self.batches.append(('set', sorted(key for key, _ in items)))
+        self.update(items)
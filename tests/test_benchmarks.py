@@ -0,0 +1,65 @@
+"""
+Benchmark suite tests
+"""
+import unittest
+
+from benchmarks import memory
+from benchmarks.corpus import Corpus, parse_operators
+from benchmarks.run import compare, run
+
+
+class CorpusTests(unittest.TestCase):
+
+    def test_corpus_follows_its_parameters(self):
+        corpus = Corpus(switches=30, conditions=2, depth=3, inputs=2,
+                        operators='between:2,stable_percent')
+
+        self.assertEquals(len(corpus.switches), 30)
+        self.assertEquals(len(corpus.inputs), 2)
+        self.assertEquals(max(name.count(':') for name in corpus.names), 2)
+        self.assertTrue(all(len(s.conditions) == 2 for s in corpus.switches))
+
+    def test_corpus_is_reproducible(self):
+        self.assertEquals(Corpus(switches=20, seed=3).names,
+                          Corpus(switches=20, seed=3).names)
+
+    def test_rejects_unknown_operators(self):
+        self.assertEquals(parse_operators('equals:3,truthy'),
+                          [('equals', 3), ('truthy', 1)])
+        self.assertRaises(ValueError, parse_operators, 'bogus:1')
+
+    def test_storages_hold_the_corpus(self):
+        corpus = Corpus(switches=20)
+
+        for storage in ('memory', 'datastore', 'snapshot'):
+            manager = corpus.manager(storage)
+            self.assertEquals(len(manager.switches), 20)
+
+
+class RunTests(unittest.TestCase):
+
+    def test_results_can_be_compared(self):
+        results = run(Corpus(switches=10), ['memory'], iterations=20)
+        active = results['results']['memory']['active']
+
+        self.assertEquals(active['iterations'], 20)
+        self.assertTrue(active['p50_us'] <= active['p99_us'])
+        self.assertEquals(compare(results, results), [])
+
+        faster = {'results': {'memory': {'active': dict(
+            active, ops_per_sec=active['ops_per_sec'] * 2
+        )}}}
+        self.assertEquals(
+            [regression[:3] for regression in compare(results, faster)],
+            [('memory', 'active', 'ops_per_sec')]
+        )
+
+
+class MemoryTests(unittest.TestCase):
+
+    def test_compact_switches_are_smaller(self):
+        results = memory.measure(Corpus(switches=20))['results']
+
+        self.assertTrue(results['slots']['bytes_per_switch'] <
+                        results['legacy']['bytes_per_switch'])
+        self.assertTrue(0 < results['savings']['ratio'] < 1)
@@ -0,0 +1,125 @@
+"""
+Compiled condition evaluator tests
+"""
+import random
+import unittest
+
+from gutter.client import compiler, signals, stats
+from gutter.client.models import Switch, Condition, Manager
+from gutter.client.operators.comparable import (
+    Between,
+    Equals,
+    LessThan,
+    LessThanOrEqualTo,
+    MoreThan,
+    MoreThanOrEqualTo,
+)
+from gutter.client.operators.identity import Truthy
+from gutter.client.operators.misc import Percent
+from helpers import Broken, IntegerArguments, Person, PersonArguments
+
+
+OPERATORS = [
+    lambda: Equals(value=random.choice([30, 'bob', 42])),
+    lambda: Between(lower_limit=10, upper_limit=50),
+    lambda: LessThan(upper_limit=random.randint(0, 100)),
+    lambda: LessThanOrEqualTo(upper_limit=30),
+    lambda: MoreThan(lower_limit=random.randint(0, 100)),
+    lambda: MoreThanOrEqualTo(lower_limit=42),
+    lambda: Truthy(),
+    lambda: Percent(percentage=50),
+    lambda: Broken(),
+]
+
+ATTRIBUTES = [(PersonArguments, 'name'), (PersonArguments, 'age'),
+              (PersonArguments, 'initial'), (IntegerArguments, 'value')]
+
+
+class CompilerTests(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = Manager(storage=dict())
+        self.errors = []
+        signals.condition_apply_error.connect(
+            lambda condition, inpt, error: self.errors.append(condition))
+        self.addCleanup(signals.condition_apply_error.reset)
+        self.addCleanup(compiler.disable)
+
+    def switch(self, conditions, compounded=False):
+        switch = Switch('switch', state=Switch.states.SELECTIVE,
+                        compounded=compounded)
+        switch.conditions = conditions
+        self.manager.register(switch)
+        return switch
+
+    def results(self, switch, inputs):
+        self.errors = []
+        results = [switch.enabled_for(inpt) for inpt in inputs]
+        return results, list(self.errors)
+
+    def test_compiled_results_match_interpreted_results(self):
+        random.seed(3)
+        inputs = [Person('bob', 30), Person('amy', 42), Person('', 0), 42, 7,
+                  Manager.NONE_INPUT, 'unrelated']
+
+        for _ in xrange(300):
+            conditions = []
+            for _ in xrange(random.randint(1, 5)):
+                argument, attribute = random.choice(ATTRIBUTES)
+                conditions.append(Condition(
+                    argument, attribute, random.choice(OPERATORS)(),
+                    negative=random.random() < 0.3
+                ))
+
+            switch = self.switch(conditions, random.random() < 0.5)
+
+            compiler.disable()
+            interpreted = self.results(switch, inputs)
+            compiler.enable()
+            compiled = self.results(switch, inputs)
+
+            self.assertEquals(compiled, interpreted, conditions)
+
+    def test_operators_are_inlined_or_called(self):
+        switch = self.switch([
+            Condition(PersonArguments, 'age', Between(lower_limit=1,
+                                                      upper_limit=9)),
+            Condition(PersonArguments, 'age', Percent(percentage=5),
+                      negative=True),
+        ])
+        source = compiler.source_for(switch, Person)
+
+        self.assertTrue('r = v > K0_0 and v < K0_1' in source)
+        self.assertTrue('r = O1(v)' in source)
+        self.assertTrue('r = not r' in source)
+        self.assertEquals(compiler.source_for(switch, int), None)
+
+    def test_functions_are_kept_until_the_switch_changes(self):
+        compiler.enable()
+        switch = self.switch([Condition(IntegerArguments, 'value',
+                                        Equals(value=42))])
+
+        self.assertTrue(switch.enabled_for(42))
+        evaluate = switch.plan._compiled[int]
+        self.assertTrue(switch.enabled_for(42))
+        self.assertTrue(switch.plan._compiled[int] is evaluate)
+
+        switch.conditions = [Condition(IntegerArguments, 'value',
+                                       Equals(value=7))]
+        switch.save()
+
+        self.assertFalse(switch.enabled_for(42))
+        self.assertTrue(switch.plan._compiled[int] is not evaluate)
+        self.assertEquals(switch.plan._compiled[int].source, evaluate.source)
+
+    def test_statistics_use_the_interpreter(self):
+        compiler.enable()
+        stats.enable()
+        self.addCleanup(stats.reset)
+        self.addCleanup(stats.disable)
+
+        switch = self.switch([Condition(IntegerArguments, 'value',
+                                        Equals(value=42))])
+
+        self.assertTrue(switch.enabled_for(42))
+        self.assertEquals(switch.plan._compiled, {})
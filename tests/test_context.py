@@ -0,0 +1,84 @@
+"""
+Context local tests
+"""
+import threading
+import unittest
+
+from durabledict import MemoryDict
+
+from gutter.client.context import LocalVar, bound
+from gutter.client.models import Manager
+
+
+class LocalVarTests(unittest.TestCase):
+
+    def setUp(self):
+        self.var = LocalVar('test', default='default')
+
+    def in_thread(self, func):
+        results = []
+        thread = threading.Thread(target=lambda: results.append(func()))
+        thread.start()
+        thread.join()
+        return results[0]
+
+    def test_gets_defaults(self):
+        self.assertEquals(self.var.get(), 'default')
+        self.assertEquals(self.var.get('other'), 'other')
+        self.assertRaises(LookupError, LocalVar('test').get)
+
+    def test_resets_to_previous_values(self):
+        first = self.var.set(1)
+        second = self.var.set(2)
+        self.assertEquals(self.var.get(), 2)
+
+        self.var.reset(second)
+        self.assertEquals(self.var.get(), 1)
+        self.var.reset(first)
+        self.assertEquals(self.var.get(), 'default')
+
+    def test_values_are_local_to_threads(self):
+        self.var.set('main')
+
+        def other():
+            before = self.var.get()
+            self.var.set('other')
+            return before
+
+        self.assertEquals(self.in_thread(other), 'default')
+        self.assertEquals(self.var.get(), 'main')
+
+    def test_bound_restores_the_value(self):
+        with bound(self.var, 'inner') as value:
+            self.assertEquals(value, 'inner')
+            self.assertEquals(self.var.get(), 'inner')
+
+        self.assertEquals(self.var.get(), 'default')
+
+
+class InputsScopeTests(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = Manager(storage=MemoryDict(), inputs=['default'])
+
+    def test_scopes_inputs_to_the_block(self):
+        with self.manager.inputs_scope('request', 'user'):
+            self.assertEquals(self.manager.inputs, ['request', 'user'])
+
+            with self.manager.inputs_scope('other'):
+                self.assertEquals(self.manager.inputs, ['other'])
+
+            self.assertEquals(self.manager.inputs, ['request', 'user'])
+
+        self.assertEquals(self.manager.inputs, ['default'])
+
+    def test_restores_inputs_after_errors(self):
+        self.manager.input('set')
+
+        try:
+            with self.manager.inputs_scope('request'):
+                raise ValueError()
+        except ValueError:
+            pass
+
+        self.assertEquals(self.manager.inputs, ['set'])
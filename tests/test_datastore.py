@@ -0,0 +1,88 @@
+"""
+Datastore storage tests
+"""
+import pickle
+
+from fixtures import GaeTestCase
+from gutter.client.encoding import SchemaEncoding
+from gutter.client.models import Condition, Manager, Switch
+from gutter.client.operators.comparable import MoreThan
+
+from gutter.appengine.models import SwitchModel
+from gutter.appengine.storage import BatchDatastoreDict
+from helpers import PersonArguments
+
+
+class BatchDatastoreDictTests(GaeTestCase):
+
+    def setUp(self):
+        super(BatchDatastoreDictTests, self).setUp()
+        self.storage = BatchDatastoreDict(SwitchModel)
+        self.switches = dict(
+            (name, Switch(name, state=Switch.states.GLOBAL))
+            for name in ('a', 'a:b', 'c')
+        )
+
+    def test_set_many_stores_every_item(self):
+        self.storage.set_many(self.switches.items())
+
+        self.assertEquals(sorted(self.storage.keys()), ['a', 'a:b', 'c'])
+        self.assertEquals(self.storage['a:b'].name, 'a:b')
+
+    def test_get_many_skips_missing_keys(self):
+        self.storage.set_many(self.switches.items())
+
+        found = self.storage.get_many(['a', 'c', 'x'])
+
+        self.assertEquals(sorted(found), ['a', 'c'])
+        self.assertEquals(found['c'].state, Switch.states.GLOBAL)
+
+    def test_manager_batches_go_through(self):
+        manager = Manager(storage=self.storage)
+        manager.register_many(self.switches.values())
+
+        self.assertEquals(sorted(manager.switches_many(['a', 'c'])),
+                          ['a', 'c'])
+        self.assertEquals(manager.active_many(['a:b', 'c']),
+                          {'a:b': True, 'c': True})
+
+
+class SwitchPropertyTests(GaeTestCase):
+
+    def setUp(self):
+        super(SwitchPropertyTests, self).setUp()
+        self.switch = Switch('adult', state=Switch.states.SELECTIVE,
+                             label='Adult')
+        self.switch.conditions = [
+            Condition(PersonArguments, 'age', MoreThan(lower_limit=17))
+        ]
+
+    def test_switches_are_stored_with_schema_encoding(self):
+        stored = SwitchModel.value._to_base_value(self.switch)
+        self.assertTrue(SchemaEncoding.is_encoded(stored))
+
+        key = SwitchModel(id='adult', value=self.switch).put()
+        switch = key.get(use_cache=False, use_memcache=False).value
+
+        self.assertEquals(switch.name, 'adult')
+        self.assertEquals(switch.label, 'Adult')
+        self.assertEquals(switch.conditions[0].operator.lower_limit, 17)
+
+    def test_unencodable_values_are_pickled(self):
+        key = SwitchModel(id='other', value={'not': 'a switch'}).put()
+
+        self.assertFalse(SchemaEncoding.is_encoded(
+            SwitchModel.value._to_base_value({'not': 'a switch'})
+        ))
+        self.assertEquals(
+            key.get(use_cache=False, use_memcache=False).value,
+            {'not': 'a switch'}
+        )
+
+    def test_reads_switches_pickled_before_it_existed(self):
+        # What ndb.PickleProperty stored
+        stored = pickle.dumps(self.switch, pickle.HIGHEST_PROTOCOL)
+        switch = SwitchModel.value._from_base_value(stored)
+
+        self.assertEquals(switch.name, 'adult')
+        self.assertEquals(switch.conditions[0].operator.lower_limit, 17)
@@ -0,0 +1,60 @@
+from fixtures import GaeTestCase
+from gutter.client.feed import Change, DELETE, SET
+from gutter.client.storage import SnapshotDict
+
+from gutter.appengine.feed import DatastoreFeed
+
+
+class DatastoreFeedTests(GaeTestCase):
+
+    def setUp(self):
+        super(DatastoreFeedTests, self).setUp()
+        self.feed = DatastoreFeed(retain=2)
+
+    def test_numbers_generations_consecutively(self):
+        self.assertEquals(self.feed.head(), 0)
+        self.assertEquals(self.feed.publish([('a', SET)]), 1)
+        self.assertEquals(self.feed.publish([('a', DELETE)]), 2)
+        self.assertEquals(self.feed.head(), 2)
+
+    def test_lists_changes_since_a_generation(self):
+        self.feed.publish([('a', SET), ('b', SET)])
+        self.feed.publish([('a', DELETE)])
+
+        self.assertEquals(self.feed.since(0), [
+            Change(1, 'a', SET), Change(1, 'b', SET), Change(2, 'a', DELETE)
+        ])
+        self.assertEquals(self.feed.since(2), [])
+        self.assertEquals(self.feed.since(None), None)
+
+    def test_forgets_changes_past_retention(self):
+        for key in 'abc':
+            self.feed.publish([(key, SET)])
+
+        self.assertEquals(self.feed.since(0), None)
+        self.assertEquals(self.feed.since(1), [Change(2, 'b', SET),
+                                               Change(3, 'c', SET)])
+
+    def test_head_survives_memcache_flushes(self):
+        self.feed.publish([('a', SET)])
+        self.feed.cache.flush_all()
+
+        self.assertEquals(self.feed.head(), 1)
+        self.assertEquals(DatastoreFeed(retain=2).since(0),
+                          [Change(1, 'a', SET)])
+
+    def test_snapshots_share_writes_through_the_feed(self):
+        backing = {}
+        local, remote = [
+            SnapshotDict(backing, check_interval=0, background_refresh=False,
+                         feed=DatastoreFeed(retain=10))
+            for _ in range(2)
+        ]
+
+        remote['a'] = 1
+        remote['b'] = 2
+        del remote['a']
+
+        self.assertEquals(dict(local.items()), {'b': 2})
+        self.assertEquals(local.stats['partial_refreshes'], 1)
+        self.assertEquals(local.generation, 3)
@@ -0,0 +1,131 @@
+"""
+Decision cache tests
+"""
+import unittest
+
+from durabledict import MemoryDict
+
+from gutter.client import arguments, signals
+from gutter.client.decisions import DecisionCache
+from gutter.client.models import Switch, Condition, Manager
+from gutter.client.operators.comparable import MoreThan
+from helpers import Clock
+
+
+class User(object):
+
+    def __init__(self, user_id, age):
+        self.user_id = user_id
+        self.age = age
+
+
+class UserArguments(arguments.Container):
+    COMPATIBLE_TYPE = User
+
+    age = arguments.Value(lambda self: self.input.age)
+
+    def identity(self):
+        return self.input.user_id
+
+
+class Anonymous(object):
+
+    def __init__(self, age):
+        self.age = age
+
+
+class AnonymousArguments(arguments.Container):
+    COMPATIBLE_TYPE = Anonymous
+
+    age = arguments.Value(lambda self: self.input.age)
+
+
+class DecisionCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = Clock(now=0)
+        self.cache = DecisionCache(maxsize=2, ttl=10, clock=self.clock)
+
+    def test_keeps_results(self):
+        self.cache.set('a', True)
+        self.cache.set('b', False)
+
+        self.assertEquals(self.cache.get('a'), True)
+        self.assertEquals(self.cache.get('b'), False)
+        self.assertEquals(self.cache.get('c'), None)
+        self.assertEquals(self.cache.stats,
+                          dict(hits=2, misses=1, expired=0, size=2))
+
+    def test_expires_results_after_ttl(self):
+        self.cache.set('a', True)
+        self.clock.now = 10
+
+        self.assertEquals(self.cache.get('a'), None)
+        self.assertEquals(self.cache.stats,
+                          dict(hits=0, misses=1, expired=1, size=0))
+
+    def test_evicts_least_recently_used_results(self):
+        self.cache.set('a', True)
+        self.cache.set('b', True)
+        self.cache.get('a')
+        self.cache.set('c', True)
+
+        self.assertEquals(self.cache.get('b'), None)
+        self.assertEquals(self.cache.get('a'), True)
+
+
+class ManagerDecisionCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = DecisionCache()
+        self.manager = Manager(storage=MemoryDict(),
+                               decision_cache=self.cache)
+
+        self.parent = Switch('parent', state=Switch.states.GLOBAL)
+        self.switch = Switch('parent:child', state=Switch.states.SELECTIVE,
+                             concent=True)
+        self.switch.conditions = [
+            Condition(UserArguments, 'age', MoreThan(lower_limit=18)),
+            Condition(AnonymousArguments, 'age', MoreThan(lower_limit=18)),
+        ]
+        self.manager.register(self.parent)
+        self.manager.register(self.switch)
+
+        self.checked = []
+        signals.switch_checked.connect(self.checked.append)
+        self.addCleanup(signals.switch_checked.reset)
+
+    def test_reuses_results_for_the_same_identity(self):
+        self.assertTrue(self.manager.active('parent:child', User(1, 30)))
+        checked = len(self.checked)
+
+        # Same identity, so the cached result wins until the entry expires
+        self.assertTrue(self.manager.active('parent:child', User(1, 10)))
+        self.assertEquals(len(self.checked), checked)
+        self.assertEquals(self.cache.hits, 1)
+
+        self.assertFalse(self.manager.active('parent:child', User(2, 10)))
+        self.assertEquals(self.cache.misses, 2)
+
+    def test_does_not_cache_inputs_without_identity(self):
+        self.assertTrue(self.manager.active('parent:child', Anonymous(30)))
+        self.assertFalse(self.manager.active('parent:child', Anonymous(10)))
+        self.assertEquals(len(self.cache), 0)
+
+    def test_switch_updates_invalidate_results(self):
+        self.assertTrue(self.manager.active('parent:child', User(1, 30)))
+
+        self.switch.conditions[0].operator.lower_limit = 40
+        self.manager.update(self.switch)
+        self.assertFalse(self.manager.active('parent:child', User(1, 30)))
+
+    def test_ancestor_updates_invalidate_results(self):
+        self.assertTrue(self.manager.active('parent:child', User(1, 30)))
+
+        self.parent.state = Switch.states.DISABLED
+        self.manager.update(self.parent)
+        self.assertFalse(self.manager.active('parent:child', User(1, 30)))
+
+    def test_is_shared_with_namespaced_managers(self):
+        namespaced = self.manager.namespaced('other')
+        self.assertTrue(namespaced.decision_cache is self.cache)
@@ -0,0 +1,133 @@
+"""
+Switch encoding tests
+"""
+import pickle
+import unittest
+from decimal import Decimal
+
+from durabledict import MemoryDict
+from durabledict.encoding import DecodingError, PickleEncoding
+
+from gutter.client import registry
+from gutter.client.encoding import JsonPickleEncoding, SchemaEncoding
+from gutter.client.models import Switch, Condition, Manager
+from gutter.client.operators import Base
+from gutter.client.operators.comparable import Between, Equals
+from gutter.client.operators.identity import Truthy
+from gutter.client.operators.misc import PercentRange, StablePercent
+from helpers import Person, PersonArguments
+
+
+class OneOf(Base):
+
+    name = 'one_of'
+    group = 'misc'
+    preposition = 'one of'
+    arguments = ('values',)
+
+    def applies_to(self, argument):
+        return argument in self.values
+
+
+class SchemaEncodingTests(unittest.TestCase):
+
+    def setUp(self):
+        self.switch = Switch('parent:child', state=Switch.states.SELECTIVE,
+                             compounded=True, concent=False,
+                             label='Child', description=u'Caf\xe9')
+        self.switch.conditions = [
+            Condition(PersonArguments, 'age', Between(lower_limit=18,
+                                                      upper_limit=65)),
+            Condition(PersonArguments, 'name', Equals(value='bob'),
+                      negative=True),
+            Condition(PersonArguments, 'age', PercentRange(10, 42.5)),
+            Condition(PersonArguments, 'name', StablePercent(25, salt='x')),
+            Condition(PersonArguments, 'name', Truthy()),
+            Condition(PersonArguments, 'name',
+                      OneOf(values=('bob', 'amy'))),
+        ]
+
+    def assertSameSwitch(self, switch):
+        self.assertEquals(switch, self.switch)
+        self.assertEquals(switch.label, self.switch.label)
+        self.assertEquals(switch.description, self.switch.description)
+        self.assertEquals(switch.conditions, self.switch.conditions)
+
+        for person in (Person('bob', 30), Person('amy', 70)):
+            self.assertEquals(switch.enabled_for(person),
+                              self.switch.enabled_for(person))
+
+    def test_round_trips_switches(self):
+        encoded = SchemaEncoding.encode(self.switch)
+
+        self.assertTrue(SchemaEncoding.is_encoded(encoded))
+        self.assertSameSwitch(SchemaEncoding.decode(encoded))
+        self.assertEquals(type(SchemaEncoding.decode(encoded).name), str)
+
+    def test_keeps_operator_state_types(self):
+        switch = SchemaEncoding.decode(SchemaEncoding.encode(self.switch))
+        percent_range = switch.conditions[2].operator
+        one_of = switch.conditions[5].operator
+
+        self.assertEquals(percent_range.upper_limit, Decimal('42.5'))
+        self.assertEquals(type(percent_range.upper_limit), Decimal)
+        self.assertEquals(one_of.values, ('bob', 'amy'))
+
+    def test_references_registered_operators_by_key(self):
+        encoded = SchemaEncoding.encode(self.switch)
+
+        self.assertTrue('"between"' in encoded)
+        self.assertTrue('%s:OneOf' % __name__ in encoded)
+        self.assertTrue(
+            '%s:PersonArguments' % PersonArguments.__module__ in encoded
+        )
+
+    def test_references_registered_arguments_by_key(self):
+        SchemaEncoding.encode(self.switch)
+
+        registry.arguments.register('person', PersonArguments)
+        self.addCleanup(registry.arguments.items.pop, 'person')
+        encoded = SchemaEncoding.encode(self.switch)
+
+        self.assertTrue('["person","age","between"' in encoded)
+        self.assertFalse(':PersonArguments' in encoded)
+        self.assertSameSwitch(SchemaEncoding.decode(encoded))
+        self.assertTrue(
+            SchemaEncoding.decode(encoded).conditions[0].argument
+            is PersonArguments
+        )
+
+    def test_is_smaller_than_jsonpickle(self):
+        self.assertTrue(len(SchemaEncoding.encode(self.switch)) <
+                        len(JsonPickleEncoding.encode(self.switch)))
+
+    def test_reads_legacy_payloads(self):
+        self.assertSameSwitch(
+            SchemaEncoding.decode(JsonPickleEncoding.encode(self.switch))
+        )
+        self.assertSameSwitch(
+            SchemaEncoding.decode(PickleEncoding.encode(self.switch))
+        )
+
+    def test_falls_back_for_values_it_cannot_encode(self):
+        self.switch.conditions = [
+            Condition(PersonArguments, 'name', OneOf(values=set(['bob'])))
+        ]
+        encoded = SchemaEncoding.encode(self.switch)
+
+        self.assertFalse(SchemaEncoding.is_encoded(encoded))
+        self.assertSameSwitch(SchemaEncoding.decode(encoded))
+        self.assertEquals(SchemaEncoding.decode(SchemaEncoding.encode(42)),
+                          42)
+
+    def test_rejects_corrupt_payloads(self):
+        self.assertRaises(DecodingError, SchemaEncoding.decode,
+                          '["gutter/1","name"]')
+
+    def test_works_as_a_storage_encoding(self):
+        manager = Manager(storage=MemoryDict(encoding=SchemaEncoding))
+        manager.register(self.switch)
+
+        self.assertSameSwitch(manager.switch('parent:child'))
+        self.assertEquals(pickle.loads(pickle.dumps(self.switch)),
+                          self.switch)
@@ -0,0 +1,216 @@
+"""
+Change feed tests
+"""
+import unittest
+
+from gutter.client import signals
+from gutter.client.decisions import DecisionCache
+from gutter.client.feed import Change, DELETE, MemoryFeed, SET
+from gutter.client.models import Manager, Switch
+from gutter.client.storage import SnapshotDict
+from helpers import Clock
+
+
+class CountingStorage(dict):
+
+    def __init__(self, *args, **kwargs):
+        super(CountingStorage, self).__init__(*args, **kwargs)
+        self.reads = []
+
+    def get_many(self, keys):
+        keys = sorted(keys)
+        self.reads.append(keys)
+        return dict((key, self[key]) for key in keys if key in self)
+
+
+class FlakyFeed(MemoryFeed):
+
+    def __init__(self):
+        super(FlakyFeed, self).__init__()
+        self.failures = 0
+
+    def publish(self, changes):
+        if self.failures:
+            self.failures -= 1
+            raise RuntimeError('contention')
+
+        return super(FlakyFeed, self).publish(changes)
+
+
+class MemoryFeedTests(unittest.TestCase):
+
+    def setUp(self):
+        self.feed = MemoryFeed(retain=2)
+
+    def test_numbers_generations_consecutively(self):
+        self.assertEquals(self.feed.head(), 0)
+        self.assertEquals(self.feed.publish([('a', SET)]), 1)
+        self.assertEquals(self.feed.publish([('b', SET), ('a', DELETE)]), 2)
+        self.assertEquals(self.feed.head(), 2)
+
+    def test_lists_changes_since_a_generation(self):
+        self.feed.publish([('a', SET)])
+        self.feed.publish([('b', SET), ('a', DELETE)])
+
+        self.assertEquals(self.feed.since(0), [
+            Change(1, 'a', SET), Change(2, 'b', SET), Change(2, 'a', DELETE)
+        ])
+        self.assertEquals(self.feed.since(2), [])
+
+    def test_forgets_changes_past_retention(self):
+        for key in 'abc':
+            self.feed.publish([(key, SET)])
+
+        self.assertEquals(self.feed.since(0), None)
+        self.assertEquals(self.feed.since(1), [Change(2, 'b', SET),
+                                               Change(3, 'c', SET)])
+        self.assertEquals(self.feed.since(None), None)
+        self.assertEquals(self.feed.since(4), None)
+
+
+class SnapshotFeedTests(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+        self.feed = MemoryFeed()
+        self.backing = CountingStorage(a=1, b=2)
+
+        # Two instances sharing the storage and the feed
+        self.local, self.remote = [
+            SnapshotDict(self.backing, check_interval=5,
+                         background_refresh=False, clock=self.clock,
+                         feed=self.feed)
+            for _ in range(2)
+        ]
+
+        self.received = []
+        signals.changes_received.connect(self.received.append)
+        self.addCleanup(signals.changes_received.reset)
+
+    def test_writes_are_published(self):
+        self.remote['a'] = 10
+        del self.remote['b']
+
+        self.assertEquals(self.feed.since(0), [Change(1, 'a', SET),
+                                               Change(2, 'b', DELETE)])
+
+    def test_only_changed_keys_are_refreshed(self):
+        self.remote['a'] = 10
+        del self.remote['b']
+        self.remote.set_many([('c', 3)])
+
+        self.clock.now += 5
+        self.assertEquals(dict(self.local.items()), {'a': 10, 'c': 3})
+        self.assertEquals(self.backing.reads, [['a', 'c']])
+        self.assertEquals(self.local.stats['refreshes'], 1)
+        self.assertEquals(self.local.stats['partial_refreshes'], 1)
+        self.assertEquals(len(self.received), 1)
+        self.assertEquals(self.local.generation, 3)
+
+    def test_own_writes_keep_the_snapshot_current(self):
+        self.local['a'] = 10
+
+        self.clock.now += 5
+        self.assertEquals(self.local['a'], 10)
+        self.assertEquals(self.local.generation, 1)
+        self.assertEquals(self.local.stats['partial_refreshes'], 0)
+
+    def test_interleaved_writes_are_read_back(self):
+        self.remote['b'] = 20
+        self.local['a'] = 10
+
+        self.clock.now += 5
+        self.assertEquals(dict(self.local.items()), {'a': 10, 'b': 20})
+        self.assertEquals(self.local.generation, 2)
+
+    def test_reloads_everything_when_changes_are_gone(self):
+        feed = MemoryFeed(retain=1)
+        local = SnapshotDict(self.backing, check_interval=5,
+                             background_refresh=False, clock=self.clock,
+                             feed=feed)
+        self.backing['a'] = 10
+        feed.publish([('a', SET)])
+        self.backing['b'] = 20
+        feed.publish([('b', SET)])
+
+        self.clock.now += 5
+        self.assertEquals(dict(local.items()), {'a': 10, 'b': 20})
+        self.assertEquals(local.stats['refreshes'], 2)
+        self.assertEquals(local.stats['partial_refreshes'], 0)
+
+    def test_writes_missed_by_the_feed_are_reloaded_periodically(self):
+        # Written without publishing, e.g. straight to the datastore
+        self.backing['a'] = 10
+
+        self.clock.now += 5
+        self.assertEquals(self.local['a'], 1)
+
+        self.clock.now += 300
+        self.assertEquals(self.local['a'], 10)
+        self.assertEquals(self.local.stats['refreshes'], 2)
+
+    def test_failed_publishes_are_retried(self):
+        feed = FlakyFeed()
+        local, remote = [
+            SnapshotDict(self.backing, check_interval=5,
+                         background_refresh=False, clock=self.clock,
+                         feed=feed)
+            for _ in range(2)
+        ]
+
+        feed.failures = 2
+        remote['a'] = 10
+        self.assertEquals(feed.since(0), [Change(1, 'a', SET)])
+
+        feed.failures = 3
+        remote['b'] = 20
+        self.assertEquals(remote['b'], 20)
+        self.assertEquals(remote.stats['publish_failures'], 1)
+        self.assertEquals(feed.head(), 1)
+
+        # Published again at the writer's next check
+        self.clock.now += 5
+        remote['a']
+        self.assertEquals(feed.head(), 2)
+
+        self.clock.now += 5
+        self.assertEquals(dict(local.items()), {'a': 10, 'b': 20})
+        self.assertEquals(local.stats['partial_refreshes'], 1)
+
+    def test_managers_see_switches_updated_elsewhere(self):
+        local = Manager(storage=self.local)
+        remote = Manager(storage=self.remote)
+        remote.register(Switch('x', state=Switch.states.GLOBAL))
+
+        self.clock.now += 5
+        self.assertTrue(local.active('x'))
+
+        switch = remote.switch('x')
+        switch.state = Switch.states.DISABLED
+        remote.update(switch)
+
+        self.clock.now += 5
+        self.assertFalse(local.active('x'))
+
+    def test_ancestors_updated_elsewhere_are_consented_with(self):
+        for manager in (Manager(storage=self.local),
+                        Manager(storage=self.local,
+                                decision_cache=DecisionCache())):
+            self.check_parent_disabled_elsewhere(manager)
+
+    def check_parent_disabled_elsewhere(self, local):
+        # Written straight to the other instance's storage, as another
+        # process would, without moving this process' global generation
+        self.remote['default.p'] = Switch('p', state=Switch.states.GLOBAL)
+        self.remote['default.p:c'] = Switch('p:c', concent=True,
+                                            state=Switch.states.GLOBAL)
+
+        self.clock.now += 5
+        self.assertTrue(local.active('p:c'))
+
+        self.remote['default.p'] = Switch('p', state=Switch.states.DISABLED)
+
+        # Only the parent is refreshed from the feed
+        self.clock.now += 5
+        self.assertFalse(local.active('p'))
+        self.assertFalse(local.active('p:c'))
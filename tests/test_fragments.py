@@ -0,0 +1,94 @@
+"""
+Switch fragment cache tests
+"""
+import os
+import pickle
+import unittest
+
+import jinja2
+
+import gutter.appengine
+from gutter.appengine import registry
+from gutter.appengine.fragments import SwitchFragments
+from gutter.client import arguments, signals
+from gutter.client.models import Switch, Condition, Manager
+from gutter.client.operators.comparable import Equals
+
+TEMPLATE_PATH = os.path.join(os.path.dirname(gutter.appengine.__file__),
+                             'templates')
+
+
+class User(arguments.Container):
+
+    email = arguments.String(lambda self: self.input.email)
+
+
+class SwitchFragmentsTests(unittest.TestCase):
+
+    def setUp(self):
+        registry.arguments.register(User.email)
+
+        for signal in (signals.switch_registered, signals.switch_updated,
+                       signals.switch_unregistered):
+            self.addCleanup(signal.reset)
+
+        environment = jinja2.Environment(
+            loader=jinja2.FileSystemLoader(TEMPLATE_PATH),
+            autoescape=True,
+        )
+        self.fragments = SwitchFragments(environment)
+
+        self.manager = Manager(storage=dict())
+        switch = Switch('switch', state=Switch.states.SELECTIVE,
+                        label='A <switch>')
+        switch.conditions = [Condition(User, 'email', Equals(value='a@b'))]
+        self.manager.register(switch)
+
+    def test_renders_the_switch_macro(self):
+        fragment = self.fragments.render(self.manager.switch('switch'))
+
+        self.assertTrue('<form id="switch"' in fragment)
+        self.assertTrue('A &lt;switch&gt;' in fragment)
+        self.assertTrue('a@b' in fragment)
+
+    def test_unchanged_switches_are_not_rendered_again(self):
+        first = self.fragments.render(self.manager.switch('switch'))
+        second = self.fragments.render(self.manager.switch('switch'))
+
+        self.assertTrue(second is first)
+        self.assertEquals(self.fragments.renders, 1)
+
+    def test_changed_switches_are_rendered_again(self):
+        switch = self.manager.switch('switch')
+        self.fragments.render(switch)
+
+        # Changed here, without saving
+        switch.label = 'Renamed'
+
+        self.assertTrue('Renamed' in self.fragments.render(switch))
+        self.assertEquals(self.fragments.renders, 2)
+
+    def test_switches_reloaded_from_the_storage_are_rendered_again(self):
+        self.fragments.render(self.manager.switch('switch'))
+
+        # Changed on another instance: the storage hands out a new object
+        reloaded = pickle.loads(pickle.dumps(self.manager.switch('switch')))
+        object.__setattr__(reloaded, 'label', 'Renamed')
+
+        self.assertTrue('Renamed' in self.fragments.render(reloaded))
+        self.assertEquals(self.fragments.renders, 2)
+
+    def test_writes_and_unregistering_discard_fragments(self):
+        switch = self.manager.switch('switch')
+        self.fragments.render(switch)
+
+        switch.save()
+        self.assertFalse('switch' in self.fragments.cache)
+
+        self.fragments.render(switch)
+        self.manager.update_many([switch])
+        self.assertFalse('switch' in self.fragments.cache)
+
+        self.fragments.render(switch)
+        self.manager.unregister('switch')
+        self.assertFalse('switch' in self.fragments.cache)
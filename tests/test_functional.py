@@ -11,7 +11,7 @@ from gutter.client.operators.identity import Truthy
 from gutter.client.operators.misc import Percent, PercentRange
 
 from gutter.client.models import Switch, Condition, Manager
-from gutter.client import arguments
+from gutter.client import arguments, signals
 
 
 class deterministicstring(str):
@@ -148,7 +148,7 @@ class FunctionalTests(unittest.TestCase):
         if condition:
             conditions.append(condition)
 
-        [switch.conditions.append(c) for c in conditions]
+        switch.conditions = conditions
         if 'manager' in kwargs:
             kwargs.get('manager', self.manager).register(switch)
         else:
@@ -322,9 +322,9 @@ class FunctionalTests(unittest.TestCase):
         self.assertEquals(len(germany.switches), 1)
         self.assertEquals(len(usa.switches), 1)
 
-        self.assertEquals(usa.switches[0].conditions, [self.age_21_plus])
+        self.assertEquals(usa.switches[0].conditions, (self.age_21_plus,))
         self.assertEquals(germany.switches[0].conditions,
-                          [self.age_not_under_18])
+                          (self.age_not_under_18,))
 
         usa.input(self.jeff)
         self.assertTrue(usa.active('booze'))
@@ -387,6 +387,26 @@ class FunctionalTests(unittest.TestCase):
         self.assertEquals(self.manager.switch('foo').state,
                           Switch.states.GLOBAL)
 
+    def test_unsaved_changes_apply_to_the_switch(self):
+        switch = Switch('answer', state=Switch.states.SELECTIVE)
+        switch.conditions = [self.answer_to_life]
+
+        self.assertTrue(switch.enabled_for(42))
+        self.assertFalse(switch.enabled_for(7))
+
+        switch.state = Switch.states.GLOBAL
+        self.assertTrue(switch.enabled_for(7))
+
+        switch.state = Switch.states.SELECTIVE
+        switch.conditions = [Condition(IntegerArguments, 'value',
+                                       Equals(value=7))]
+        self.assertTrue(switch.enabled_for(7))
+        self.assertFalse(switch.enabled_for(42))
+
+        switch.compounded = True
+        switch.conditions = []
+        self.assertFalse(switch.enabled_for(7))
+
     def test_concent_with_different_arguments(self):
         # Test that a parent switch with a different argument type from the
         # child works.
@@ -398,3 +418,58 @@ class FunctionalTests(unittest.TestCase):
 
         self.manager.input(self.jeff, 77)
         self.assertFalse(self.manager.active('can drink:answer to life'))
+
+    def test_active_many_matches_active(self):
+        names = [switch.name for switch in self.manager.switches]
+
+        for inputs in ((self.jeff,), (self.bill, 4242, 0.8),
+                       (self.timmy, 42), (self.frank, self.jeff), ()):
+            self.manager.input(*inputs)
+
+            expected = dict((name, self.manager.active(name))
+                            for name in names)
+            self.assertEquals(self.manager.active_many(names), expected)
+
+    def test_active_many_honours_extra_and_exclusive_inputs(self):
+        manager = self.manager
+        manager.input(self.frank)
+
+        self.assertEquals(manager.active_many(['can drink', 'can vote']),
+                          {'can drink': False, 'can vote': False})
+        self.assertEquals(
+            manager.active_many(['can drink', 'can vote'], self.bill),
+            {'can drink': True, 'can vote': True})
+
+        manager.input(self.bill)
+        self.assertEquals(
+            manager.active_many(['can drink', 'can drink:wine'], self.frank,
+                                exclusive=True),
+            {'can drink': False, 'can drink:wine': False})
+
+    def test_active_many_evaluates_shared_parents_once(self):
+        checked = []
+        signals.switch_checked.connect(checked.append)
+        self.addCleanup(signals.switch_checked.reset)
+
+        self.manager.input(self.jeff, 42)
+        self.manager.active('can drink')
+        parent_checks = len(checked)
+        del checked[:]
+
+        results = self.manager.active_many(['can drink:wine',
+                                            'can drink:answer to life'])
+
+        self.assertEquals(results, {'can drink:wine': True,
+                                    'can drink:answer to life': True})
+        self.assertEquals(
+            len([s for s in checked if s.name == 'can drink']),
+            parent_checks
+        )
+
+    def test_active_many_raises_for_unknown_switches(self):
+        with self.assertRaises(ValueError):
+            self.manager.active_many(['can drink', 'no such switch'])
+
+        self.manager.autocreate = True
+        self.assertEquals(self.manager.active_many(['no such switch']),
+                          {'no such switch': False})
@@ -0,0 +1,125 @@
+"""
+Asynchronous evaluation tests
+"""
+import unittest
+
+from gutter.client import arguments
+from gutter.client.futures import Deferred
+from gutter.client.models import Switch, Condition, Manager
+from gutter.client.operators.comparable import Equals, MoreThan
+
+
+class Future(object):
+
+    def __init__(self, log, name, value):
+        self.log = log
+        self.name = name
+        self.value = value
+        log.append(('start', name))
+
+    def get_result(self):
+        self.log.append(('wait', self.name))
+        return self.value
+
+
+class Account(object):
+
+    def __init__(self, log, name, age):
+        self.log = log
+        self.name = name
+        self.age = age
+
+
+class AccountArguments(arguments.Container):
+    COMPATIBLE_TYPE = Account
+
+    name = arguments.String(
+        lambda self: Future(self.input.log, 'name', self.input.name)
+    )
+    age = arguments.Value(
+        lambda self: Future(self.input.log, 'age', self.input.age)
+    )
+
+
+class AsyncEvaluationTests(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = Manager(storage=dict())
+        self.log = []
+
+        self.register('adult', Condition(AccountArguments, 'age',
+                                         MoreThan(lower_limit=17)))
+        self.register('adult:bob', Condition(AccountArguments, 'name',
+                                             Equals(value='bob')))
+
+    def register(self, name, *conditions):
+        switch = Switch(name, state=Switch.states.SELECTIVE)
+        switch.conditions = conditions
+        self.manager.register(switch)
+
+    def test_getters_returning_futures_work_synchronously(self):
+        self.assertTrue(self.manager.active('adult:bob',
+                                            Account(self.log, 'bob', 30)))
+        self.assertFalse(self.manager.active('adult:bob',
+                                             Account(self.log, 'bob', 10)))
+
+    def test_every_getter_starts_before_any_is_waited_for(self):
+        bob = Account(self.log, 'bob', 30)
+        amy = Account(self.log, 'amy', 40)
+
+        future = self.manager.active_async('adult:bob', bob, amy)
+        self.assertEquals(sorted(self.log),
+                          [('start', 'age'), ('start', 'age'),
+                           ('start', 'name'), ('start', 'name')])
+
+        # Waiting still short-circuits as active does, so only bob's
+        # futures are waited for
+        self.assertTrue(future.get_result())
+        self.assertEquals(self.log[4:], [('wait', 'age'), ('wait', 'name')])
+
+    def test_results_match_active_many(self):
+        names = ['adult', 'adult:bob']
+
+        for age in (10, 30):
+            for name in ('bob', 'amy'):
+                account = Account(self.log, name, age)
+                self.assertEquals(
+                    self.manager.active_many_async(names,
+                                                   account).get_result(),
+                    self.manager.active_many(names, account)
+                )
+
+    def test_inputs_that_do_not_apply_are_not_fetched(self):
+        future = self.manager.active_async('adult', 42)
+
+        self.assertFalse(future.get_result())
+        self.assertEquals(self.log, [])
+
+    def test_constant_switches_are_not_fetched(self):
+        self.register('global', Condition(AccountArguments, 'age',
+                                          MoreThan(lower_limit=17)))
+        switch = self.manager.switch('global')
+        switch.state = Switch.states.GLOBAL
+        switch.save()
+
+        future = self.manager.active_async('global',
+                                           Account(self.log, 'bob', 10))
+
+        self.assertTrue(future.get_result())
+        self.assertEquals(self.log, [])
+
+
+class DeferredTests(unittest.TestCase):
+
+    def test_result_is_computed_once(self):
+        calls = []
+        deferred = Deferred(lambda: calls.append(1) or len(calls))
+
+        self.assertEquals(deferred.get_result(), 1)
+        self.assertEquals(deferred.get_result(), 1)
+
+    def test_errors_are_raised_on_every_call(self):
+        deferred = Deferred(lambda: 1 / 0)
+
+        self.assertRaises(ZeroDivisionError, deferred.get_result)
+        self.assertRaises(ZeroDivisionError, deferred.get_result)
@@ -0,0 +1,146 @@
+"""
+Key index tests
+"""
+import unittest
+
+from gutter.client import signals
+from gutter.client.index import KeyIndex
+from gutter.client.models import Manager, Switch, _current_generation
+from gutter.client.storage import SnapshotDict
+
+from durabledict import MemoryDict
+
+
+class CountingMemoryDict(MemoryDict):
+    """
+    A ``MemoryDict`` counting the attributes it answers from ``__getattr__``,
+    each of which syncs it first.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.missing = []
+        super(CountingMemoryDict, self).__init__(*args, **kwargs)
+
+    def __getattr__(self, name):
+        self.missing.append(name)
+        return super(CountingMemoryDict, self).__getattr__(name)
+
+
+class KeyIndexTests(unittest.TestCase):
+
+    def setUp(self):
+        self.storage = dict.fromkeys(['a', 'a:b', 'a:b:c', 'a:b-x', 'a:d',
+                                      'a:d:e:f', 'ab', 'b', u'a:\xe9'])
+        self.index = KeyIndex(self.storage, _current_generation)
+
+    def test_lists_keys_with_a_prefix(self):
+        self.assertEquals(self.index.prefixed('a:b'),
+                          ['a:b', 'a:b-x', 'a:b:c'])
+        self.assertEquals(self.index.prefixed('z'), [])
+        self.assertEquals(len(self.index.prefixed('')), len(self.storage))
+
+    def test_lists_direct_children(self):
+        self.assertEquals(self.index.children('a:', ':'),
+                          ['a:b', 'a:b-x', 'a:d', u'a:\xe9'])
+        self.assertEquals(self.index.children('a:d:', ':'), [])
+
+    def test_is_rebuilt_when_the_storage_changes(self):
+        self.index.prefixed('a')
+        self.storage['a:z'] = None
+
+        self.assertTrue('a:z' in self.index.prefixed('a:'))
+        self.assertEquals(self.index.rebuilds, 2)
+
+
+class ManagerIndexTests(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = Manager(storage=dict())
+
+        for name in ('a', 'a:b', 'a:b:c', 'a:b-x', 'a:d', 'b'):
+            self.manager.register(Switch(name))
+
+    def test_lists_children(self):
+        self.assertEquals(self.manager.get_children('a'),
+                          ['a:b', 'a:b-x', 'a:b:c', 'a:d'])
+        self.assertEquals(self.manager.get_children('a', recursive=False),
+                          ['a:b', 'a:b-x', 'a:d'])
+
+    def test_registering_updates_the_index_in_place(self):
+        self.manager.switches
+        rebuilds = self.manager._Manager__index.rebuilds
+
+        self.manager.register(Switch('a:e'))
+        self.manager.unregister('a:d')
+
+        self.assertTrue('a:e' in self.manager.get_children('a'))
+        self.assertFalse('a:d' in self.manager.get_children('a'))
+        self.assertEquals(self.manager._Manager__index.rebuilds, rebuilds)
+
+    def test_durable_storages_are_updated_in_place(self):
+        manager = Manager(storage=MemoryDict())
+        manager.register(Switch('a'))
+        manager.switches
+        rebuilds = manager._Manager__index.rebuilds
+
+        manager.register(Switch('a:b'))
+        manager.register_many([Switch('a:c'), Switch('a:d')])
+        manager.unregister('a:c')
+
+        self.assertEquals(manager.get_children('a'), ['a:b', 'a:d'])
+        self.assertEquals(manager._Manager__index.rebuilds, rebuilds)
+
+    def test_durable_storages_synced_elsewhere_are_rebuilt(self):
+        storage = MemoryDict()
+        manager = Manager(storage=storage)
+        manager.register(Switch('a'))
+        manager.switches
+        rebuilds = manager._Manager__index.rebuilds
+
+        storage['default.a:x'] = Switch('a:x')
+        manager.register(Switch('a:b'))
+
+        self.assertEquals(manager.get_children('a'), ['a:b', 'a:x'])
+        self.assertEquals(manager._Manager__index.rebuilds, rebuilds + 1)
+
+    def test_unregister_removes_descendants_first(self):
+        unregistered = []
+        signals.switch_unregistered.connect(
+            lambda switch: unregistered.append(switch.name)
+        )
+        self.addCleanup(signals.switch_unregistered.reset)
+
+        self.manager.unregister('a:b')
+
+        self.assertEquals(unregistered, ['a:b:c', 'a:b'])
+        self.assertEquals(sorted(s.name for s in self.manager.switches),
+                          ['a', 'a:b-x', 'a:d', 'b'])
+
+    def test_namespaces_share_the_index(self):
+        namespaced = self.manager.namespaced('other')
+        namespaced.register(Switch('c'))
+
+        self.assertEquals([s.name for s in namespaced.switches], ['c'])
+        self.assertEquals(len(self.manager.switches), 6)
+
+    def test_sync_stamps_are_read_without_syncing(self):
+        storage = CountingMemoryDict()
+        manager = Manager(storage=storage)
+        manager.register(Switch('a', state=Switch.states.GLOBAL))
+        manager.register(Switch('a:b', state=Switch.states.GLOBAL,
+                                concent=True))
+        del storage.missing[:]
+
+        self.assertTrue(manager.active('a:b'))
+        self.assertEquals(manager.get_children('a'), ['a:b'])
+        self.assertFalse('generation' in storage.missing)
+        self.assertFalse('last_synced' in storage.missing)
+
+    def test_snapshot_storages_are_indexed(self):
+        manager = Manager(storage=SnapshotDict(dict()))
+        manager.register(Switch('a'))
+        manager.register(Switch('a:b'))
+
+        self.assertEquals(manager.get_children('a'), ['a:b'])
+        manager.unregister('a')
+        self.assertEquals(manager.switches, [])
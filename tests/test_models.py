@@ -0,0 +1,522 @@
+"""
+Switch and Manager unit tests
+"""
+
+import pickle
+import threading
+import unittest
+
+from gutter.client.encoding import JsonPickleEncoding
+from gutter.client.operators.comparable import Equals, MoreThan
+from gutter.client.models import (
+    Switch,
+    Condition,
+    Manager,
+    _current_generation,
+)
+from gutter.client.scope import evaluation_scope
+from gutter.client import arguments, scope, signals
+from helpers import BatchStorage, IntegerArguments, Person, PersonArguments
+
+
+class CountingPerson(Person):
+
+    def __init__(self, name, age):
+        super(CountingPerson, self).__init__(name, age)
+        self.reads = 0
+
+    def get_age(self):
+        self.reads += 1
+        return self.age
+
+
+class CountingArguments(arguments.Container):
+    COMPATIBLE_TYPE = CountingPerson
+
+    age = arguments.Value(lambda self: self.input.get_age())
+
+
+class EvaluationPlanTests(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = Manager(storage=dict())
+        self.adult = Condition(PersonArguments, 'age',
+                               MoreThan(lower_limit=17))
+        self.is_bob = Condition(PersonArguments, 'name', Equals(value='bob'))
+        self.is_42 = Condition(IntegerArguments, 'value', Equals(value=42))
+
+    def switch(self, *conditions, **kwargs):
+        switch = Switch('switch', state=Switch.states.SELECTIVE, **kwargs)
+        switch.conditions = list(conditions)
+        self.manager.register(switch)
+        return switch
+
+    def test_global_and_disabled_switches_compile_to_constants(self):
+        switch = self.switch(self.adult)
+
+        switch.state = Switch.states.GLOBAL
+        self.assertTrue(switch.compile().constant)
+
+        switch.state = Switch.states.DISABLED
+        self.assertFalse(switch.compile().constant)
+
+        switch.state = Switch.states.SELECTIVE
+        self.assertEquals(switch.compile().constant, None)
+
+    def test_conditions_are_grouped_by_compatible_type(self):
+        plan = self.switch(self.adult, self.is_42, self.is_bob).plan
+
+        self.assertEquals(plan.conditions_for(Person),
+                          (self.adult, self.is_bob))
+        self.assertEquals(plan.conditions_for(int), (self.is_42,))
+        self.assertEquals(plan.conditions_for(float), ())
+
+    def test_conditions_resolve_for_subclasses_of_compatible_type(self):
+        class Employee(Person):
+            pass
+
+        plan = self.switch(self.adult).plan
+        self.assertEquals(plan.conditions_for(Employee), (self.adult,))
+
+    def test_combinator_follows_compounded(self):
+        self.assertTrue(self.switch(self.adult).plan.combinator is any)
+        self.assertTrue(
+            self.switch(self.adult, compounded=True).plan.combinator
+            is not any
+        )
+
+    def test_plan_is_reused_between_checks(self):
+        switch = self.switch(self.adult)
+        plan = switch.plan
+
+        switch.enabled_for(Person('bob', 30))
+        switch.enabled_for(Person('amy', 10))
+
+        self.assertTrue(switch.plan is plan)
+
+    def test_plan_is_rebuilt_on_save(self):
+        switch = self.switch(self.adult)
+        self.assertTrue(switch.enabled_for(Person('amy', 20)))
+
+        switch.conditions = [self.is_bob]
+        switch.save()
+
+        self.assertFalse(switch.enabled_for(Person('amy', 20)))
+        self.assertTrue(switch.enabled_for(Person('bob', 20)))
+
+    def test_plan_is_rebuilt_on_register(self):
+        switch = self.switch(self.adult)
+        plan = switch.plan
+
+        self.manager.register(switch)
+
+        self.assertTrue(switch.plan is not plan)
+
+    def test_plan_is_not_part_of_switch_state(self):
+        switch = self.switch(self.adult)
+        switch.plan
+
+        self.assertFalse('_Switch__plan' in switch.__getstate__())
+        self.assertFalse('_Switch__plan' in switch.changes)
+
+
+class EvaluationScopeTests(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = Manager(storage=dict())
+
+        for name, operator in (('adult', MoreThan(lower_limit=17)),
+                               ('adult:senior', MoreThan(lower_limit=64)),
+                               ('answer', Equals(value=42))):
+            switch = Switch(name, state=Switch.states.SELECTIVE)
+            switch.conditions = [
+                Condition(CountingArguments, 'age', operator)
+            ]
+            self.manager.register(switch)
+
+    def test_argument_is_extracted_once_per_active_call(self):
+        person = CountingPerson('bob', 70)
+
+        self.assertTrue(self.manager.active('adult:senior', person))
+        self.assertEquals(person.reads, 1)
+
+    def test_argument_is_extracted_once_per_active_many_call(self):
+        person = CountingPerson('bob', 70)
+
+        self.assertEquals(
+            self.manager.active_many(['adult', 'adult:senior', 'answer'],
+                                     person),
+            {'adult': True, 'adult:senior': True, 'answer': False}
+        )
+        self.assertEquals(person.reads, 1)
+
+    def test_each_active_call_gets_a_fresh_scope(self):
+        person = CountingPerson('bob', 70)
+
+        self.manager.active('adult', person)
+        self.manager.active('answer', person)
+
+        self.assertEquals(person.reads, 2)
+
+    def test_scope_can_span_several_calls(self):
+        person = CountingPerson('bob', 70)
+
+        with evaluation_scope():
+            self.manager.active('adult', person)
+            self.manager.active('answer', person)
+            self.manager.active_many(['adult:senior'], person)
+
+        self.assertEquals(person.reads, 1)
+
+    def test_nested_scopes_share_the_outer_scope(self):
+        with evaluation_scope() as outer:
+            with evaluation_scope() as inner:
+                self.assertTrue(inner is outer)
+
+    def test_scopes_are_local_to_the_context(self):
+        seen = []
+
+        def other():
+            seen.append(scope.current())
+            with scope.within(outer):
+                seen.append(scope.current())
+            seen.append(scope.current())
+
+        with evaluation_scope() as outer:
+            thread = threading.Thread(target=other)
+            thread.start()
+            thread.join()
+
+            self.assertTrue(scope.current() is outer)
+
+        self.assertEquals(seen, [None, outer, None])
+        self.assertEquals(scope.current(), None)
+
+
+class AncestorTests(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = Manager(storage=dict())
+        self.checked = []
+        signals.switch_checked.connect(self.checked.append)
+        self.addCleanup(signals.switch_checked.reset)
+
+        for name in ('a', 'a:b', 'a:b:c', 'a:b:c:d', 'a:b:c:e', 'a:b:c:f'):
+            switch = Switch(name, state=Switch.states.SELECTIVE)
+            switch.conditions = [
+                Condition(PersonArguments, 'age', MoreThan(lower_limit=17))
+            ]
+            self.manager.register(switch)
+
+    def checks_of(self, name):
+        return len([s for s in self.checked if s.name == name])
+
+    def test_ancestors_are_listed_nearest_first(self):
+        switch = self.manager.switch('a:b:c:d')
+
+        self.assertEquals(switch.ancestors, ('a:b:c', 'a:b', 'a'))
+        self.assertEquals(switch.parent, 'a:b:c')
+        self.assertEquals(self.manager.switch('a').ancestors, ())
+        self.assertEquals(self.manager.switch('a').parent, None)
+
+    def test_ancestors_follow_the_key_separator(self):
+        switch = Switch('a/b:c')
+        self.assertEquals(switch.ancestors, ('a/b',))
+
+        switch.manager = type('SlashManager', (object,),
+                              {'key_separator': '/'})()
+        self.assertEquals(switch.ancestors, ('a',))
+
+    def test_siblings_share_ancestor_results_within_a_scope(self):
+        adult = Person('bob', 30)
+
+        with evaluation_scope():
+            for name in ('a:b:c:d', 'a:b:c:e', 'a:b:c:f'):
+                self.assertTrue(self.manager.active(name, adult))
+
+        for name in ('a', 'a:b', 'a:b:c'):
+            self.assertEquals(self.checks_of(name), 1)
+
+    def test_inactive_ancestor_short_circuits_descendants(self):
+        child = Person('amy', 10)
+
+        self.assertEquals(
+            self.manager.active_many(['a:b:c:d', 'a:b:c:e'], child),
+            {'a:b:c:d': False, 'a:b:c:e': False}
+        )
+        self.assertEquals(self.checks_of('a'), 1)
+        self.assertEquals(self.checks_of('a:b'), 0)
+        self.assertEquals(self.checks_of('a:b:c:d'), 0)
+
+    def test_results_are_kept_per_input_tuple(self):
+        with evaluation_scope():
+            self.assertTrue(self.manager.active('a:b', Person('bob', 30)))
+            self.assertFalse(self.manager.active('a:b', Person('amy', 10)))
+
+    def test_updated_ancestor_is_picked_up(self):
+        adult = Person('bob', 30)
+        self.assertTrue(self.manager.active('a:b:c:d', adult))
+
+        parent = self.manager.switch('a:b')
+        parent.state = Switch.states.DISABLED
+        parent.save()
+
+        self.assertFalse(self.manager.active('a:b:c:d', adult))
+
+    def test_ancestor_updated_within_a_scope_is_picked_up(self):
+        adult = Person('bob', 30)
+
+        with evaluation_scope():
+            self.assertTrue(self.manager.active('a:b:c:d', adult))
+
+            parent = self.manager.switch('a')
+            parent.state = Switch.states.DISABLED
+            parent.save()
+
+            self.assertFalse(self.manager.active('a:b:c:e', adult))
+
+    def test_switches_that_do_not_consent_ignore_ancestors(self):
+        orphan = Switch('x:y', state=Switch.states.GLOBAL, concent=False)
+        self.manager.register(orphan)
+
+        self.assertTrue(self.manager.active('x:y'))
+
+
+class ThreadTests(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = Manager(storage=dict(), inputs=[Person('bob', 30)])
+
+        for name in ('a', 'a:b'):
+            switch = Switch(name, state=Switch.states.SELECTIVE)
+            switch.conditions = [
+                Condition(PersonArguments, 'age', MoreThan(lower_limit=17))
+            ]
+            self.manager.register(switch)
+
+    def in_thread(self, func):
+        results = []
+        thread = threading.Thread(target=lambda: results.append(func()))
+        thread.start()
+        thread.join()
+        return results[0]
+
+    def test_inputs_are_kept_per_thread(self):
+        self.manager.input(Person('amy', 10))
+
+        def check():
+            default = self.manager.active('a:b')
+            self.manager.flush()
+            return default, self.manager.inputs
+
+        self.assertEquals(self.in_thread(check), (True, []))
+        self.assertFalse(self.manager.active('a:b'))
+
+    def test_index_and_chains_are_shared_between_threads(self):
+        self.assertTrue(self.manager.active('a:b'))
+        switches = self.manager.switches
+        index = self.manager._Manager__index
+        rebuilds = index.rebuilds
+        stamp = (_current_generation(), None)
+        chain = self.manager._Manager__chains.get('default.a:b', stamp)
+
+        self.assertEquals(self.in_thread(lambda: self.manager.switches),
+                          switches)
+        self.assertTrue(self.in_thread(lambda: self.manager.active('a:b')))
+        self.assertEquals(index.rebuilds, rebuilds)
+        self.assertTrue(
+            self.manager._Manager__chains.get('default.a:b', stamp) is chain
+        )
+
+    def test_writes_are_seen_by_other_threads(self):
+        self.assertTrue(self.manager.active('a:b'))
+
+        def write():
+            parent = self.manager.switch('a')
+            parent.state = Switch.states.DISABLED
+            parent.save()
+
+        self.in_thread(write)
+        self.assertFalse(self.manager.active('a:b'))
+
+
+class BatchTests(unittest.TestCase):
+
+    def setUp(self):
+        self.storage = BatchStorage()
+        self.manager = Manager(storage=self.storage)
+        self.switches = [Switch(name, state=Switch.states.GLOBAL)
+                         for name in ('a', 'a:b', 'c')]
+
+    def connect(self, signal):
+        received = []
+        signal.connect(received.append)
+        self.addCleanup(signal.reset)
+        return received
+
+    def test_register_many_writes_once_and_signals_each_switch(self):
+        registered = self.connect(signals.switches_registered)
+        each = self.connect(signals.switch_registered)
+        self.manager.register_many(self.switches)
+
+        self.assertEquals(self.storage.batches, [
+            ('set', ['default.a', 'default.a:b', 'default.c'])
+        ])
+        self.assertEquals(registered, [self.switches])
+        self.assertEquals(each, self.switches)
+        self.assertEquals(self.manager.get_children('a'), ['a:b'])
+        self.assertTrue(self.manager.active('a:b'))
+
+    def test_register_many_rejects_blank_names_before_writing(self):
+        with self.assertRaises(ValueError):
+            self.manager.register_many(self.switches + [Switch('')])
+
+        self.assertEquals(self.storage, {})
+
+    def test_update_many_signals_each_switch_and_resets_switches(self):
+        self.manager.register_many(self.switches)
+        updated = self.connect(signals.switches_updated)
+        each = self.connect(signals.switch_updated)
+
+        for switch in self.switches:
+            switch.state = Switch.states.DISABLED
+
+        self.manager.update_many(self.switches)
+
+        self.assertEquals(updated, [self.switches])
+        self.assertEquals(each, self.switches)
+        self.assertFalse(any(switch.changed for switch in self.switches))
+        self.assertFalse(self.manager.active('c'))
+
+    def test_switches_many_reads_once(self):
+        self.manager.register_many(self.switches)
+        del self.storage.batches[:]
+
+        switches = self.manager.switches_many(['a', 'c'])
+
+        self.assertEquals(switches, {'a': self.switches[0],
+                                     'c': self.switches[2]})
+        self.assertTrue(switches['a'].manager is self.manager)
+        self.assertEquals(self.storage.batches,
+                          [('get', ['default.a', 'default.c'])])
+
+    def test_switches_many_autocreates_missing_switches_at_once(self):
+        self.assertRaises(ValueError, self.manager.switches_many, ['x'])
+
+        self.manager.autocreate = True
+        registered = self.connect(signals.switches_registered)
+        switches = self.manager.switches_many(['x', 'y'])
+
+        self.assertEquals(sorted(switches), ['x', 'y'])
+        self.assertEquals(len(registered), 1)
+        self.assertEquals(switches['x'].state, Switch.states.DISABLED)
+
+    def test_active_many_reads_one_batch_per_level_of_ancestors(self):
+        self.manager.register_many(self.switches)
+        del self.storage.batches[:]
+
+        self.assertEquals(self.manager.active_many(['a:b', 'c']),
+                          {'a:b': True, 'c': True})
+        self.assertEquals(self.storage.batches,
+                          [('get', ['default.a:b', 'default.c']),
+                           ('get', ['default.a'])])
+
+    def test_namespaced_batches(self):
+        namespaced = self.manager.namespaced('ns')
+        namespaced.register_many(self.switches)
+
+        self.assertEquals(sorted(self.storage), ['ns.a', 'ns.a:b', 'ns.c'])
+        self.assertEquals(sorted(namespaced.switches_many(['a', 'c'])),
+                          ['a', 'c'])
+
+
+class LegacySwitch(object):
+    """
+    Mimics the state of switches pickled before switches had __slots__.
+    """
+
+    def __init__(self, **state):
+        self.__dict__.update(state)
+        self.__dict__['_Switch__init_vars'] = dict(state)
+
+
+class SwitchStateTests(unittest.TestCase):
+
+    def setUp(self):
+        self.adult = Condition(PersonArguments, 'age',
+                               MoreThan(lower_limit=17))
+        self.switch = Switch('switch', state=Switch.states.SELECTIVE,
+                             label='Switch')
+        self.switch.conditions = [self.adult]
+        self.switch.reset()
+
+    def assertSameSwitch(self, switch):
+        self.assertEquals(switch, self.switch)
+        self.assertEquals(switch.label, 'Switch')
+        self.assertEquals(switch.conditions, (self.adult,))
+        self.assertEquals(switch.manager, None)
+        self.assertFalse(switch.changed)
+        self.assertTrue(switch.enabled_for(Person('bob', 30)))
+
+    def test_switches_have_no_instance_dict(self):
+        self.assertFalse(hasattr(self.switch, '__dict__'))
+
+    def test_conditions_are_stored_as_tuples(self):
+        self.switch.conditions = [self.adult]
+        self.assertEquals(self.switch.conditions, (self.adult,))
+
+    def test_changes_are_tracked_on_assignment(self):
+        self.assertEquals(self.switch.changes, {})
+
+        self.switch.label = 'Renamed'
+        self.switch.state = Switch.states.GLOBAL
+        self.switch.state = Switch.states.SELECTIVE
+
+        self.assertTrue(self.switch.changed)
+        self.assertEquals(self.switch.changes, {
+            'label': {'previous': 'Switch', 'current': 'Renamed'}
+        })
+
+        self.switch.reset()
+        self.assertFalse(self.switch.changed)
+
+    def test_assignments_move_the_revision(self):
+        revision = self.switch.revision
+
+        self.switch.label = 'Renamed'
+        self.switch.manager = None
+        self.switch.reset()
+
+        self.assertEquals(self.switch.revision, revision + 1)
+        self.assertEquals(pickle.loads(pickle.dumps(self.switch)).revision, 0)
+
+    def test_pickles(self):
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            self.assertSameSwitch(
+                pickle.loads(pickle.dumps(self.switch, protocol))
+            )
+
+    def test_jsonpickles(self):
+        encoded = JsonPickleEncoding.encode(self.switch)
+        self.assertSameSwitch(JsonPickleEncoding.decode(encoded))
+
+    def test_state_excludes_manager_and_caches(self):
+        self.switch.manager = Manager(storage=dict())
+        self.switch.plan
+
+        self.assertEquals(sorted(self.switch.__getstate__()),
+                          sorted(Switch.fields))
+
+    def test_reads_switches_pickled_by_older_versions(self):
+        legacy = LegacySwitch(_name='switch', label='Switch',
+                              description=None,
+                              state=Switch.states.SELECTIVE,
+                              conditions=[self.adult], compounded=False,
+                              concent=True, manager=None, parent=None)
+
+        for protocol in range(pickle.HIGHEST_PROTOCOL + 1):
+            data = pickle.dumps(legacy, protocol).replace(
+                '%s\nLegacySwitch' % LegacySwitch.__module__,
+                'gutter.client.models\nSwitch'
+            )
+            self.assertSameSwitch(pickle.loads(data))
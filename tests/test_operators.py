@@ -0,0 +1,216 @@
+"""
+Operator tests
+"""
+import pickle
+import random
+import unittest
+
+from gutter.client.arguments import variables
+from gutter.client.cache import LRUCache
+from gutter.client.operators import Base
+from gutter.client.operators.misc import Percent, PercentRange, \
+    StablePercent, StablePercentRange, numpy, stable_bucket
+
+
+def outcome(func, value):
+    try:
+        return func(value)
+    except Exception as error:
+        return type(error)
+
+
+class Prefixed(Base):
+
+    name = 'prefixed'
+    arguments = ('_prefix',)
+
+
+class BaseTests(unittest.TestCase):
+
+    def test_underscored_arguments_are_part_of_the_operator(self):
+        operator = Prefixed(_prefix='abc')
+
+        self.assertEquals(operator.variables, dict(_prefix='abc'))
+        self.assertFalse(operator == Prefixed(_prefix='xyz'))
+
+        copy = pickle.loads(pickle.dumps(operator))
+        self.assertEquals(copy._prefix, 'abc')
+        self.assertEquals(copy, operator)
+
+
+class PercentRangeTests(unittest.TestCase):
+
+    def setUp(self):
+        rand = random.Random(42)
+
+        self.operators = [PercentRange(lower_limit=10, upper_limit=20),
+                          PercentRange(lower_limit=12.5, upper_limit=57.3),
+                          PercentRange(lower_limit=0, upper_limit=100),
+                          Percent(percentage=10),
+                          Percent(percentage=33.3)]
+
+        self.integers = ([rand.randint(-10 ** 6, 10 ** 6)
+                          for _ in range(500)] + range(-200, 200))
+        self.floats = ([rand.uniform(-10 ** 6, 10 ** 6) for _ in range(500)] +
+                       [x / 10.0 for x in range(-500, 500)] +
+                       [x / 100.0 for x in range(-500, 500)] +
+                       [1e20, 123456789012.5, float('inf'), float('nan')])
+        self.others = [True, False, 10 ** 30, -10 ** 28, 'jeff', u'frank',
+                       variables.Integer(5), variables.String('abc')]
+
+    def test_fast_paths_match_the_decimal_path(self):
+        for operator in self.operators:
+            for value in self.integers + self.floats + self.others:
+                self.assertEquals(
+                    outcome(operator.applies_to, value),
+                    outcome(operator._applies_to_decimal, value),
+                    '%s: %r' % (operator, value)
+                )
+
+    def test_cached_bounds_follow_the_limits(self):
+        operator = PercentRange(lower_limit=10, upper_limit=20)
+        self.assertTrue(operator.applies_to(15))
+
+        operator.upper_limit = operator._context.create_decimal('14')
+        self.assertFalse(operator.applies_to(15))
+
+    def test_cached_bounds_are_not_part_of_the_operator(self):
+        operator = PercentRange(lower_limit=10, upper_limit=20)
+        operator.applies_to(15)
+
+        self.assertEquals(sorted(operator.variables),
+                          ['lower_limit', 'upper_limit'])
+        self.assertEquals(operator,
+                          PercentRange(lower_limit=10, upper_limit=20))
+        self.assertEquals(pickle.loads(pickle.dumps(operator)), operator)
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_batches_match_the_scalar_path(self):
+        for operator in self.operators:
+            for values in (self.integers, self.floats, self.others,
+                           [True, False, True]):
+                expected = [outcome(operator._applies_to_decimal, value)
+                            for value in values]
+
+                if any(isinstance(e, type) for e in expected):
+                    # The decimal path raises for some of these values
+                    continue
+
+                self.assertEquals(
+                    operator.applies_to_many(values).tolist(), expected
+                )
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_batches_accept_arrays_and_iterables(self):
+        operator = Percent(percentage=50)
+
+        mask = operator.applies_to_many(numpy.arange(100).reshape(10, 10))
+        self.assertEquals(mask.shape, (10, 10))
+        self.assertEquals(mask.sum(), 50)
+
+        mask = operator.applies_to_many(iter(range(100)))
+        self.assertEquals(mask.tolist(), [x < 50 for x in range(100)])
+
+        mask = operator.applies_to_many(numpy.arange(100, dtype=numpy.uint8))
+        self.assertEquals(mask.sum(), 50)
+
+
+class StablePercentTests(unittest.TestCase):
+
+    def test_buckets_are_stable_and_salted(self):
+        self.assertEquals(stable_bucket('jeff'), stable_bucket('jeff'))
+        self.assertEquals(stable_bucket(u'jeff'), stable_bucket('jeff'))
+        self.assertEquals(stable_bucket(variables.String('jeff')),
+                          stable_bucket('jeff'))
+
+        unsalted = [stable_bucket('user-%d' % i) for i in range(200)]
+        salted = [stable_bucket('user-%d' % i, 'salt') for i in range(200)]
+        self.assertNotEquals(unsalted, salted)
+
+        for bucket in unsalted + salted:
+            self.assertTrue(0 <= bucket < 10000)
+
+    def test_buckets_are_spread_evenly(self):
+        operator = StablePercent(percentage=25)
+        hits = sum(operator.applies_to('user-%d' % i) for i in range(4000))
+
+        self.assertTrue(900 < hits < 1100, hits)
+
+    def test_ranges_partition_the_buckets(self):
+        ranges = [StablePercentRange(0, 12.5, salt='a'),
+                  StablePercentRange(12.5, 60, salt='a'),
+                  StablePercentRange(60, 100, salt='a')]
+
+        for i in range(500):
+            value = 'user-%d' % i
+            self.assertEquals(
+                sum(r.applies_to(value) for r in ranges), 1, value
+            )
+
+    def test_fractional_limits_cover_their_decimal_buckets(self):
+        for limit, bucket in ((0.1, 10), (1.1, 110), (5.7, 570)):
+            self.assertEquals(StablePercent(limit)._bucket_bounds(),
+                              (0, bucket))
+            self.assertEquals(StablePercentRange(0, limit)._bucket_bounds(),
+                              (0, bucket))
+            self.assertEquals(
+                StablePercentRange(limit, 100)._bucket_bounds(),
+                (bucket, 10000)
+            )
+
+    def test_unhashable_values_are_bucketed(self):
+        operator = StablePercent(percentage=100)
+        self.assertTrue(operator.applies_to(['not', 'hashable']))
+
+    def test_variables_include_the_salt(self):
+        operator = StablePercent(percentage=10, salt='exp')
+
+        self.assertEquals(operator.variables,
+                          dict(percentage=10.0, salt='exp'))
+        self.assertEquals(pickle.loads(pickle.dumps(operator)), operator)
+        self.assertEquals(str(operator), 'in stable 10.0% of values '
+                                         '(salted "exp")')
+
+    @unittest.skipIf(numpy is None, 'numpy is not installed')
+    def test_batches_match_the_scalar_path(self):
+        operator = StablePercentRange(10, 35.5, salt='b')
+        values = ['user-%d' % i for i in range(200)]
+
+        self.assertEquals(operator.applies_to_many(values).tolist(),
+                          [operator.applies_to(v) for v in values])
+
+
+class LRUCacheTests(unittest.TestCase):
+
+    def test_evicts_the_least_recently_used_entry(self):
+        cache = LRUCache(maxsize=2)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEquals(len(cache), 2)
+        self.assertTrue('a' in cache)
+        self.assertFalse('b' in cache)
+        self.assertEquals(cache.get('c'), 3)
+
+    def test_counts_hits_and_misses(self):
+        cache = LRUCache()
+        cache.set('a', 1)
+        cache.get('a')
+        cache.get('b', 'default')
+
+        self.assertEquals((cache.hits, cache.misses), (1, 1))
+
+    def test_pop_and_clear(self):
+        cache = LRUCache()
+        cache.set('a', 1)
+        cache.set('b', 2)
+
+        self.assertEquals(cache.pop('a'), 1)
+        self.assertEquals(cache.pop('a', 'gone'), 'gone')
+
+        cache.clear()
+        self.assertEquals(len(cache), 0)
+        cache.set('c', 3)
+        self.assertEquals(cache.get('c'), 3)
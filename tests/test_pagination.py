@@ -0,0 +1,100 @@
+"""
+Switch index pagination tests
+"""
+import unittest
+
+from gutter.appengine.pagination import search
+from gutter.client import arguments
+from gutter.client.models import Switch, Condition, Manager
+from gutter.client.operators.comparable import Equals
+
+
+class User(arguments.Container):
+
+    email = arguments.String(lambda self: self.input.email)
+
+
+class Account(arguments.Container):
+
+    group = arguments.String(lambda self: self.input.group)
+
+
+class SearchTests(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = Manager(storage=dict(), autocreate=True)
+        switches = []
+
+        for index in xrange(10):
+            switch = Switch('switch%02d' % index,
+                            state=Switch.states.GLOBAL if index % 2
+                            else Switch.states.DISABLED)
+            argument, attribute = (
+                (User, 'email') if index < 5 else (Account, 'group')
+            )
+            switch.conditions = [Condition(argument, attribute,
+                                           Equals(value='x'))]
+            switches.append(switch)
+
+        for name in ('checkout', 'checkout:new', 'checkout:new:fast',
+                     'checkouts'):
+            switches.append(Switch(name))
+
+        self.manager.register_many(switches)
+
+    def names(self, page):
+        return [switch.name for switch in page.switches]
+
+    def test_pages_follow_the_cursor(self):
+        first = search(self.manager, limit=6)
+        self.assertEquals(self.names(first), [
+            'checkout', 'checkout:new', 'checkout:new:fast', 'checkouts',
+            'switch00', 'switch01',
+        ])
+        self.assertEquals(first.next_cursor, 'switch01')
+
+        second = search(self.manager, cursor=first.next_cursor, limit=6)
+        self.assertEquals(self.names(second), [
+            'switch02', 'switch03', 'switch04', 'switch05', 'switch06',
+            'switch07',
+        ])
+
+        last = search(self.manager, cursor=second.next_cursor, limit=6)
+        self.assertEquals(self.names(last), ['switch08', 'switch09'])
+        self.assertEquals(last.next_cursor, None)
+
+    def test_cursor_survives_deleted_switches(self):
+        first = search(self.manager, limit=5)
+        self.manager.unregister(first.next_cursor)
+
+        self.assertEquals(
+            self.names(search(self.manager, cursor=first.next_cursor,
+                              limit=2)),
+            ['switch01', 'switch02']
+        )
+
+    def test_filters_by_name(self):
+        self.assertEquals(self.names(search(self.manager, name='NEW')),
+                          ['checkout:new', 'checkout:new:fast'])
+
+    def test_filters_by_namespace(self):
+        self.assertEquals(
+            self.names(search(self.manager, namespace='checkout')),
+            ['checkout', 'checkout:new', 'checkout:new:fast']
+        )
+
+    def test_filters_by_state_and_argument(self):
+        page = search(self.manager, state=Switch.states.GLOBAL,
+                      argument='account.', limit=2)
+
+        self.assertEquals(self.names(page), ['switch05', 'switch07'])
+        self.assertEquals(self.names(search(self.manager,
+                                            cursor=page.next_cursor,
+                                            state=Switch.states.GLOBAL,
+                                            argument='account.')),
+                          ['switch09'])
+
+    def test_missing_switches_are_not_autocreated(self):
+        self.assertEquals(search(self.manager, namespace='nothing').switches,
+                          [])
+        self.assertFalse('nothing' in self.manager)
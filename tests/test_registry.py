@@ -24,7 +24,11 @@ class OperatorsDictTests(GaeTestCase):
                       ('Identity', [('true', 'True')]),
                       ('Misc',
                        [('percent_range', 'In The Percentage Range Of'),
-                        ('percent', 'Within The Percentage Of')])])
+                        ('stable_percent_range',
+                         'In The Stable Percentage Range Of'),
+                        ('percent', 'Within The Percentage Of'),
+                        ('stable_percent',
+                         'Within The Stable Percentage Of')])])
 
     def test_operators_create_correct_arguments(self):
         args = registry.operators.arguments
@@ -35,6 +39,8 @@ class OperatorsDictTests(GaeTestCase):
             'percent': ('percentage', ),
             'equals': ('value', ),
             'percent_range': ('lower_limit', 'upper_limit'),
+            'stable_percent': ('percentage', 'salt'),
+            'stable_percent_range': ('lower_limit', 'upper_limit', 'salt'),
             'between': ('lower_limit', 'upper_limit'),
             'true': (),
             'before': ('upper_limit', )
@@ -65,3 +71,28 @@ class ArgumentsDictTests(GaeTestCase):
                          [('User', [('User.email', 'User.email'),
                                     ('User.nickname', 'User.nickname'),
                                     ('User.user_id', 'User.user_id')])])
+
+    def test_choices_are_memoized_until_registering(self):
+        registry.arguments.register(User.email)
+        choices = registry.arguments.as_choices
+
+        self.assertTrue(registry.arguments.as_choices is choices)
+
+        registry.arguments.register(User.nickname)
+        self.assertFalse(registry.arguments.as_choices is choices)
+        self.assertEqual(len(registry.arguments.as_choices[0][1]), 2)
+
+
+class MemoizedOperatorsTests(GaeTestCase):
+
+    def test_choices_and_arguments_are_memoized_until_registering(self):
+        operators = registry.OperatorsDict(registry.Equals)
+        choices = operators.as_choices
+        arguments = operators.arguments
+
+        self.assertTrue(operators.as_choices is choices)
+        self.assertTrue(operators.arguments is arguments)
+
+        operators.register(registry.Truthy)
+        self.assertEqual(sorted(operators.arguments), ['equals', 'true'])
+        self.assertEqual(len(operators.as_choices), 2)
@@ -0,0 +1,162 @@
+"""
+Signal tests
+"""
+import threading
+import time
+import unittest
+
+from gutter.client.signals import Signal, QueuedReceiver
+
+
+class SignalTests(unittest.TestCase):
+
+    def setUp(self):
+        self.signal = Signal()
+        self.addCleanup(self.signal.reset)
+
+    def test_has_receivers_follows_connect_and_reset(self):
+        self.assertFalse(self.signal.has_receivers)
+
+        self.signal.connect(lambda *args: None)
+        self.assertTrue(self.signal.has_receivers)
+
+        self.signal.reset()
+        self.assertFalse(self.signal.has_receivers)
+
+    def test_calls_callbacks_synchronously(self):
+        calls = []
+        self.assertEquals(self.signal.connect(calls.append), calls.append)
+
+        self.signal.call('switch')
+        self.assertEquals(calls, ['switch'])
+
+    def test_rejects_uncallable_callbacks(self):
+        self.assertRaises(ValueError, self.signal.connect, 'nope')
+
+    def test_queued_receivers_get_batches(self):
+        batches = []
+        receiver = self.signal.connect(batches.append, queued=True,
+                                       batch_size=2)
+
+        for i in range(5):
+            self.signal.call('switch', i)
+
+        self.assertTrue(receiver.flush(timeout=5))
+        self.assertEquals(sum(batches, []),
+                          [('switch', i) for i in range(5)])
+        self.assertTrue(all(len(batch) <= 2 for batch in batches))
+        self.assertEquals(receiver.delivered, 5)
+
+    def test_reset_closes_queued_receivers(self):
+        receiver = self.signal.connect(lambda batch: None, queued=True)
+        self.signal.reset()
+
+        receiver('late')
+        self.assertEquals(receiver.dropped, 1)
+
+
+class QueuedReceiverTests(unittest.TestCase):
+
+    def setUp(self):
+        self.gate = threading.Event()
+        self.batches = []
+
+    def blocking_callback(self, batch):
+        self.gate.wait()
+        self.batches.append(batch)
+
+    def fill(self, receiver):
+        # The first event is taken by the worker, which then blocks on the
+        # gate; the rest stay buffered.
+        receiver(0)
+
+        while receiver.stats['pending']:
+            time.sleep(0.001)
+
+        for i in range(1, 6):
+            receiver(i)
+
+        self.gate.set()
+        self.assertTrue(receiver.flush(timeout=5))
+        receiver.close()
+
+        return [args[0] for batch in self.batches for args in batch]
+
+    def test_drops_newest_events_when_full(self):
+        receiver = QueuedReceiver(self.blocking_callback, maxsize=3)
+
+        self.assertEquals(self.fill(receiver), [0, 1, 2, 3])
+        self.assertEquals(receiver.dropped, 2)
+
+    def test_drops_oldest_events_when_full(self):
+        receiver = QueuedReceiver(self.blocking_callback, maxsize=3,
+                                  drop='oldest')
+
+        self.assertEquals(self.fill(receiver), [0, 3, 4, 5])
+        self.assertEquals(receiver.dropped, 2)
+
+    def test_callback_errors_are_counted(self):
+        def fail(batch):
+            raise RuntimeError(batch)
+
+        receiver = QueuedReceiver(fail)
+        receiver('event')
+
+        self.assertTrue(receiver.flush(timeout=5))
+        self.assertEquals(receiver.stats, dict(pending=0, delivered=0,
+                                               dropped=0, errors=1))
+        receiver.close()
+
+    def test_unthreaded_receivers_deliver_on_flush(self):
+        receiver = QueuedReceiver(self.batches.append, batch_size=2,
+                                  threaded=False)
+
+        for i in range(3):
+            receiver(i)
+
+        self.assertEquals(self.batches, [])
+        self.assertEquals(receiver._QueuedReceiver__worker, None)
+        self.assertTrue(receiver.flush())
+        self.assertEquals(self.batches, [[(0,), (1,)], [(2,)]])
+
+    def test_keyword_arguments_are_delivered(self):
+        receiver = QueuedReceiver(self.batches.append, threaded=False)
+
+        receiver('switch', checked=True)
+        receiver('other')
+        receiver.flush()
+
+        [batch] = self.batches
+        self.assertEquals(batch, [('switch',), ('other',)])
+        self.assertEquals(batch[0].kwargs, {'checked': True})
+        self.assertEquals(batch[1].kwargs, {})
+
+    def test_signals_queue_keyword_arguments(self):
+        signal = Signal()
+        receiver = signal.connect(self.batches.append, queued=True,
+                                  threaded=False)
+        self.addCleanup(signal.reset)
+
+        signal.call('switch', checked=True)
+        receiver.flush()
+
+        self.assertEquals(self.batches[0][0].kwargs, {'checked': True})
+
+    def test_dead_workers_are_restarted(self):
+        def exit_once(batch):
+            if not self.batches:
+                self.batches.append(None)
+                raise SystemExit()
+            self.batches.append(batch)
+
+        receiver = QueuedReceiver(exit_once)
+        receiver('lost')
+        receiver._QueuedReceiver__worker.join(5)
+
+        receiver('delivered')
+        self.assertTrue(receiver.flush(timeout=5))
+        self.assertEquals(self.batches, [None, [('delivered',)]])
+        receiver.close()
+
+    def test_rejects_unknown_drop_policies(self):
+        self.assertRaises(ValueError, QueuedReceiver, list, drop='random')
@@ -0,0 +1,106 @@
+"""
+Switch statistics tests
+"""
+import threading
+import unittest
+
+from gutter.client import stats
+from gutter.client.models import Switch, Condition, Manager
+from gutter.client.operators.comparable import MoreThan
+from helpers import Broken, Person, PersonArguments
+
+
+class StatsTests(unittest.TestCase):
+
+    def setUp(self):
+        stats.reset()
+        stats.enable()
+        self.addCleanup(stats.disable)
+
+        self.manager = Manager(storage=dict())
+
+        adult = Switch('adult', state=Switch.states.SELECTIVE)
+        adult.conditions = [
+            Condition(PersonArguments, 'age', MoreThan(lower_limit=17))
+        ]
+        self.manager.register(adult)
+
+        senior = Switch('adult:senior', state=Switch.states.SELECTIVE)
+        senior.conditions = [
+            Condition(PersonArguments, 'age', MoreThan(lower_limit=64))
+        ]
+        self.manager.register(senior)
+
+    def test_records_calls_checks_and_results(self):
+        self.manager.active('adult', Person('bob', 30))
+        self.manager.active('adult', Person('bob', 10))
+        self.manager.active('adult:senior', Person('bob', 70))
+
+        snapshot = stats.snapshot()
+
+        self.assertEquals(snapshot['adult']['calls'], 2)
+        self.assertEquals(snapshot['adult']['checks'], 3)
+        self.assertEquals((snapshot['adult']['true'],
+                           snapshot['adult']['false']), (2, 1))
+        self.assertAlmostEquals(snapshot['adult']['true_ratio'], 2 / 3.0)
+        self.assertEquals(snapshot['adult:senior']['calls'], 1)
+
+    def test_records_time_spent(self):
+        self.manager.active_many(['adult', 'adult:senior'], Person('bob', 70))
+        counters = stats.snapshot()['adult:senior']
+
+        self.assertEquals(counters['calls'], 1)
+        self.assertTrue(counters['time'] > 0)
+        self.assertTrue(counters['argument_time'] > 0)
+        self.assertTrue(counters['operator_time'] > 0)
+        self.assertTrue(counters['time'] >= counters['operator_time'])
+
+    def test_records_condition_errors(self):
+        broken = Switch('broken', state=Switch.states.SELECTIVE)
+        broken.conditions = [
+            Condition(PersonArguments, 'age', Broken())
+        ]
+        self.manager.register(broken)
+
+        self.assertFalse(self.manager.active('broken', Person('bob', 30)))
+        self.assertEquals(stats.snapshot()['broken']['errors'], 1)
+
+    def test_merges_counters_from_every_thread(self):
+        thread = threading.Thread(
+            target=self.manager.active, args=('adult', Person('bob', 30))
+        )
+        thread.start()
+        thread.join()
+
+        self.manager.active('adult', Person('bob', 30))
+        self.assertEquals(stats.snapshot()['adult']['checks'], 2)
+
+    def test_finished_threads_are_folded_into_the_totals(self):
+        threads = [
+            threading.Thread(
+                target=self.manager.active, args=('adult', Person('bob', 30))
+            )
+            for _ in range(5)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEquals(stats.snapshot()['adult']['checks'], 5)
+
+        recording = [thread_ref() for thread_ref, _ in stats._all_counters]
+        for thread in threads:
+            self.assertNotIn(thread, recording)
+
+        self.manager.active('adult', Person('bob', 30))
+        self.assertEquals(stats.snapshot()['adult']['checks'], 6)
+
+        stats.reset()
+        self.assertEquals(stats.snapshot(), {})
+
+    def test_nothing_is_recorded_when_disabled(self):
+        stats.disable()
+        self.manager.active('adult', Person('bob', 30))
+
+        self.assertEquals(stats.snapshot(), {})
@@ -0,0 +1,315 @@
+"""
+Storage wrapper tests
+"""
+import threading
+import unittest
+
+from durabledict import MemoryDict
+
+from gutter.client.cache import MemoryCache
+from gutter.client.models import Switch, Manager
+from gutter.client.storage import (
+    SnapshotDict,
+    TieredDict,
+    get_many,
+    set_many,
+)
+from helpers import BatchStorage, Clock
+
+
+class SnapshotDictTests(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+        self.backing = MemoryDict()
+        self.backing['a'] = 1
+        self.storage = SnapshotDict(self.backing,
+                                    check_interval=5,
+                                    max_staleness=60,
+                                    background_refresh=False,
+                                    clock=self.clock)
+
+    def write_elsewhere(self, key, value):
+        self.backing[key] = value
+
+    def test_reads_are_served_from_the_snapshot(self):
+        self.assertEquals(self.storage['a'], 1)
+        self.assertTrue('a' in self.storage)
+        self.assertEquals(self.storage.keys(), ['a'])
+        self.assertEquals(dict(self.storage.iteritems()), {'a': 1})
+
+        with self.assertRaises(KeyError):
+            self.storage['b']
+
+        self.assertEquals(self.storage.stats['hits'], 1)
+        self.assertEquals(self.storage.stats['misses'], 1)
+        self.assertEquals(self.storage.stats['refreshes'], 1)
+
+    def test_changes_elsewhere_are_seen_once_the_check_interval_passes(self):
+        self.write_elsewhere('b', 2)
+        self.assertFalse('b' in self.storage)
+
+        self.clock.now += 5
+        self.assertEquals(self.storage['b'], 2)
+        self.assertEquals(self.storage.stats['refreshes'], 2)
+
+    def test_snapshot_is_only_reloaded_when_the_generation_changes(self):
+        for _ in range(3):
+            self.clock.now += 5
+            self.assertEquals(self.storage['a'], 1)
+
+        self.assertEquals(self.storage.stats['checks'], 3)
+        self.assertEquals(self.storage.stats['refreshes'], 1)
+
+    def test_writes_are_visible_immediately(self):
+        self.storage['b'] = 2
+        self.assertEquals(self.storage['b'], 2)
+        self.assertEquals(self.backing['b'], 2)
+
+        del self.storage['a']
+        self.assertFalse('a' in self.storage)
+        self.assertFalse('a' in self.backing)
+
+    def test_stale_snapshot_is_served_while_revalidating(self):
+        gate = threading.Event()
+        gate.set()
+        generation = self.backing.last_updated
+
+        def slow_generation():
+            gate.wait(5)
+            return generation()
+
+        storage = SnapshotDict(self.backing,
+                               generation=slow_generation,
+                               check_interval=5,
+                               max_staleness=60,
+                               clock=self.clock)
+        self.write_elsewhere('b', 2)
+        gate.clear()
+
+        self.clock.now += 10
+        self.assertFalse('b' in storage)
+        self.assertEquals(storage.stats['stale_reads'], 1)
+
+        gate.set()
+        for _ in range(500):
+            if 'b' in storage:
+                break
+            threading.Event().wait(0.01)
+
+        self.assertEquals(storage['b'], 2)
+        self.assertEquals(storage.stats['refreshes'], 2)
+
+    def test_snapshot_older_than_max_staleness_is_refreshed_inline(self):
+        storage = SnapshotDict(self.backing,
+                               check_interval=5,
+                               max_staleness=60,
+                               clock=self.clock)
+        self.write_elsewhere('b', 2)
+
+        self.clock.now += 60
+        self.assertEquals(storage['b'], 2)
+        self.assertEquals(storage.stats['stale_reads'], 0)
+
+    def test_storage_without_generation_sees_its_own_writes(self):
+        storage = SnapshotDict(dict(a=1), clock=self.clock)
+        storage['b'] = 2
+
+        self.clock.now += 5
+        self.assertEquals(sorted(storage.keys()), ['a', 'b'])
+
+    def test_manager_can_use_a_snapshot(self):
+        manager = Manager(storage=self.storage)
+        manager.register(Switch('new', state=Switch.states.GLOBAL))
+
+        self.assertTrue(manager.active('new'))
+        self.assertEquals([s.name for s in manager.switches], ['new'])
+
+    def test_snapshot_reads_and_writes_several_keys_at_once(self):
+        self.storage.set_many([('b', 2), ('c', 3)])
+
+        self.assertEquals(self.storage.get_many(['a', 'c', 'x']),
+                          dict(a=1, c=3))
+        self.assertEquals(self.backing['b'], 2)
+        self.assertEquals(self.storage.stats['hits'], 2)
+        self.assertEquals(self.storage.stats['misses'], 1)
+
+
+class BatchHelperTests(unittest.TestCase):
+
+    def test_plain_storages_are_used_one_key_at_a_time(self):
+        storage = dict(a=1)
+        set_many(storage, [('b', 2), ('c', 3)])
+
+        self.assertEquals(storage, dict(a=1, b=2, c=3))
+        self.assertEquals(get_many(storage, ['a', 'c', 'x']), dict(a=1, c=3))
+
+    def test_batch_storages_are_used_once_per_batch(self):
+        storage = BatchStorage(a=1)
+        set_many(storage, [('b', 2), ('c', 3)])
+
+        self.assertEquals(get_many(storage, ['a', 'c', 'x']), dict(a=1, c=3))
+        self.assertEquals(storage.batches, [
+            ('set', ['b', 'c']),
+            ('get', ['a', 'c', 'x']),
+        ])
+
+
+class BlockingStorage(BatchStorage):
+
+    def __init__(self, *args, **kwargs):
+        super(BlockingStorage, self).__init__(*args, **kwargs)
+        self.entered = threading.Event()
+        self.proceed = threading.Event()
+        self.proceed.set()
+
+    def get_many(self, keys):
+        self.entered.set()
+        self.proceed.wait()
+        return super(BlockingStorage, self).get_many(keys)
+
+
+class TieredDictTests(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+        self.backing = BlockingStorage(a=1, b=2)
+        self.shared = MemoryCache(clock=self.clock)
+        self.storage = self.tiered()
+
+    def tiered(self):
+        # One instance of the application
+        return TieredDict(self.backing, shared=self.shared, ttl=5,
+                          shared_ttl=60, clock=self.clock)
+
+    def test_reads_go_through_the_tiers(self):
+        self.assertEquals(self.storage['a'], 1)
+        self.assertEquals(self.storage['a'], 1)
+        self.assertEquals(self.tiered()['a'], 1)
+        self.assertEquals(self.backing.batches, [('get', ['a'])])
+
+        stats = self.storage.stats
+        self.assertEquals((stats['local_hits'], stats['local_misses']),
+                          (1, 1))
+        self.assertEquals(stats['local_hit_ratio'], 0.5)
+        self.assertEquals((stats['shared_hits'], stats['shared_misses']),
+                          (0, 1))
+        self.assertEquals(stats['storage_reads'], 1)
+
+    def test_missing_keys_are_cached(self):
+        self.assertFalse('x' in self.storage)
+        self.assertEquals(self.storage.get('x'), None)
+        self.assertRaises(KeyError, lambda: self.tiered()['x'])
+        self.assertEquals(len(self.backing.batches), 1)
+
+    def test_reads_several_keys_at_once(self):
+        self.assertEquals(self.storage.get_many(['a', 'b', 'x']),
+                          dict(a=1, b=2))
+        self.assertEquals(self.storage.get_many(['a', 'b', 'x']),
+                          dict(a=1, b=2))
+        self.assertEquals(self.backing.batches, [('get', ['a', 'b', 'x'])])
+
+    def test_writes_update_both_tiers(self):
+        self.storage['a'] = 10
+        del self.storage['b']
+        self.storage.set_many([('c', 3)])
+
+        other = self.tiered()
+        self.assertEquals(other.get_many(['a', 'b', 'c']), dict(a=10, c=3))
+        self.assertEquals(self.backing, dict(a=10, c=3))
+        self.assertEquals(self.backing.batches, [('set', ['c'])])
+
+    def test_expired_entries_are_refilled(self):
+        self.storage['a']
+        self.backing['a'] = 10
+
+        self.clock.now += 5
+        self.assertEquals(self.storage['a'], 1)
+
+        self.clock.now += 60
+        self.assertEquals(self.storage['a'], 10)
+
+    def test_one_request_refills_while_others_get_the_stale_value(self):
+        self.storage['a']
+        self.clock.now += 120
+        self.backing['a'] = 10
+        self.backing.entered.clear()
+        self.backing.proceed.clear()
+
+        refill = threading.Thread(target=lambda: self.storage['a'])
+        refill.start()
+        self.backing.entered.wait()
+
+        # The refill is blocked in the storage
+        self.assertEquals(self.storage['a'], 1)
+        self.assertEquals(self.tiered()['a'], 1)
+
+        self.backing.proceed.set()
+        refill.join()
+
+        self.assertEquals(self.storage['a'], 10)
+        self.assertEquals(len(self.backing.batches), 2)
+        self.assertEquals(self.storage.stats['stale_reads'], 1)
+
+    def test_keys_share_a_fixed_table_of_leases(self):
+        storage = TieredDict(self.backing, clock=self.clock, lease_stripes=1)
+        keys = ['k%d' % index for index in range(100)]
+        self.backing.update((key, 1) for key in keys)
+
+        # Every key has the same lease, taken once by the read
+        self.assertEquals(storage.get_many(keys),
+                          dict((key, 1) for key in keys))
+        self.assertEquals(self.backing.batches, [('get', sorted(keys))])
+        self.assertEquals(len(storage._TieredDict__leases), 1)
+
+        self.clock.now += 10
+        self.assertEquals(storage['k1'], 1)
+        self.assertEquals(len(self.backing.batches), 2)
+
+    def test_works_without_a_shared_tier(self):
+        storage = TieredDict(self.backing, clock=self.clock)
+
+        self.assertEquals(storage['a'], 1)
+        self.assertEquals(storage['a'], 1)
+        self.assertEquals(storage.stats['shared_hit_ratio'], None)
+
+    def test_manager_can_use_tiers(self):
+        manager = Manager(storage=self.storage)
+        manager.register(Switch('x', state=Switch.states.GLOBAL))
+
+        self.assertEquals(self.tiered()['default.x'].state,
+                          Switch.states.GLOBAL)
+        self.assertTrue(manager.active('x'))
+        self.assertEquals([switch.name for switch in manager.switches],
+                          ['x'])
+
+
+class MemoryCacheTests(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = Clock()
+        self.cache = MemoryCache(clock=self.clock)
+
+    def test_stores_copies(self):
+        value = {'a': 1}
+        self.cache.set('key', value)
+        value['a'] = 2
+
+        self.assertEquals(self.cache.get('key'), {'a': 1})
+        self.assertEquals(self.cache.get_multi(['key', 'x']),
+                          {'key': {'a': 1}})
+
+    def test_entries_expire(self):
+        self.cache.set_multi({'a': 1}, time=10)
+        self.clock.now += 10
+        self.assertEquals(self.cache.get('a'), None)
+
+    def test_add_only_stores_new_keys(self):
+        self.assertTrue(self.cache.add('lease', 1, time=10))
+        self.assertFalse(self.cache.add('lease', 1, time=10))
+
+        self.clock.now += 10
+        self.assertTrue(self.cache.add('lease', 1, time=10))
+
+        self.cache.delete('lease')
+        self.assertTrue(self.cache.add('lease', 1, time=10))
@@ -0,0 +1,152 @@
+"""
+EnabledSwitchesMiddleware tests
+"""
+import unittest
+
+from gutter.client import signals
+from gutter.client.models import Switch, Manager
+from gutter.client.wsgi import EnabledSwitchesMiddleware
+
+
+class EnabledSwitchesMiddlewareTests(unittest.TestCase):
+
+    def setUp(self):
+        self.manager = Manager(storage=dict())
+
+        for name in ('header', 'first', 'second'):
+            self.manager.register(Switch(name, state=Switch.states.GLOBAL))
+
+        self.addCleanup(signals.switch_active.reset)
+        self.completed = []
+        self.events = []
+
+    def application(self, environ, start_response):
+        self.manager.active('header')
+        start_response('200 OK', [('Content-Type', 'text/plain')])
+
+        self.manager.active('first')
+        self.events.append('first chunk')
+        yield 'first'
+
+        self.manager.active('second')
+        self.events.append('second chunk')
+        yield 'second'
+
+    def start_response(self, status, headers, exc_info=None):
+        self.events.append(('headers', dict(headers)['X-Gutter-Switch']))
+        return self.events.append
+
+    def middleware(self, application=None, **kwargs):
+        return EnabledSwitchesMiddleware(
+            application or self.application,
+            gutter=self.manager,
+            on_complete=lambda environ, switches: self.completed.append(
+                switches),
+            **kwargs
+        )
+
+    def test_buffers_the_body_by_default(self):
+        body = self.middleware()({}, self.start_response)
+
+        self.assertEquals(body, ['first', 'second'])
+        self.assertEquals(self.events, [
+            'first chunk', 'second chunk',
+            ('headers', 'active=header,first,second'),
+        ])
+        self.assertEquals(self.completed, [['header', 'first', 'second']])
+
+    def test_streams_the_body(self):
+        body = self.middleware(streaming=True)({}, self.start_response)
+        self.assertEquals(self.events, [])
+
+        chunks = iter(body)
+        self.assertEquals(next(chunks), 'first')
+        self.assertEquals(self.events, [
+            'first chunk', ('headers', 'active=header,first'),
+        ])
+
+        self.assertEquals(list(chunks), ['second'])
+        self.assertEquals(self.completed, [])
+
+        body.close()
+        self.assertEquals(self.completed, [['header', 'first', 'second']])
+
+    def test_streaming_closes_the_application_body(self):
+        closed = []
+
+        class Body(list):
+            def close(self):
+                closed.append(True)
+
+        def application(environ, start_response):
+            start_response('204 No Content', [])
+            return Body()
+
+        body = self.middleware(application, streaming=True)(
+            {}, self.start_response)
+
+        self.assertEquals(list(body), [])
+        self.assertEquals(self.events, [('headers', 'active=')])
+
+        body.close()
+        body.close()
+        self.assertEquals(closed, [True])
+        self.assertEquals(self.completed, [[]])
+
+    def test_streaming_sends_headers_before_writes(self):
+        def application(environ, start_response):
+            self.manager.active('header')
+            write = start_response('200 OK', [])
+            write('written')
+            self.manager.active('first')
+            return []
+
+        body = self.middleware(application, streaming=True)(
+            {}, self.start_response)
+
+        self.assertEquals(self.events,
+                          [('headers', 'active=header'), 'written'])
+        self.assertEquals(list(body), [])
+        self.assertEquals(len(self.events), 2)
+
+    def test_streaming_holds_back_leading_empty_chunks(self):
+        def application(environ, start_response):
+            start_response('200 OK', [])
+            yield ''
+            self.manager.active('first')
+            yield 'first'
+            yield ''
+
+        body = self.middleware(application, streaming=True)(
+            {}, self.start_response)
+
+        for chunk in body:
+            self.events.append(('chunk', chunk))
+
+        self.assertEquals(self.events, [
+            ('headers', 'active=first'), ('chunk', 'first'), ('chunk', ''),
+        ])
+
+    def test_applications_must_call_start_response(self):
+        def application(environ, start_response):
+            yield 'body'
+
+        for streaming in (False, True):
+            middleware = self.middleware(application, streaming=streaming)
+
+            with self.assertRaises(RuntimeError) as raised:
+                list(middleware({}, self.start_response))
+
+            self.assertTrue('start_response' in str(raised.exception))
+            self.assertEquals(self.events, [])
+
+    def test_streaming_applications_may_call_start_response_lazily(self):
+        def application(environ, start_response):
+            start_response('200 OK', [])
+            yield 'body'
+
+        body = self.middleware(application, streaming=True)(
+            {}, self.start_response)
+
+        self.assertEquals(list(body), ['body'])
+        self.assertEquals(self.events, [('headers', 'active=')])
@@ -0,0 +1,49 @@
+"""
+Select widget tests
+"""
+import unittest
+
+import wtforms
+
+from gutter.appengine.registry import ChoiceTable
+from gutter.appengine.wtforms_extension import SelectField
+
+CHOICES = [
+    ('Comparable', [('between', 'Between'), ('equals', 'Equal <To>')]),
+    ('Misc', [('percent', 'Within The Percentage Of')]),
+]
+
+
+class Form(wtforms.Form):
+
+    table = SelectField(choices=lambda: TABLE)
+    plain = SelectField(choices=CHOICES)
+
+
+TABLE = ChoiceTable(CHOICES)
+
+
+class SelectWidgetTests(unittest.TestCase):
+
+    def render(self, data):
+        form = Form(table=data, plain=data)
+        return form.table(), form.plain()
+
+    def test_prerendered_options_match_rendered_options(self):
+        for data in ('between', 'equals', 'percent', 'missing', None):
+            table, plain = self.render(data)
+            self.assertEquals(table.replace('table', 'plain'), plain)
+
+    def test_only_the_selected_option_is_marked(self):
+        table, _ = self.render('equals')
+
+        self.assertEquals(table.count('selected'), 1)
+        self.assertTrue('<option data-arguments="value" selected '
+                        'value="equals">Equal &lt;To&gt;</option>' in table)
+
+    def test_options_are_rendered_once_per_table(self):
+        self.render('between')
+        options = TABLE.cache.values()[0][0]
+        self.render('equals')
+
+        self.assertTrue(TABLE.cache.values()[0][0] is options)